@@ -4,7 +4,8 @@ from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
 
-from grid.chats.routing import websocket_urlpatterns  # Your WebSocket routing
+from grid.chats.routing import websocket_urlpatterns as chat_urlpatterns
+from grid.recruiters.routing import websocket_urlpatterns as recruiter_urlpatterns
 
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
@@ -13,7 +14,7 @@ application = ProtocolTypeRouter(
     {
         "http": get_asgi_application(),
         "websocket": AuthMiddlewareStack(
-            URLRouter(websocket_urlpatterns)
+            URLRouter(chat_urlpatterns + recruiter_urlpatterns)
         ),  # Wrapping with AuthMiddlewareStack for authentication
     }
 )
@@ -13,13 +13,17 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
 from decouple import Csv, config
 
+
 # Set the project base directory
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 APPS_DIR = BASE_DIR / "grid"
 
 SECRET_KEY = config("DJANGO_SECRET_KEY")
+# Keys the invoice code permutation; must stay fixed once invoices have been issued
+INVOICE_CODE_SECRET = config("INVOICE_CODE_SECRET", default=SECRET_KEY)
 
 ALLOWED_HOSTS = config("DJANGO_ALLOWED_HOSTS", default="127.0.0.1,localhost,localhost:8000", cast=Csv())
 
@@ -146,8 +150,9 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "dj_rest_auth.jwt_auth.JWTCookieAuthentication",  # Required by dj-rest-auth for JWT cookies
-        "rest_framework_simplejwt.authentication.JWTAuthentication",  # SimpleJWT for token authentication
+        # dj-rest-auth's cookie and SimpleJWT's header authentication, loading the user's profiles along
+        "grid.users.authentication.IdentityJWTCookieAuthentication",
+        "grid.users.authentication.IdentityJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",  # Default permission for authenticated access
@@ -160,6 +165,10 @@ REST_FRAMEWORK = {
 
 # PROXY CURL
 PROXYCURL_API_KEY = config("PROXYCURL_API_KEY")
+# grid.core.proxycurl.StubTransport answers from memory instead of calling the API
+PROXYCURL_TRANSPORT = config("PROXYCURL_TRANSPORT", default="grid.core.proxycurl.HttpTransport")
+PROXYCURL_CACHE_TTL = config("PROXYCURL_CACHE_TTL", default=7 * 24 * 60 * 60, cast=int)
+PROXYCURL_NOT_FOUND_TTL = config("PROXYCURL_NOT_FOUND_TTL", default=60 * 60, cast=int)
 
 
 # all-auth
@@ -296,27 +305,94 @@ SWAGGER_SETTINGS = {
 
 REDIS_URL = config("REDIS_URL")
 
-# CACHES = {
-#     "default": {
-#         "BACKEND": "django_redis.cache.RedisCache",
-#         "LOCATION": f"{REDIS_URL}/1",
-#         "OPTIONS": {
-#             "CLIENT_CLASS": "django_redis.client.DefaultClient",
-#         },
-#     }
-# }
+# Set CACHE_URL=locmem:// to run without Redis (single process only, e.g. tests and benchmarks).
+# The Proxycurl lock and stats, the leaderboard refresh keys and the dashboard and exchange rate
+# versions are only shared between the web and Celery processes through Redis.
+CACHE_URL = config("CACHE_URL", default=f"{REDIS_URL}/1")
+
+if CACHE_URL == "locmem://":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": CACHE_URL,
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            },
+        }
+    }
 
 # redis_layer config for chat feature
+# Set CHANNEL_LAYER_URL=memory:// to run without Redis (single process only, e.g. tests and benchmarks)
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [("127.0.0.1", 6379)],  # Replace with your Redis server address
+CHANNEL_LAYER_URL = config("CHANNEL_LAYER_URL", default="redis://127.0.0.1:6379")
+
+if CHANNEL_LAYER_URL == "memory://":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [CHANNEL_LAYER_URL],
+            },
         },
+    }
+
+# Celery
+# Set CELERY_BROKER_URL=memory:// to run tasks in-process as they are sent, without a worker (tests and single-process development)
+
+CELERY_BROKER_URL = config("CELERY_BROKER_URL", default="redis://127.0.0.1:6379/2")
+CELERY_TASK_ALWAYS_EAGER = CELERY_BROKER_URL == "memory://"
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    "rebuild-financial-rollups": {
+        "task": "grid.hires.tasks.rebuild_financial_rollups",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "reconcile-leaderboard": {
+        "task": "grid.recruiters.tasks.reconcile_leaderboard",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "recompute-commission-shares": {
+        "task": "grid.recruiters.tasks.recompute_commission_shares",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "send-overdue-reminders": {
+        "task": "grid.hires.tasks.send_overdue_reminders",
+        "schedule": crontab(hour=8, minute=0),
     },
 }
 
+# Leaderboard
+# ------------------------------------------------------------------------------
+# Seconds a recruiter or agency waits queued for a leaderboard refresh before writes may queue
+# another one, in case the task is lost
+LEADERBOARD_REFRESH_LOCK_TTL = config("LEADERBOARD_REFRESH_LOCK_TTL", default=300, cast=int)
+# Skip queueing a refresh for ids already waiting for one. The Celery worker releases them, so
+# this needs the cache shared with it and is off with CACHE_URL=locmem://
+LEADERBOARD_REFRESH_DEDUP = config("LEADERBOARD_REFRESH_DEDUP", default=CACHE_URL != "locmem://", cast=bool)
+
+# Agency dashboard
+# ------------------------------------------------------------------------------
+# Seconds an assembled dashboard is cached; it is dropped early when its summaries change
+AGENCY_DASHBOARD_CACHE_TTL = config("AGENCY_DASHBOARD_CACHE_TTL", default=60, cast=int)
+
+# Commission share tiers
+# ------------------------------------------------------------------------------
+# Hires of the last this many days count towards a recruiter's RecruiterShare tier
+COMMISSION_SHARE_WINDOW_DAYS = config("COMMISSION_SHARE_WINDOW_DAYS", default=365, cast=int)
+
 # django-allauth
 # ------------------------------------------------------------------------------
 ACCOUNT_ALLOW_REGISTRATION = config("DJANGO_ACCOUNT_ALLOW_REGISTRATION", default=True, cast=bool)
@@ -408,3 +484,9 @@ SOCIALACCOUNT_PROVIDERS = {
 FRONTEND_URL = config("FRONTEND_URL", default="http://localhost:3000")
 
 HTTP_REQUEST_TIMEOUT = 5
+
+# Seconds client signup waits for the company logo and profile picture before leaving them to a task
+SIGNUP_IMAGE_DOWNLOAD_WAIT = config("SIGNUP_IMAGE_DOWNLOAD_WAIT", default=2, cast=float)
+
+# Exchange rates are stored as units of each currency per one unit of this currency
+EXCHANGE_RATE_BASE_CURRENCY = config("EXCHANGE_RATE_BASE_CURRENCY", default="USD")
@@ -25,6 +25,7 @@ from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
 from grid.core.health import health_check
+from grid.core.images import image_variant
 
 
 schema_view = get_schema_view(
@@ -50,6 +51,8 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("", home, name="home"),
     path("health/", health_check, name="health-check"),
+    # Rendered on first request, then served from disk by the web server
+    path("media/variants/<int:size>/<path:name>.<str:image_format>", image_variant, name="image-variant"),
     # API Documentation
     path("swagger<format>/", schema_view.without_ui(cache_timeout=0), name="schema-json"),
     path("swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:57
+
+from django.db import migrations, models
+import grid.core.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("candidates", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="candidate",
+            name="profile_photo",
+            field=models.ImageField(storage=grid.core.storage.ContentAddressedStorage(), upload_to="profile_photos/"),
+        ),
+    ]
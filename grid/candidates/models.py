@@ -1,6 +1,7 @@
 from django.db import models
 
 from grid.core.models import CoreModel
+from grid.core.storage import content_addressed_storage
 from grid.jobs.models import Job
 
 
@@ -39,7 +40,7 @@ class Candidate(CoreModel):
     email = models.EmailField(null=True, blank=True)
     phone = models.CharField(max_length=20, null=True, blank=True)
     linkedin = models.CharField(max_length=255, null=True, blank=True)
-    profile_photo = models.ImageField(upload_to="profile_photos/")
+    profile_photo = models.ImageField(upload_to="profile_photos/", storage=content_addressed_storage)
     stage = models.ForeignKey(Stage, on_delete=models.SET_NULL, null=True, blank=True)
     job = models.ForeignKey(Job, on_delete=models.SET_NULL, null=True, blank=True)
     skills = models.ManyToManyField(Skill, related_name="candidates")
@@ -51,12 +52,52 @@ class Candidate(CoreModel):
     formatted_resume = models.FileField(upload_to="resumes/formatted/", null=True, blank=True)
     edited_resume = models.FileField(upload_to="resumes/edited/", null=True, blank=True)
 
+    # Copied into the search document of the invoices of the candidate's hires (see Invoice.SEARCH_FIELDS)
+    INVOICE_SEARCH_FIELDS = ["first_name", "last_name"]
+
     class Meta:
         ordering = ["last_name", "first_name"]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the recruiter and job as loaded, so a save that moves the candidate refreshes both leaderboard rows
+        instance._stats_recruiter_id = instance.recruiter_id if "recruiter_id" in field_names else None
+        instance._stats_job_id = instance.job_id if "job_id" in field_names else None
+        # and the searched names, so a rename refreshes the candidate's invoices
+        instance._invoice_search_values = (
+            instance.invoice_search_values() if set(cls.INVOICE_SEARCH_FIELDS) <= set(field_names) else None
+        )
+        return instance
+
+    def invoice_search_values(self):
+        return tuple(getattr(self, field) for field in self.INVOICE_SEARCH_FIELDS)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from grid.hires.utils import schedule_invoice_search_refresh
+        from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+        loaded = (getattr(self, "_stats_recruiter_id", None), getattr(self, "_stats_job_id", None))
+        schedule_recruiter_stats([loaded[0], self.recruiter_id], jobs=[loaded, (self.recruiter_id, self.job_id)])
+        self._stats_recruiter_id, self._stats_job_id = self.recruiter_id, self.job_id
+
+        loaded_names = getattr(self, "_invoice_search_values", None)
+        if loaded_names is not None and loaded_names != self.invoice_search_values():
+            schedule_invoice_search_refresh(candidate_ids=[self.pk])
+        self._invoice_search_values = self.invoice_search_values()
+
+    def delete(self, *args, **kwargs):
+        recruiter_id, job_id = self.recruiter_id, self.job_id
+        result = super().delete(*args, **kwargs)
+        from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+        schedule_recruiter_stats([recruiter_id], jobs=[(recruiter_id, job_id)])
+        return result
+
     # Optional properties for convenience
     @property
     def original_resume_size(self):
@@ -81,3 +122,23 @@ class StageLog(CoreModel):
 
     def __str__(self):
         return f"Stage change for {self.candidate} by {self.user}"
+
+    def candidate_recruiter_id(self):
+        # Reuse a loaded candidate, otherwise read only its recruiter column
+        if StageLog.candidate.is_cached(self):
+            return self.candidate.recruiter_id
+        return Candidate.objects.filter(pk=self.candidate_id).values_list("recruiter", flat=True).first()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+        schedule_recruiter_stats([self.candidate_recruiter_id()])
+
+    def delete(self, *args, **kwargs):
+        recruiter_id = self.candidate_recruiter_id()
+        result = super().delete(*args, **kwargs)
+        from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+        schedule_recruiter_stats([recruiter_id])
+        return result
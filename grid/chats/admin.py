@@ -1,12 +1,20 @@
 from django.contrib import admin
 
-from .models import ChatRoom, Message
+from .models import ChatRoom, Message, MessageArchive
 
 
 admin.site.register(ChatRoom)
 
 admin.site.register(Message)
 
+
+@admin.register(MessageArchive)
+class MessageArchiveAdmin(admin.ModelAdmin):
+    list_display = ("chat_room", "period_start", "message_count")
+    ordering = ("-period_start",)
+    exclude = ("payload",)
+
+
 # @admin.register(Message)
 # class MessageAdmin(admin.ModelAdmin):
 #     list_display = ("content", "posted_by", "recipient_user", "recipient_client", "job", "read_status", "created_at")
@@ -0,0 +1,136 @@
+"""
+Cold archive tier for chat messages.
+
+Messages older than a cutoff are moved out of the hot ``Message`` table into one
+``MessageArchive`` row per room and calendar month, stored as zlib-compressed JSON lines.
+Hot queries and indexes only ever cover the retained months, however long the history grows.
+
+Listing a room's messages reads the archive back after the hot ones. Full-text search does
+not: archived messages leave the search index along with the hot table.
+"""
+
+import zlib
+
+from datetime import datetime, timezone
+
+import orjson
+
+from django.db import transaction
+from django.db.models.functions import TruncMonth
+from django.utils import timezone as django_timezone
+from django.utils.dateparse import parse_datetime
+
+from .events import build_message_payload
+from .models import Message, MessageArchive
+
+
+COMPRESSION_LEVEL = 6
+
+
+def month_start(year, month):
+    # Normalise month overflow in either direction, e.g. (2024, 0) -> December 2023
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def next_month(period_start):
+    return month_start(period_start.year, period_start.month + 1)
+
+
+def archive_cutoff(months, now=None):
+    """Return the start of the oldest month to keep hot, ``months`` calendar months back"""
+    now = now or django_timezone.now()
+    return month_start(now.year, now.month - months)
+
+
+def pack(records):
+    lines = (orjson.dumps(record, option=orjson.OPT_UTC_Z) for record in records)
+    return zlib.compress(b"\n".join(lines), COMPRESSION_LEVEL)
+
+
+def unpack(payload):
+    data = zlib.decompress(bytes(payload))
+    return [orjson.loads(line) for line in data.splitlines() if line]
+
+
+def archive_record(message):
+    return {**build_message_payload(message), "created_at": message.created_at}
+
+
+def record_created_at(record):
+    # Records read back from an archive carry ISO strings, fresh ones carry datetimes
+    value = record["created_at"]
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+@transaction.atomic
+def archive_period(chat_room_id, period_start):
+    """
+    Move one room's messages for the month starting at ``period_start`` into the archive.
+
+    Running it again for an already archived month merges any late messages into the
+    existing archive row, so the command is safe to re-run.
+    """
+    period_end = next_month(period_start)
+    messages = list(
+        Message.objects.filter(chat_room_id=chat_room_id, created_at__gte=period_start, created_at__lt=period_end)
+        .prefetch_related("read_by")
+        .order_by("created_at")
+    )
+    if not messages:
+        return 0
+
+    archive, created = MessageArchive.objects.select_for_update().get_or_create(
+        chat_room_id=chat_room_id, period_start=period_start, defaults={"period_end": period_end}
+    )
+    records = [] if created else unpack(archive.payload)
+    records += [archive_record(message) for message in messages]
+    records.sort(key=record_created_at)
+
+    archive.payload = pack(records)
+    archive.message_count = len(records)
+    archive.save(update_fields=["payload", "message_count", "updated_at"])
+
+    Message.objects.filter(pk__in=[message.pk for message in messages]).delete()
+    return len(messages)
+
+
+def archive_messages(months, now=None):
+    """
+    Archive every message created before the last ``months`` calendar months.
+
+    Returns the number of messages moved.
+    """
+    periods = (
+        Message.objects.filter(created_at__lt=archive_cutoff(months, now))
+        .annotate(period=TruncMonth("created_at"))
+        .values_list("chat_room_id", "period")
+        .order_by("period")
+        .distinct()
+    )
+    return sum(archive_period(chat_room_id, period) for chat_room_id, period in periods)
+
+
+def room_archives(chat_room_id, since=None, until=None):
+    """Return the archive rows of a room, newest first, limited to the months starting in ``[since, until)``"""
+    archives = MessageArchive.objects.filter(chat_room_id=chat_room_id)
+    if since is not None:
+        archives = archives.filter(period_start__gte=since)
+    if until is not None:
+        archives = archives.filter(period_start__lt=until)
+    return archives.order_by("-period_start")
+
+
+def archive_records(archives):
+    """Return the messages of ``archives``, newest first"""
+    for archive in archives:
+        yield from reversed(unpack(archive.payload))
+
+
+def archived_messages(chat_room_id, since=None, until=None):
+    """
+    Return the archived messages of a room, newest first.
+
+    Only the months starting in ``[since, until)`` are decompressed when given.
+    """
+    return archive_records(room_archives(chat_room_id, since, until))
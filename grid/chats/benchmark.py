@@ -0,0 +1,145 @@
+"""
+Load harness for the chat WebSocket consumer.
+
+Drives ``ChatConsumer`` through Channels' ``WebsocketCommunicator`` over an in-memory
+channel layer, so fan-out throughput can be measured without Redis or a running server.
+Every room plays a number of rounds; in each round one socket triggers a typing, message
+or read event and the round ends when every socket in the room has received the frame.
+"""
+
+import asyncio
+import math
+import time
+import tracemalloc
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+
+from ..recruiters.models import Recruiter
+from .events import build_message_payload, encode_event
+from .models import ChatRoom, Message
+from .routing import websocket_urlpatterns
+from .views import notify_participants
+
+
+User = get_user_model()
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+        "CONFIG": {"capacity": 1000},
+    },
+}
+
+EVENT_TYPES = ("typing", "message", "read")
+RECEIVE_TIMEOUT = 30
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def create_fixtures(rooms, sockets_per_room):
+    """
+    Create the rooms and users for a run, each room with one message to mark as read.
+
+    Users are bulk created with unusable passwords, since hashing dominates otherwise.
+    Returns a list of ``(room, message, users)``.
+    """
+    users = User.objects.bulk_create(
+        User(email=f"benchmark-{index}@example.com", password="!") for index in range(rooms * (sockets_per_room + 1))
+    )
+    owners, members = users[:rooms], users[rooms:]
+    recruiters = Recruiter.objects.bulk_create(
+        Recruiter(user=user, first_name="Benchmark", last_name=str(index), linkedin="https://linkedin.com/in/benchmark")
+        for index, user in enumerate(owners)
+    )
+    chat_rooms = ChatRoom.objects.bulk_create(ChatRoom(recruiter=recruiter) for recruiter in recruiters)
+
+    fixtures = []
+    for index, room in enumerate(chat_rooms):
+        room_users = members[index * sockets_per_room : (index + 1) * sockets_per_room]
+        message = Message.objects.create(chat_room=room, sender=room_users[0], content="Benchmark message")
+        fixtures.append((room, message, room_users))
+    return fixtures
+
+
+async def connect(application, room, user):
+    communicator = WebsocketCommunicator(application, f"/ws/chat/{room.pk}/")
+    communicator.scope["user"] = user
+    connected, _ = await communicator.connect(timeout=RECEIVE_TIMEOUT)
+    if not connected:
+        raise RuntimeError(f"Socket for {user} was rejected")
+    return communicator
+
+
+async def play_room(room, message, communicators, rounds, latencies):
+    payload = build_message_payload(message, read_by=[])
+
+    for round_number in range(rounds):
+        event_type = EVENT_TYPES[round_number % len(EVENT_TYPES)]
+        sender = communicators[round_number % len(communicators)]
+        started = time.perf_counter()
+
+        if event_type == "typing":
+            await sender.send_to(text_data=encode_event("typing", typing=round_number % 2 == 0))
+        elif event_type == "message":
+            await notify_participants(room.pk, "message_created", payload)
+        else:
+            await sender.send_to(text_data=encode_event("message_read", message_id=str(message.pk)))
+
+        async def receive(communicator):
+            await communicator.receive_from(timeout=RECEIVE_TIMEOUT)
+            latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(receive(communicator) for communicator in communicators))
+
+
+async def run(fixtures, rounds):
+    application = URLRouter(websocket_urlpatterns)
+    connection_count = sum(len(users) for _, _, users in fixtures)
+
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    rooms = [
+        (room, message, await asyncio.gather(*(connect(application, room, user) for user in users)))
+        for room, message, users in fixtures
+    ]
+    memory_per_connection = (tracemalloc.get_traced_memory()[0] - memory_before) / connection_count
+    tracemalloc.stop()
+
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(play_room(room, message, communicators, rounds, latencies) for room, message, communicators in rooms)
+    )
+    elapsed = time.perf_counter() - started
+
+    for _, _, communicators in rooms:
+        await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
+
+    return {
+        "connections": connection_count,
+        "events": len(fixtures) * rounds,
+        "frames": len(latencies),
+        "seconds": elapsed,
+        "frames_per_second": len(latencies) / elapsed if elapsed else 0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "memory_per_connection_kb": memory_per_connection / 1024,
+    }
+
+
+def run_benchmark(rooms=10, sockets_per_room=10, rounds=30):
+    """
+    Run the benchmark against the current database and return its measurements.
+
+    Creates its own users and rooms, so run it against a throwaway database.
+    """
+    fixtures = create_fixtures(rooms, sockets_per_room)
+    with override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS):
+        return asyncio.run(run(fixtures, rounds))
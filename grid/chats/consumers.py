@@ -1,5 +1,3 @@
-import json
-
 from urllib.parse import parse_qs
 
 import jwt
@@ -8,6 +6,8 @@ from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth import get_user_model
 
+from .events import decode_event, encode_event
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -56,7 +56,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         return await sync_to_async(ChatRoom.objects.get)(uuid=self.room_id)
 
     async def receive(self, text_data):
-        data = json.loads(text_data)
+        data = decode_event(text_data)
         event_type = data.get("type")
 
         if event_type == "typing":
@@ -74,17 +74,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     # Remove user from typing users
                     self.typing_users.discard(user_uuid)
 
-                # Broadcast typing notification to all users
+                # Broadcast typing notification to all users, encoded once for the whole group
                 await self.channel_layer.group_send(
                     self.room_group_name,
                     {
                         "type": "typing_notification",
-                        "typing_users": list(self.typing_users),  # Convert set to list
+                        "text": encode_event("typing", typing_users=list(self.typing_users)),
                     },
                 )
             else:
                 # Optionally, send an error message if the user is not authenticated
-                await self.send(text_data=json.dumps({"error": "Unauthorized"}))
+                await self.send(text_data=encode_event("error", error="Unauthorized"))
 
         elif event_type == "message_read":
             from .models import Message
@@ -106,47 +106,26 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.room_group_name,
                 {
                     "type": "message_read_notification",
-                    "message_id": str(message_id),
-                    "user_id": str(user.uuid),
+                    "text": encode_event("message_read", message_id=str(message_id), user_id=user.uuid),
                 },
             )
 
+    # Group events carry a frame that was encoded once by the sender, so each
+    # socket only forwards the text instead of re-serializing the payload.
     async def message_created(self, event):
-        await self.send(text_data=json.dumps({"type": "message_created", "message": event["message"]}))
-        # print(event)
+        await self.send(text_data=event["text"])
 
     async def message_updated(self, event):
-        await self.send(text_data=json.dumps({"type": "message_updated", "message": event["message"]}))
-        # print(event)
+        await self.send(text_data=event["text"])
 
     async def message_deleted(self, event):
-        await self.send(text_data=json.dumps({"type": "message_deleted", "message": event["message"]}))
-        # print(event)
+        await self.send(text_data=event["text"])
 
     async def typing_notification(self, event):
-        # Send typing notification to all WebSocket connections
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "typing",
-                    "typing_users": event["typing_users"],  # List of users who are typing
-                }
-            )
-        )
+        await self.send(text_data=event["text"])
 
     async def message_read_notification(self, event):
-        message_id = event["message_id"]
-        user_id = event["user_id"]
-
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "message_read",
-                    "message_id": message_id,
-                    "user_id": user_id,
-                }
-            )
-        )
+        await self.send(text_data=event["text"])
 
     # @database_sync_to_async
     # def get_messages(self):
@@ -0,0 +1,39 @@
+import orjson
+
+
+def build_message_payload(message, read_by=None):
+    """
+    Build the chat event payload for a message.
+
+    Only local columns and the ``read_by`` prefetch cache are read, so no extra
+    queries are issued when the message was loaded with ``prefetch_related("read_by")``.
+    Pass ``read_by`` explicitly when it is already known (e.g. ``[]`` for a new message).
+    """
+    if read_by is None:
+        read_by = [user.pk for user in message.read_by.all()]
+
+    return {
+        "uuid": message.uuid,
+        "sender": message.sender_id,
+        "chat_room": message.chat_room_id,
+        "file": message.file.url if message.file else None,
+        "job": message.job_id,
+        "content": message.content if message.content else None,
+        "timestamp": message.timestamp,
+        "is_edited": message.is_edited,
+        "is_viewed": message.is_viewed,
+        "read_by": read_by,
+    }
+
+
+def encode_event(event_type, **data):
+    """
+    Encode a WebSocket frame once so it can be fanned out to every socket in a group.
+
+    orjson serializes UUIDs and datetimes natively, so payloads can carry model values as-is.
+    """
+    return orjson.dumps({"type": event_type, **data}).decode()
+
+
+def decode_event(text_data):
+    return orjson.loads(text_data)
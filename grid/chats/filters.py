@@ -1,5 +1,6 @@
 import django_filters
 
+from ..users.models import User
 from .models import ChatRoom, Message
 
 
@@ -20,3 +21,24 @@ class MessageFilter(django_filters.FilterSet):
     class Meta:
         model = Message
         fields = ["sender", "chat_room", "sender_email"]
+
+    def filter_records(self, records):
+        """
+        Apply the filters to archived message records, which hold the ids of their relations.
+
+        Expects ``is_valid()`` to have been called.
+        """
+        data = self.form.cleaned_data
+        wanted = {}
+        if data.get("chat_room"):
+            wanted["chat_room"] = str(data["chat_room"])
+        if data.get("sender"):
+            wanted["sender"] = str(data["sender"])
+        if data.get("sender_email"):
+            sender = User.objects.filter(email=data["sender_email"]).values_list("pk", flat=True).first()
+            if sender is None or wanted.get("sender", str(sender)) != str(sender):
+                return
+            wanted["sender"] = str(sender)
+        for record in records:
+            if all(str(record[field]) == value for field, value in wanted.items()):
+                yield record
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from grid.chats.archive import archive_cutoff, archive_messages
+
+
+class Command(BaseCommand):
+    help = "Move chat messages older than the given number of months into the compressed archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months", type=int, default=12, help="Number of recent calendar months to keep in the hot table"
+        )
+
+    def handle(self, *args, **options):
+        months = options["months"]
+        if months < 1:
+            raise CommandError("--months must be at least 1")
+
+        archived = archive_messages(months)
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {archived} messages created before {archive_cutoff(months):%Y-%m-%d}")
+        )
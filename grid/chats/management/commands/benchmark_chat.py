@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from grid.chats.benchmark import run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark chat WebSocket fan-out over an in-memory channel layer, using a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=50, help="Number of chat rooms")
+        parser.add_argument("--sockets-per-room", type=int, default=20, help="Number of open sockets in every room")
+        parser.add_argument("--rounds", type=int, default=30, help="Number of events sent in every room")
+
+    def handle(self, *args, **options):
+        if min(options["rooms"], options["sockets_per_room"], options["rounds"]) < 1:
+            raise CommandError("--rooms, --sockets-per-room and --rounds must be at least 1")
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            result = run_benchmark(options["rooms"], options["sockets_per_room"], options["rounds"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{result['connections']} sockets, {result['events']} events, {result['frames']} frames "
+            f"in {result['seconds']:.2f}s"
+        )
+        self.stdout.write(f"throughput: {result['frames_per_second']:.0f} frames/s")
+        self.stdout.write(f"latency: p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+        self.stdout.write(f"memory: {result['memory_per_connection_kb']:.1f} KiB per connection")
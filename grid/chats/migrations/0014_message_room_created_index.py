@@ -0,0 +1,16 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chats", "0013_alter_message_sender"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["chat_room", "-created_at"], name="chats_msg_room_created_idx"),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from grid.core.fulltext import AddFullTextIndex
+
+
+class Migration(migrations.Migration):
+    # The PostgreSQL index is built concurrently, which cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("chats", "0014_message_room_created_index"),
+    ]
+
+    operations = [
+        AddFullTextIndex(model_name="message", field_name="content"),
+    ]
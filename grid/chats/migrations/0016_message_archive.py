@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chats", "0015_message_content_fulltext"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MessageArchive",
+            fields=[
+                ("uuid", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="created")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="updated")),
+                ("is_active", models.BooleanField(db_index=True, default=True)),
+                ("period_start", models.DateTimeField()),
+                ("period_end", models.DateTimeField()),
+                ("message_count", models.PositiveIntegerField(default=0)),
+                ("payload", models.BinaryField()),
+                (
+                    "chat_room",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="message_archives",
+                        to="chats.chatroom",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-period_start"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="messagearchive",
+            constraint=models.UniqueConstraint(
+                fields=("chat_room", "period_start"), name="chats_archive_room_period_uniq"
+            ),
+        ),
+    ]
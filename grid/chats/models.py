@@ -32,11 +32,39 @@ class Message(CoreModel):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Serves the per-room "latest message" lookups used by the inbox listing
+            models.Index(fields=["chat_room", "-created_at"], name="chats_msg_room_created_idx"),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender} in {self.chat_room.name}"
 
 
+class MessageArchive(CoreModel):
+    """
+    Cold storage for one room's messages from one calendar month.
+
+    Messages are moved here by ``grid.chats.archive.archive_messages`` and stored as
+    zlib-compressed JSON lines, keeping the hot ``Message`` table and its indexes bounded.
+    """
+
+    chat_room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name="message_archives")
+    period_start = models.DateTimeField()
+    period_end = models.DateTimeField()
+    message_count = models.PositiveIntegerField(default=0)
+    payload = models.BinaryField()
+
+    class Meta:
+        ordering = ["-period_start"]
+        constraints = [
+            models.UniqueConstraint(fields=["chat_room", "period_start"], name="chats_archive_room_period_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.chat_room_id} {self.period_start:%Y-%m} ({self.message_count} messages)"
+
+
 # class Message(CoreModel):
 #     content = models.TextField()
 #     posted_by = models.ForeignKey("users.User", on_delete=models.RESTRICT, related_name="sent_messages")
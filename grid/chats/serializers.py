@@ -1,3 +1,4 @@
+from django.utils.dateparse import parse_datetime
 from rest_framework import serializers
 
 from ..users.models import User
@@ -19,6 +20,34 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         return unread_count
 
 
+class ChatRoomListSerializer(ChatRoomSerializer):
+    """
+    Inbox representation of a chat room.
+
+    Reads the last message preview and unread count from annotations made by
+    ``ChatRoomListView.get_queryset`` instead of querying per room.
+    """
+
+    unread_messages_count = serializers.IntegerField(read_only=True)
+    last_message = serializers.SerializerMethodField()
+    last_activity = serializers.DateTimeField(read_only=True)
+
+    class Meta(ChatRoomSerializer.Meta):
+        fields = ["uuid", "recruiter", "clients", "unread_messages_count", "last_message", "last_activity"]
+        read_only_fields = fields
+
+    def get_last_message(self, obj):
+        if obj.last_message_uuid is None:
+            return None
+
+        return {
+            "uuid": str(obj.last_message_uuid),
+            "content": obj.last_message_content,
+            "sender": str(obj.last_message_sender) if obj.last_message_sender else None,
+            "timestamp": serializers.DateTimeField().to_representation(obj.last_message_at),
+        }
+
+
 class MessageSerializer(serializers.ModelSerializer):
     chat_room = serializers.StringRelatedField()
     read_by = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), many=True, required=False)
@@ -39,6 +68,31 @@ class MessageSerializer(serializers.ModelSerializer):
         ]
 
 
+class ArchivedMessageSerializer(serializers.Serializer):
+    """Renders an archived message record in the shape of ``MessageSerializer``"""
+
+    uuid = serializers.UUIDField()
+    sender = serializers.UUIDField(allow_null=True)
+    chat_room = serializers.CharField()
+    job = serializers.UUIDField(allow_null=True)
+    content = serializers.CharField(allow_null=True)
+    timestamp = serializers.DateTimeField()
+    file = serializers.SerializerMethodField()
+    is_edited = serializers.BooleanField()
+    is_viewed = serializers.BooleanField()
+    read_by = serializers.ListField(child=serializers.UUIDField())
+
+    def to_representation(self, record):
+        # Archived timestamps are ISO strings, which DateTimeField would pass through as stored
+        return super().to_representation({**record, "timestamp": parse_datetime(record["timestamp"])})
+
+    def get_file(self, record):
+        request = self.context.get("request")
+        if record["file"] and request:
+            return request.build_absolute_uri(record["file"])
+        return record["file"]
+
+
 class MessageUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
@@ -61,3 +115,17 @@ class MessageCreateSerializer(serializers.ModelSerializer):
         if not attrs.get("content") and not attrs.get("file"):
             raise serializers.ValidationError("Either 'content' or 'file' must be provided.")
         return attrs
+
+
+class MessageSearchSerializer(serializers.ModelSerializer):
+    """
+    Search hit for a message, read from the annotations made by ``grid.core.fulltext.search``.
+    """
+
+    snippet = serializers.CharField(source="search_snippet", read_only=True)
+    rank = serializers.FloatField(source="search_rank", read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ["uuid", "sender", "chat_room", "job", "snippet", "rank", "timestamp"]
+        read_only_fields = fields
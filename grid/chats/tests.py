@@ -1,4 +1,334 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone
+from io import StringIO
 
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-# Create your tests here.
+from grid.chats.archive import archive_messages, archived_messages, month_start, unpack
+from grid.chats.benchmark import run_benchmark
+from grid.chats.events import build_message_payload, decode_event, encode_event
+from grid.chats.models import ChatRoom, Message, MessageArchive
+from grid.chats.views import ChatRoomListView, MessageListView, MessageSearchView
+from grid.clients.models import Client, ClientUserProfile
+from grid.recruiters.models import Recruiter
+from grid.users.choices import Roles
+
+
+User = get_user_model()
+
+
+class ChatTestMixin:
+    """Shared fixtures for chat tests"""
+
+    def create_room(self, index=0):
+        user = User.objects.create_user(
+            email=f"recruiter{index}@example.com", password="testpass123", role=Roles.RECRUITER
+        )
+        recruiter = Recruiter.objects.create(
+            user=user, first_name="Test", last_name=f"Recruiter {index}", linkedin="https://linkedin.com/in/test"
+        )
+        room = ChatRoom.objects.create(recruiter=recruiter)
+        room.clients.add(self.client_company)
+        return room
+
+
+class ChatRoomListTests(ChatTestMixin, TestCase):
+    """Test cases for the chat room inbox listing"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="client@example.com", password="testpass123", role=Roles.CLIENT)
+        self.client_company = Client.objects.create(company_name="Test Company")
+        self.factory = APIRequestFactory()
+
+    def get_inbox(self):
+        request = self.factory.get("/api/chats/chat-room/list/")
+        force_authenticate(request, user=self.user)
+        return ChatRoomListView.as_view()(request)
+
+    def test_rooms_include_last_message_preview(self):
+        """Test that each room carries its latest message and unread count"""
+        room = self.create_room()
+        Message.objects.create(chat_room=room, sender=self.user, content="First message")
+        latest = Message.objects.create(chat_room=room, sender=self.user, content="Second message " + "x" * 200)
+
+        response = self.get_inbox()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data["results"][0]
+        self.assertEqual(result["last_message"]["uuid"], str(latest.uuid))
+        self.assertEqual(result["last_message"]["sender"], str(self.user.uuid))
+        self.assertTrue(result["last_message"]["content"].startswith("Second message"))
+        self.assertEqual(len(result["last_message"]["content"]), 120)
+        self.assertEqual(result["unread_messages_count"], 2)
+
+    def test_rooms_ordered_by_last_activity(self):
+        """Test that the most recently active room is listed first"""
+        quiet_room = self.create_room(0)
+        busy_room = self.create_room(1)
+        Message.objects.create(chat_room=busy_room, sender=self.user, content="Hello")
+
+        response = self.get_inbox()
+
+        uuids = [result["uuid"] for result in response.data["results"]]
+        self.assertEqual(uuids, [str(busy_room.uuid), str(quiet_room.uuid)])
+
+    def test_room_without_messages(self):
+        """Test that a room without messages has no preview"""
+        self.create_room()
+
+        response = self.get_inbox()
+
+        self.assertIsNone(response.data["results"][0]["last_message"])
+        self.assertEqual(response.data["results"][0]["unread_messages_count"], 0)
+
+    def test_query_count_is_constant(self):
+        """Test that the number of queries does not grow with the number of rooms"""
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                self.get_inbox()
+            return len(context)
+
+        for index in range(2):
+            Message.objects.create(chat_room=self.create_room(index), sender=self.user, content="Hello")
+        baseline = count_queries()
+
+        for index in range(2, 8):
+            Message.objects.create(chat_room=self.create_room(index), sender=self.user, content="Hello")
+
+        self.assertEqual(count_queries(), baseline)
+
+
+class MessageEventTests(ChatTestMixin, TestCase):
+    """Test cases for chat event payloads"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="client@example.com", password="testpass123", role=Roles.CLIENT)
+        self.client_company = Client.objects.create(company_name="Test Company")
+        self.room = self.create_room()
+
+    def test_payload_uses_prefetched_read_by(self):
+        """Test that building a payload issues no queries once read_by is prefetched"""
+        message = Message.objects.create(chat_room=self.room, sender=self.user, content="Hello")
+        message.read_by.add(self.user)
+        message = Message.objects.prefetch_related("read_by").get(pk=message.pk)
+
+        with self.assertNumQueries(0):
+            payload = build_message_payload(message)
+
+        self.assertEqual(payload["read_by"], [self.user.pk])
+        self.assertEqual(payload["chat_room"], self.room.pk)
+        self.assertIsNone(payload["job"])
+
+    def test_encoded_frame_round_trips(self):
+        """Test that UUIDs and datetimes are encoded the same way the old payloads were"""
+        message = Message.objects.create(chat_room=self.room, sender=self.user, content="Hello")
+
+        frame = encode_event("message_created", message=build_message_payload(message, read_by=[]))
+        data = decode_event(frame)
+
+        self.assertEqual(data["type"], "message_created")
+        self.assertEqual(data["message"]["uuid"], str(message.uuid))
+        self.assertEqual(data["message"]["sender"], str(self.user.uuid))
+        self.assertEqual(data["message"]["timestamp"], message.timestamp.isoformat())
+        self.assertEqual(data["message"]["read_by"], [])
+
+
+class MessageSearchTests(ChatTestMixin, TestCase):
+    """Test cases for full-text message search"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="client@example.com", password="testpass123", role=Roles.CLIENT)
+        self.client_company = Client.objects.create(company_name="Test Company")
+        ClientUserProfile.objects.create(user=self.user, client=self.client_company)
+        self.room = self.create_room()
+        self.factory = APIRequestFactory()
+
+    def search(self, **params):
+        request = self.factory.get("/api/chats/messages/search/", params)
+        force_authenticate(request, user=self.user)
+        return MessageSearchView.as_view()(request)
+
+    def test_search_returns_highlighted_snippets(self):
+        """Test that matching messages are returned with the terms highlighted"""
+        message = Message.objects.create(chat_room=self.room, sender=self.user, content="The interview is on Monday")
+        Message.objects.create(chat_room=self.room, sender=self.user, content="Unrelated message")
+
+        response = self.search(q="interview")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result["uuid"] for result in response.data["results"]], [str(message.uuid)])
+        self.assertIn("<mark>interview</mark>", response.data["results"][0]["snippet"])
+
+    def test_search_ranks_better_matches_first(self):
+        """Test that messages matching more often rank higher"""
+        Message.objects.create(chat_room=self.room, sender=self.user, content="Salary details attached " + "x " * 50)
+        best = Message.objects.create(chat_room=self.room, sender=self.user, content="Salary salary salary")
+
+        response = self.search(q="salary")
+
+        self.assertEqual(response.data["results"][0]["uuid"], str(best.uuid))
+
+    def test_search_is_scoped_to_user_rooms(self):
+        """Test that messages in rooms the user does not belong to are not returned"""
+        other_company = Client.objects.create(company_name="Other Company")
+        other_room = self.create_room(1)
+        other_room.clients.set([other_company])
+        Message.objects.create(chat_room=other_room, sender=self.user, content="Confidential offer")
+
+        response = self.search(q="offer")
+
+        self.assertEqual(response.data["results"], [])
+
+    def test_search_index_follows_edits_and_deletes(self):
+        """Test that the index is kept up to date when messages change"""
+        message = Message.objects.create(chat_room=self.room, sender=self.user, content="Draft contract")
+        message.content = "Final agreement"
+        message.save()
+
+        self.assertEqual(self.search(q="contract").data["results"], [])
+        self.assertEqual(len(self.search(q="agreement").data["results"]), 1)
+
+        message.delete()
+        self.assertEqual(self.search(q="agreement").data["results"], [])
+
+    def test_search_paginates_by_cursor(self):
+        """Test that every match is returned exactly once across cursor pages"""
+        for index in range(5):
+            Message.objects.create(chat_room=self.room, sender=self.user, content=f"Reminder number {index}")
+
+        seen = []
+        response = self.search(q="reminder", page_size=2)
+        while True:
+            seen += [result["uuid"] for result in response.data["results"]]
+            if not response.data["next"]:
+                break
+            request = self.factory.get(response.data["next"])
+            force_authenticate(request, user=self.user)
+            response = MessageSearchView.as_view()(request)
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_search_ignores_query_syntax(self):
+        """Test that punctuation in the query is not interpreted as search syntax"""
+        Message.objects.create(chat_room=self.room, sender=self.user, content="Offer for C++ developer")
+
+        response = self.search(q='C++ "developer')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+
+
+class MessageArchiveTests(ChatTestMixin, TestCase):
+    """Test cases for archiving old messages"""
+
+    now = datetime(2024, 6, 15, tzinfo=timezone.utc)
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="client@example.com", password="testpass123", role=Roles.CLIENT)
+        self.client_company = Client.objects.create(company_name="Test Company")
+        self.room = self.create_room()
+
+    def create_message(self, content, created_at):
+        message = Message.objects.create(chat_room=self.room, sender=self.user, content=content)
+        Message.objects.filter(pk=message.pk).update(created_at=created_at)
+        return message
+
+    def test_old_messages_are_moved_to_monthly_archives(self):
+        """Test that messages before the cutoff are archived per month and removed from the hot table"""
+        self.create_message("January", datetime(2024, 1, 10, tzinfo=timezone.utc))
+        self.create_message("February", datetime(2024, 2, 10, tzinfo=timezone.utc))
+        recent = self.create_message("May", datetime(2024, 5, 10, tzinfo=timezone.utc))
+
+        archived = archive_messages(months=3, now=self.now)
+
+        self.assertEqual(archived, 2)
+        self.assertEqual(list(Message.objects.values_list("pk", flat=True)), [recent.pk])
+        archives = MessageArchive.objects.order_by("period_start")
+        self.assertEqual([archive.period_start.month for archive in archives], [1, 2])
+        self.assertEqual(unpack(archives[0].payload)[0]["content"], "January")
+
+    def test_rerun_merges_into_existing_archive(self):
+        """Test that archiving the same month again extends its archive row"""
+        self.create_message("First", datetime(2024, 1, 10, tzinfo=timezone.utc))
+        archive_messages(months=3, now=self.now)
+        self.create_message("Late", datetime(2024, 1, 5, tzinfo=timezone.utc))
+
+        archive_messages(months=3, now=self.now)
+
+        archive = MessageArchive.objects.get()
+        self.assertEqual(archive.message_count, 2)
+        self.assertEqual([record["content"] for record in archived_messages(self.room.pk)], ["First", "Late"])
+
+    def list_messages(self, **params):
+        request = APIRequestFactory().get("/api/chats/messages/list/", {"chat_room": str(self.room.pk), **params})
+        force_authenticate(request, user=self.user)
+        return MessageListView.as_view()(request)
+
+    def test_listing_falls_through_to_archive(self):
+        """Test that listing a room returns hot messages followed by archived ones"""
+        old = self.create_message("Old", datetime(2020, 1, 10, tzinfo=timezone.utc))
+        call_command("archive_messages", months=3, stdout=StringIO())
+        new = Message.objects.create(chat_room=self.room, sender=self.user, content="New")
+
+        response = self.list_messages()
+        self.assertEqual([message["uuid"] for message in response.data], [str(new.uuid), str(old.uuid)])
+        self.assertEqual(response.data[1].keys(), response.data[0].keys())
+        self.assertEqual(response.data[1]["chat_room"], str(self.room.pk))
+        self.assertEqual(response.data[1]["sender"], str(self.user.pk))
+        self.assertNotIn("X-Archived-Older", response)
+
+        response = self.list_messages(include_archived="false")
+        self.assertEqual([message["uuid"] for message in response.data], [str(new.uuid)])
+
+    def test_archived_messages_are_filtered_and_limited_to_the_months_asked(self):
+        """Test that archived messages honour the message filters and the requested months"""
+        other = User.objects.create_user(email="other@example.com", password="testpass123", role=Roles.CLIENT)
+        mine = self.create_message("Mine", datetime(2020, 1, 10, tzinfo=timezone.utc))
+        Message.objects.create(chat_room=self.room, sender=other, content="Theirs")
+        Message.objects.filter(content="Theirs").update(created_at=datetime(2020, 1, 11, tzinfo=timezone.utc))
+        self.create_message("Later", datetime(2020, 3, 10, tzinfo=timezone.utc))
+        call_command("archive_messages", months=3, stdout=StringIO())
+        months = {"archived_from": "2020-01", "archived_to": "2020-02"}
+
+        response = self.list_messages(sender=str(self.user.pk), **months)
+        self.assertEqual([message["uuid"] for message in response.data], [str(mine.uuid)])
+        response = self.list_messages(sender_email="other@example.com", **months)
+        self.assertEqual([message["content"] for message in response.data], ["Theirs"])
+
+        response = self.list_messages(archived_from="2019-01", archived_to="2020-03")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_archive_is_read_a_year_at_a_time(self):
+        """Test that one listing reads at most a year of archive and points at the rest"""
+        for month in range(1, 15):
+            self.create_message(f"Month {month}", month_start(2020, month) + timedelta(days=1))
+        call_command("archive_messages", months=3, stdout=StringIO())
+
+        response = self.list_messages()
+        self.assertEqual(len(response.data), 12)
+        self.assertEqual(response.data[0]["content"], "Month 14")
+        self.assertEqual(response["X-Archived-Older"], "2020-02")
+
+        response = self.list_messages(archived_to=response["X-Archived-Older"])
+        self.assertEqual([message["content"] for message in response.data], ["Month 2", "Month 1"])
+        self.assertNotIn("X-Archived-Older", response)
+
+
+class ChatBenchmarkTests(TransactionTestCase):
+    """Smoke test for the WebSocket benchmark harness"""
+
+    def test_every_socket_receives_every_event(self):
+        """Test that each event in a room is delivered once to every socket in it"""
+        result = run_benchmark(rooms=2, sockets_per_room=3, rounds=3)
+
+        self.assertEqual(result["connections"], 6)
+        self.assertEqual(result["events"], 6)
+        self.assertEqual(result["frames"], 18)
+        self.assertGreater(result["memory_per_connection_kb"], 0)
@@ -8,6 +8,7 @@ from .views import (
     MessageDestroyView,
     MessageDetailView,
     MessageListView,
+    MessageSearchView,
 )
 
 
@@ -16,6 +17,7 @@ urlpatterns = [
     path("chat-room/list/", ChatRoomListView.as_view(), name="chat-room-list"),
     path("chat-room/<uuid:uuid>/", ChatRoomDetailView.as_view(), name="chat-room-detail"),
     path("messages/list/", MessageListView.as_view(), name="message-list"),
+    path("messages/search/", MessageSearchView.as_view(), name="message-search"),
     path("messages/create/", MessageCreateView.as_view(), name="message-create"),
     path("messages/detail/<uuid:uuid>/", MessageDetailView.as_view(), name="message-detail"),
     path("messages/delete/<uuid:uuid>/", MessageDestroyView.as_view(), name="message-detail"),
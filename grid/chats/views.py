@@ -1,49 +1,101 @@
+from datetime import datetime
+
 from asgiref.sync import async_to_sync, sync_to_async
 from channels.layers import get_channel_layer
+from django.db.models import Count, OuterRef, Q, Subquery, UUIDField
+from django.db.models.functions import Coalesce, Substr
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, permissions, status, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 
+from ..core.fulltext import search
+from ..core.pagination import SearchRankCursorPagination
+from .archive import archive_records, month_start, next_month, room_archives
+from .events import build_message_payload, encode_event
 from .filters import ChatRoomFilter, MessageFilter
 from .models import ChatRoom, Message
 from .serializers import (
+    ArchivedMessageSerializer,
+    ChatRoomListSerializer,
     ChatRoomSerializer,
     MessageCreateSerializer,
+    MessageSearchSerializer,
     MessageSerializer,
     MessageUpdateSerializer,
 )
 
 
-async def notify_participants(message, event_type):
+async def notify_participants(chat_room_id, event_type, message):
     """
     Notify participants in a chat room about an event.
+
+    The frame is encoded once here and consumers forward the same text to every socket.
     """
     channel_layer = get_channel_layer()
 
     if channel_layer:
         await channel_layer.group_send(
-            f"chat_{str(message['chat_room'])}",
+            f"chat_{str(chat_room_id)}",
             {
                 "type": event_type,
-                "message": message,
+                "text": encode_event(event_type, message=message),
             },
         )
 
 
+LAST_MESSAGE_PREVIEW_LENGTH = 120
+
+# Archive months a single message listing may decompress
+MAX_ARCHIVED_MONTHS = 12
+FALSE_VALUES = {"0", "false", "False"}
+
+
 class ChatRoomListView(generics.ListAPIView):
     """
     Handles listing chat rooms.
+
+    Each room is annotated with a preview of its latest message and the caller's
+    unread count, and rooms are ordered by last activity, so an inbox page is
+    served from a constant number of queries regardless of the number of rooms.
     """
 
-    queryset = ChatRoom.objects.all()
-    serializer_class = ChatRoomSerializer
+    serializer_class = ChatRoomListSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = ChatRoomFilter
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        latest_message = Message.objects.filter(chat_room=OuterRef("pk")).order_by("-created_at")
+        unread_messages = (
+            Message.objects.filter(chat_room=OuterRef("pk"), is_viewed=False)
+            .exclude(read_by=self.request.user)
+            .order_by()
+            .values("chat_room")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+
+        return (
+            ChatRoom.objects.prefetch_related("clients")
+            .annotate(
+                last_message_uuid=Subquery(latest_message.values("uuid")[:1]),
+                last_message_content=Subquery(
+                    latest_message.annotate(snippet=Substr("content", 1, LAST_MESSAGE_PREVIEW_LENGTH)).values(
+                        "snippet"
+                    )[:1]
+                ),
+                last_message_sender=Subquery(latest_message.values("sender")[:1], output_field=UUIDField()),
+                last_message_at=Subquery(latest_message.values("created_at")[:1]),
+                unread_messages_count=Coalesce(Subquery(unread_messages), 0),
+            )
+            .annotate(last_activity=Coalesce("last_message_at", "created_at"))
+            .order_by("-last_activity", "-created_at")
+        )
+
 
 class ChatRoomCreateView(generics.CreateAPIView):
     """
@@ -83,26 +135,42 @@ class MessageCreateView(generics.CreateAPIView):
         # Save the message and set sender to the authenticated user
         message_created = serializer.save(sender=self.request.user)
 
-        # Prepare the notification payload
-        message = {
-            "uuid": str(message_created.uuid),
-            "sender": str(message_created.sender.uuid),
-            "chat_room": str(message_created.chat_room.uuid),
-            "file": message_created.file.url if message_created.file else None,
-            "job": str(message_created.job.uuid) if message_created.job else None,
-            "content": message_created.content if message_created.content else None,
-            "timestamp": message_created.timestamp.isoformat(),
-            "is_edited": message_created.is_edited,
-            "is_viewed": message_created.is_viewed,
-            "read_by": list(message_created.read_by.values_list("uuid", flat=True)),  # Serialize read_by as a list
-        }
+        # A new message has not been read by anyone yet
+        message = build_message_payload(message_created, read_by=[])
+        async_to_sync(notify_participants)(message_created.chat_room_id, "message_created", message)
 
-        async_to_sync(notify_participants)(message, "message_created")
+
+def archived_months(params):
+    """
+    Parse the optional ``archived_from`` and ``archived_to`` into the ``[since, until)`` range of
+    months to read; a range with both ends may span at most ``MAX_ARCHIVED_MONTHS`` months
+    """
+    months = []
+    for name in ["archived_from", "archived_to"]:
+        if not params.get(name):
+            months.append(None)
+            continue
+        try:
+            value = datetime.strptime(params[name], "%Y-%m")
+        except ValueError:
+            raise ValidationError({name: "Enter a month as YYYY-MM."})
+        months.append(month_start(value.year, value.month))
+    since, until = months[0], months[1] and next_month(months[1])
+    if since and until:
+        count = (until.year - since.year) * 12 + until.month - since.month
+        if not 0 < count <= MAX_ARCHIVED_MONTHS:
+            raise ValidationError({"archived_to": f"Request between 1 and {MAX_ARCHIVED_MONTHS} months of archive."})
+    return since, until
 
 
 class MessageListView(generics.ListAPIView):
     """
     Handles listing  messages in a chat room.
+
+    The messages of one room continue into its archive after the hot ones: the newest
+    ``MAX_ARCHIVED_MONTHS`` archived months, or those between ``archived_from`` and
+    ``archived_to``. When older archived months remain, the ``X-Archived-Older`` header names
+    the newest of them, to pass as ``archived_to`` for the next page.
     """
 
     queryset = Message.objects.all()
@@ -111,6 +179,36 @@ class MessageListView(generics.ListAPIView):
     filterset_class = MessageFilter
     permission_classes = [permissions.IsAuthenticated]
 
+    @swagger_auto_schema(
+        operation_summary="List Messages",
+        operation_description="Messages of the user's chat rooms, newest first. For one chat room, its archived "
+        "messages follow the hot ones, up to 12 months of archive per response; the X-Archived-Older header "
+        "names the newest month left to read.",
+        manual_parameters=[
+            openapi.Parameter(
+                "include_archived",
+                openapi.IN_QUERY,
+                description="Set to false to list only the messages that have not been archived",
+                type=openapi.TYPE_BOOLEAN,
+            ),
+            openapi.Parameter(
+                "archived_from",
+                openapi.IN_QUERY,
+                description="Oldest archived month to read, as YYYY-MM",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "archived_to",
+                openapi.IN_QUERY,
+                description="Newest archived month to read, as YYYY-MM",
+                type=openapi.TYPE_STRING,
+            ),
+        ],
+        responses={200: MessageSerializer(many=True)},
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def list(self, request, *args, **kwargs):
         # Fetch the queryset filtered by the chat room
         queryset = self.filter_queryset(self.get_queryset())
@@ -126,8 +224,72 @@ class MessageListView(generics.ListAPIView):
 
         # Serialize the updated queryset
         serializer = self.get_serializer(queryset, many=True)
+        data, older = serializer.data, None
+
+        # Older messages of a room live in the archive and follow the hot ones
+        if request.query_params.get("chat_room") and request.query_params.get("include_archived") not in FALSE_VALUES:
+            archived, older = self.list_archived(request)
+            data = [*data, *archived]
+
+        response = Response(data)
+        if older:
+            response["X-Archived-Older"] = f"{older:%Y-%m}"
+        return response
+
+    def list_archived(self, request):
+        """
+        Return the room's archived messages, filtered like the hot ones, and the start of the
+        newest archived month left unread, if any
+        """
+        filterset = MessageFilter(request.query_params, queryset=Message.objects.none())
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        chat_room = filterset.form.cleaned_data["chat_room"]
+
+        archives = list(room_archives(chat_room, *archived_months(request.query_params))[: MAX_ARCHIVED_MONTHS + 1])
+        older = archives[MAX_ARCHIVED_MONTHS].period_start if len(archives) > MAX_ARCHIVED_MONTHS else None
+        records = filterset.filter_records(archive_records(archives[:MAX_ARCHIVED_MONTHS]))
+        data = ArchivedMessageSerializer(records, many=True, context=self.get_serializer_context()).data
+        return data, older
+
+
+class MessageSearchView(generics.ListAPIView):
+    """
+    Handles full-text search of messages in the chat rooms the user belongs to.
 
-        return Response(serializer.data)
+    Results are ranked by relevance, carry a highlighted snippet and are paginated by cursor.
+    Archived messages are not searched.
+    """
+
+    serializer_class = MessageSearchSerializer
+    pagination_class = SearchRankCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = MessageFilter
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        rooms = ChatRoom.objects.filter(Q(recruiter__user=user) | Q(clients__clientuserprofile__user=user))
+        queryset = Message.objects.filter(chat_room__in=rooms.values("pk"))
+        return search(queryset, self.request.query_params.get("q"))
+
+    @swagger_auto_schema(
+        operation_description="Full-text search of messages in the user's chat rooms, ordered by relevance. "
+        "Messages that have been moved to the archive are not searched.",
+        operation_summary="Search Messages",
+        manual_parameters=[
+            openapi.Parameter(
+                "q",
+                openapi.IN_QUERY,
+                description="Search terms",
+                type=openapi.TYPE_STRING,
+                required=True,
+            ),
+        ],
+        responses={200: MessageSearchSerializer(many=True)},
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
 class MessageDetailView(generics.RetrieveUpdateAPIView):
@@ -135,7 +297,7 @@ class MessageDetailView(generics.RetrieveUpdateAPIView):
     Handles retrieving, updating, and deleting messages.
     """
 
-    queryset = Message.objects.all()
+    queryset = Message.objects.prefetch_related("read_by")
     serializer_class = MessageUpdateSerializer
     lookup_field = "uuid"
     permission_classes = [permissions.IsAuthenticated]
@@ -146,19 +308,8 @@ class MessageDetailView(generics.RetrieveUpdateAPIView):
         serializer = self.get_serializer(message_updated, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        message = {
-            "uuid": str(message_updated.uuid),
-            "sender": str(message_updated.sender.uuid),
-            "chat_room": str(message_updated.chat_room.uuid),
-            "file": message_updated.file.url if message_updated.file else None,
-            "content": message_updated.content if message_updated.content else None,
-            "job": str(message_created.job.uuid) if message_updated.job else None,
-            "timestamp": message_updated.timestamp.isoformat(),
-            "is_edited": message_updated.is_edited,
-            "is_viewed": message_updated.is_viewed,
-            "read_by": [str(uuid) for uuid in message_updated.read_by.values_list("uuid", flat=True)],
-        }
-        async_to_sync(notify_participants)(message, "message_updated")
+        message = build_message_payload(message_updated)
+        async_to_sync(notify_participants)(message_updated.chat_room_id, "message_updated", message)
         return Response(serializer.data)
 
 
@@ -167,29 +318,20 @@ class MessageDestroyView(generics.DestroyAPIView):
     Handles retrieving, updating, and deleting messages.
     """
 
-    queryset = Message.objects.all()
+    queryset = Message.objects.prefetch_related("read_by")
     serializer_class = MessageSerializer
     lookup_field = "uuid"
     permission_classes = [permissions.IsAuthenticated]
 
     def destroy(self, request, *args, **kwargs):
         message_deleted = self.get_object()
-        if self.request.user.uuid != message_deleted.sender.uuid:
+        if self.request.user.pk != message_deleted.sender_id:
             return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
-        message = {
-            "uuid": str(message_deleted.uuid),
-            "sender": str(message_deleted.sender.uuid),
-            "chat_room": str(message_deleted.chat_room.uuid),
-            "file": message_deleted.file.url if message_deleted.file else None,
-            "content": message_deleted.content if message_deleted.content else None,
-            "job": str(message_deleted.job.uuid) if message_deleted.job else None,
-            "timestamp": message_deleted.timestamp.isoformat(),
-            "is_edited": message_deleted.is_edited,
-            "is_viewed": message_deleted.is_viewed,
-            "read_by": [str(uuid) for uuid in message_deleted.read_by.values_list("uuid", flat=True)],
-        }
-        async_to_sync(notify_participants)(message, "message_deleted")
-
-        if message_deleted.delete():
-            async_to_sync(notify_participants)(message, "message_deleted")
+
+        # Build the payload before the row and its read receipts are gone
+        message = build_message_payload(message_deleted)
+        chat_room_id = message_deleted.chat_room_id
+
+        message_deleted.delete()
+        async_to_sync(notify_participants)(chat_room_id, "message_deleted", message)
         return Response({"detail": "Message deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
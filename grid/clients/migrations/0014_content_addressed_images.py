@@ -0,0 +1,35 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:57
+
+from django.db import migrations, models
+import grid.clients.models
+import grid.core.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("clients", "0013_alter_clientuserprofile_profile_photo"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="client",
+            name="logo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=grid.core.storage.ContentAddressedStorage(),
+                upload_to=grid.clients.models.get_client_logo_path,
+                validators=[grid.clients.models.validate_image_size],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="clientuserprofile",
+            name="profile_photo",
+            field=models.ImageField(
+                max_length=255,
+                storage=grid.core.storage.ContentAddressedStorage(),
+                upload_to=grid.clients.models.get_client_profile_photo_path,
+                validators=[grid.clients.models.validate_image_size],
+            ),
+        ),
+    ]
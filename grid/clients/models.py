@@ -2,6 +2,7 @@ from django.core.exceptions import ValidationError
 from django.db import models
 
 from grid.core.models import CoreModel
+from grid.core.storage import content_addressed_storage
 from grid.site_settings.models import Country
 
 
@@ -57,12 +58,21 @@ class Client(CoreModel):
     billing_full_name = models.CharField(max_length=255, null=True, blank=True)
     billing_email = models.EmailField(null=True, blank=True)
     billing_phone = models.CharField(max_length=255, null=True, blank=True)
-    logo = models.ImageField(upload_to=get_client_logo_path, validators=[validate_image_size], null=True, blank=True)
+    logo = models.ImageField(
+        upload_to=get_client_logo_path,
+        storage=content_addressed_storage,
+        validators=[validate_image_size],
+        null=True,
+        blank=True,
+    )
     industry = models.ForeignKey(Industry, on_delete=models.RESTRICT, null=True, blank=True)
     country = models.ForeignKey(Country, on_delete=models.RESTRICT, null=True, blank=True)
     stripe_id = models.CharField(max_length=255, null=True, blank=True)
     status = models.SmallIntegerField(choices=Status.choices, default=Status.PENDING_SIGNUP)
 
+    # Copied into the search document of the client's invoices (see Invoice.SEARCH_FIELDS)
+    INVOICE_SEARCH_FIELDS = ["company_name", "about"]
+
     class Meta:
         ordering = ["company_name"]
         verbose_name_plural = "Clients"
@@ -70,6 +80,27 @@ class Client(CoreModel):
     def __str__(self):
         return self.company_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the searched values as loaded, so a rename refreshes the client's invoices
+        instance._invoice_search_values = (
+            instance.invoice_search_values() if set(cls.INVOICE_SEARCH_FIELDS) <= set(field_names) else None
+        )
+        return instance
+
+    def invoice_search_values(self):
+        return tuple(getattr(self, field) for field in self.INVOICE_SEARCH_FIELDS)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        loaded = getattr(self, "_invoice_search_values", None)
+        if loaded is not None and loaded != self.invoice_search_values():
+            from grid.hires.utils import schedule_invoice_search_refresh
+
+            schedule_invoice_search_refresh(client_ids=[self.pk])
+        self._invoice_search_values = self.invoice_search_values()
+
 
 class ClientUserProfile(CoreModel):
     class UserType(models.IntegerChoices):
@@ -86,7 +117,10 @@ class ClientUserProfile(CoreModel):
     user_type = models.SmallIntegerField(choices=UserType.choices, default=UserType.MEMBER)
     client = models.ForeignKey("clients.Client", on_delete=models.CASCADE)
     profile_photo = models.ImageField(
-        upload_to=get_client_profile_photo_path, validators=[validate_image_size], max_length=255
+        upload_to=get_client_profile_photo_path,
+        storage=content_addressed_storage,
+        validators=[validate_image_size],
+        max_length=255,
     )
 
     def __str__(self):
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from grid.clients.models import Address, Client, ClientUserProfile, Industry
+from grid.core.images import ImageVariantsField
 from grid.recruiters.serializers import AddressSerializer
 
 
@@ -11,6 +12,8 @@ class IndustrySerializer(serializers.ModelSerializer):
 
 
 class ClientSerializer(serializers.ModelSerializer):
+    logo_variants = ImageVariantsField(source="logo")
+
     class Meta:
         model = Client
         fields = [
@@ -25,6 +28,7 @@ class ClientSerializer(serializers.ModelSerializer):
             "billing_email",
             "billing_phone",
             "logo",
+            "logo_variants",
             "industry",
             "country",
             "stripe_id",
@@ -77,6 +81,8 @@ class ClientSerializer(serializers.ModelSerializer):
 
 
 class ClientUserProfileSerializer(serializers.ModelSerializer):
+    profile_photo_variants = ImageVariantsField(source="profile_photo")
+
     class Meta:
         model = ClientUserProfile
         fields = [
@@ -90,6 +96,7 @@ class ClientUserProfileSerializer(serializers.ModelSerializer):
             "user_type",
             "client",
             "profile_photo",
+            "profile_photo_variants",
             "created_at",
             "updated_at",
         ]
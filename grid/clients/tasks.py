@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from grid.clients.models import ClientUserProfile
+from grid.clients.utils import apply_signup_images
+from grid.recruiters.utils import download_images
+
+
+@shared_task
+def download_signup_images(profile_id, logo_url=None, profile_pic_url=None):
+    """Download the signup images that were not ready when the signup step returned"""
+    profile = ClientUserProfile.objects.select_related("client").get(pk=profile_id)
+    images, _ = download_images([logo_url, profile_pic_url])
+    apply_signup_images(profile, logo=images.get(logo_url), profile_photo=images.get(profile_pic_url))
@@ -1,4 +1,96 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
 
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from grid.clients.models import Client, ClientUserProfile, Industry
+from grid.clients.views import ClientSignupViewSet
+from grid.site_settings.models import Country, Currency, State
+from grid.users.models import Roles, User
+
+
+LOGO_URL = "https://media.licdn.com/acme-logo.png"
+PROFILE_PIC_URL = "https://media.licdn.com/jane-doe.png"
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, SIGNUP_IMAGE_DOWNLOAD_WAIT=0.2)
+class ClientSignupImageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+        currency = Currency.objects.create(
+            name="US Dollar",
+            three_letter_code="USD",
+            symbol="$",
+            job_posting_fee=0,
+            extra_role_fee=0,
+            top_job_fee=0,
+            salary_min=0,
+            commission_min=0,
+        )
+        self.country = Country.objects.create(
+            name="United States", two_letter_code="US", three_letter_code="USA", currency=currency
+        )
+        self.state = State.objects.create(name="New York", two_letter_code="NY", country=self.country)
+        self.industry = Industry.objects.create(name="Software")
+        self.user = User.objects.create_user(email="client@example.com", password="testpass123", role=Roles.CLIENT)
+        self.profile = ClientUserProfile.objects.create(
+            user=self.user, first_name="Jane", last_name="Doe", client=Client.objects.create(company_name="Pending")
+        )
+        self.factory = APIRequestFactory()
+
+    def company_info(self):
+        request = self.factory.post(
+            "/api/clients/signup/company_info/",
+            {
+                "company_name": "Acme",
+                "industry": str(self.industry.uuid),
+                "linkedin_company_size": 25,
+                "address": {
+                    "address1": "1 Main Street",
+                    "city": "New York",
+                    "state": str(self.state.uuid),
+                    "country": str(self.country.uuid),
+                },
+                "logo_url": LOGO_URL,
+                "profile_pic_url": PROFILE_PIC_URL,
+            },
+            format="json",
+        )
+        force_authenticate(request, user=self.user)
+        return ClientSignupViewSet.as_view({"post": "company_info"})(request)
+
+    @patch("grid.recruiters.utils.download_image")
+    def test_slow_images_are_applied_in_the_background(self, download_image):
+        profile_pic_served = threading.Event()
+
+        def download(url):
+            if url == PROFILE_PIC_URL:
+                profile_pic_served.wait(5)
+            return ContentFile(b"png", name=url.rsplit("/", 1)[1])
+
+        download_image.side_effect = download
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.company_info()
+
+        self.assertEqual(response.status_code, 200)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.client.status, Client.Status.PENDING_APPROVAL)
+        self.assertTrue(self.profile.client.logo)
+        self.assertFalse(self.profile.profile_photo)
+
+        profile_pic_served.set()
+        for callback in callbacks:
+            callback()
+
+        self.profile.refresh_from_db()
+        self.assertTrue(self.profile.profile_photo.name.endswith(".png"))
+        self.assertEqual([call.args[0] for call in download_image.call_args_list].count(LOGO_URL), 1)
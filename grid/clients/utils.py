@@ -11,3 +11,13 @@ def get_company_size_range(employee_count):
             return size_range, employee_count
 
     return COMPANY_SIZE_RANGES[-1][2], employee_count  # Default to largest range if something goes wrong
+
+
+def apply_signup_images(profile, logo=None, profile_photo=None):
+    """Use the images downloaded at signup as the client's logo and the profile's photo"""
+    if logo:
+        profile.client.logo = logo
+        profile.client.save(update_fields=["logo", "updated_at"])
+    if profile_photo:
+        profile.profile_photo = profile_photo
+        profile.save(update_fields=["profile_photo", "updated_at"])
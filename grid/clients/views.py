@@ -1,3 +1,6 @@
+from functools import partial
+
+from django.conf import settings
 from django.db import transaction
 from django.shortcuts import get_object_or_404
 from drf_yasg import openapi
@@ -21,7 +24,8 @@ from grid.clients.serializers import (
     ClientUserProfileSerializer,
     IndustrySerializer,
 )
-from grid.clients.utils import get_company_size_range
+from grid.clients.tasks import download_signup_images
+from grid.clients.utils import apply_signup_images, get_company_size_range
 from grid.core.permissions import (
     IsAdmin,
     IsAdminAdmin,
@@ -31,9 +35,10 @@ from grid.core.permissions import (
     IsClientAdmin,
     IsClientSuperAdmin,
     IsRecruiter,
+    user_profile,
 )
 from grid.core.viewsets import NoCreateViewSet
-from grid.recruiters.utils import download_image
+from grid.recruiters.utils import download_images
 from grid.site_settings.models import Country, State
 
 
@@ -223,10 +228,14 @@ class ClientSignupViewSet(viewsets.GenericViewSet):
         response_serializer.is_valid(raise_exception=True)
         return Response(response_serializer.validated_data, status=status.HTTP_201_CREATED)
 
-    @transaction.atomic
     @action(detail=False, methods=["post"])
     def company_info(self, request):
-        """Handle company information submission"""
+        """
+        Handle company information submission
+
+        The logo and profile picture are downloaded concurrently before the transaction starts.
+        Those not downloaded within ``SIGNUP_IMAGE_DOWNLOAD_WAIT`` seconds are left to a task.
+        """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -234,44 +243,50 @@ class ClientSignupViewSet(viewsets.GenericViewSet):
         profile = get_object_or_404(ClientUserProfile.objects.select_related("client"), user=request.user)
         client = profile.client
 
-        # Get company size range from LinkedIn employee count
-        company_size, linkedin_company_size = get_company_size_range(serializer.validated_data["linkedin_company_size"])
-
-        # Update client information
-        client.company_name = serializer.validated_data["company_name"]
-        client.company_size = company_size
-        client.linkedin_company_size = linkedin_company_size
-        client.industry = serializer.validated_data["industry"]
+        # Download the logo and profile picture together, outside the transaction
+        logo_url = serializer.validated_data.get("logo_url")
+        profile_pic_url = serializer.validated_data.get("profile_pic_url")
+        images, pending = download_images([logo_url, profile_pic_url], wait=settings.SIGNUP_IMAGE_DOWNLOAD_WAIT)
 
-        if "website" in serializer.validated_data:
-            client.website = serializer.validated_data.get("website")
+        with transaction.atomic():
+            # Get company size range from LinkedIn employee count
+            company_size, linkedin_company_size = get_company_size_range(
+                serializer.validated_data["linkedin_company_size"]
+            )
 
-        # Handle logo download
-        logo_url = serializer.validated_data.get("logo_url")
+            # Update client information
+            client.company_name = serializer.validated_data["company_name"]
+            client.company_size = company_size
+            client.linkedin_company_size = linkedin_company_size
+            client.industry = serializer.validated_data["industry"]
 
-        if logo_url:
-            logo_image = download_image(logo_url)
-            if logo_image:
-                client.logo = logo_image
+            if "website" in serializer.validated_data:
+                client.website = serializer.validated_data.get("website")
 
-        # Handle profile picture download
-        profile_pic_url = serializer.validated_data.get("profile_pic_url")
-        if profile_pic_url:
-            profile_image = download_image(profile_pic_url)
-            if profile_image:
-                profile.profile_photo = profile_image
-                profile.save(update_fields=["profile_photo", "updated_at"])
+            # Use the downloaded images, and fetch the slow ones in the background once committed
+            apply_signup_images(profile, profile_photo=images.get(profile_pic_url))
+            if images.get(logo_url):
+                client.logo = images[logo_url]
+            if pending:
+                transaction.on_commit(
+                    partial(
+                        download_signup_images.delay,
+                        str(profile.pk),
+                        logo_url=logo_url if logo_url in pending else None,
+                        profile_pic_url=profile_pic_url if profile_pic_url in pending else None,
+                    )
+                )
 
-        client.status = Client.Status.PENDING_APPROVAL
-        client.save()
+            client.status = Client.Status.PENDING_APPROVAL
+            client.save()
 
-        # Create address
-        address_data = serializer.validated_data.get("address")
+            # Create address
+            address_data = serializer.validated_data.get("address")
 
-        address = Address.objects.create(**address_data, client=client, by_user=request.user)
+            address = Address.objects.create(**address_data, client=client, by_user=request.user)
 
-        client.country = address.country
-        client.save(update_fields=["country", "updated_at"])
+            client.country = address.country
+            client.save(update_fields=["country", "updated_at"])
 
         response_data = {
             "message": "Company information saved successfully",
@@ -326,7 +341,7 @@ class AddressViewSet(viewsets.ModelViewSet):
             pass
 
         if request.user.role == "ADMIN":
-            admin_profile = AdminUserProfile.objects.filter(user=request.user).first()
+            admin_profile = user_profile(request.user, "adminuserprofile")
 
             # Raise an exception if admin_profile is None
             if not admin_profile:
@@ -398,7 +413,7 @@ class AddressViewSet(viewsets.ModelViewSet):
                 self.permission_classes = [IsClient]
 
         elif request.user.role == "ADMIN":
-            admin_profile = AdminUserProfile.objects.filter(user=request.user).first()
+            admin_profile = user_profile(request.user, "adminuserprofile")
 
             # Raise an exception if admin_profile is None
             if not admin_profile:
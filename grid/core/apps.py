@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "grid.core"
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .fulltext import rebuild_full_text_indexes
+        from .trigram import register_functions
+
+        connection_created.connect(register_functions, dispatch_uid="grid.core.trigram.register_functions")
+        # post_migrate is sent once per app; this app's signal is enough to cover every index
+        post_migrate.connect(
+            rebuild_full_text_indexes, sender=self, dispatch_uid="grid.core.fulltext.rebuild_full_text_indexes"
+        )
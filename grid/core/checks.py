@@ -0,0 +1,28 @@
+from django.core import checks
+from django.db import connections
+
+from .fulltext import full_text_indexes, missing_index_objects
+
+
+@checks.register(checks.Tags.database)
+def check_full_text_indexes(app_configs=None, databases=None, **kwargs):
+    """
+    Warn when a full-text index is missing a table, trigger or index, e.g. because a later
+    migration rebuilt its SQLite table and so dropped the triggers that keep it current.
+    """
+    warnings = []
+    for alias in databases or []:
+        connection = connections[alias]
+        for model, field_name in full_text_indexes(alias):
+            column = model._meta.get_field(field_name).column
+            missing = missing_index_objects(connection, model._meta.db_table, column)
+            if missing:
+                warnings.append(
+                    checks.Warning(
+                        f"The full-text index on {model._meta.label}.{field_name} is missing {', '.join(missing)}.",
+                        hint="Run manage.py rebuild_fulltext_indexes.",
+                        obj=model,
+                        id="core.W001",
+                    )
+                )
+    return warnings
@@ -0,0 +1,268 @@
+"""
+Full-text search over a single text column using the database's native engine.
+
+On PostgreSQL the column is indexed with a GIN expression index over ``to_tsvector``;
+on SQLite an external-content FTS5 table mirrors the column through triggers. Both are
+maintained by the database on every write, so rows never need to be reindexed by hand.
+
+The FTS5 table is keyed on the SQLite rowid, which ``VACUUM`` and table rebuilds may
+renumber for tables without an integer primary key. ``rebuild_full_text_indexes`` recreates
+any missing objects and reindexes every row; it runs after each ``migrate`` and through the
+``rebuild_fulltext_indexes`` management command, which should follow a manual ``VACUUM``.
+
+Add the index with the ``AddFullTextIndex`` migration operation and query it with ``search``.
+"""
+
+import re
+
+from django.apps import apps
+from django.db import connections, models, router
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.operations.base import Operation
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_CONFIG = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+SNIPPET_WORDS = 16
+
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=2"
+)
+
+FTS5_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_table_name(db_table, column):
+    return f"{db_table}_{column}_fts"
+
+
+def index_name(db_table, column):
+    return f"{db_table}_{column}_fts_idx"
+
+
+def _postgres_document(quote_name, db_table, column):
+    # Must match the indexed expression exactly for the planner to use the GIN index
+    return f"to_tsvector('{SEARCH_CONFIG}', COALESCE({quote_name(db_table)}.{quote_name(column)}, ''))"
+
+
+def _create_statements(connection, db_table, column):
+    qn = connection.ops.quote_name
+
+    if connection.vendor == "postgresql":
+        document = _postgres_document(qn, db_table, column)
+        return [
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {qn(index_name(db_table, column))} "
+            f"ON {qn(db_table)} USING GIN (({document}))"
+        ]
+
+    if connection.vendor == "sqlite":
+        fts = qn(fts_table_name(db_table, column))
+        table, col = qn(db_table), qn(column)
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({col}, content={table}, content_rowid='rowid', "
+            "tokenize='porter unicode61')",
+            f"CREATE TRIGGER IF NOT EXISTS {qn(fts_table_name(db_table, column) + '_ai')} AFTER INSERT ON {table} "
+            f"BEGIN INSERT INTO {fts}(rowid, {col}) VALUES (new.rowid, new.{col}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {qn(fts_table_name(db_table, column) + '_ad')} AFTER DELETE ON {table} "
+            f"BEGIN INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.rowid, old.{col}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {qn(fts_table_name(db_table, column) + '_au')} AFTER UPDATE OF {col} "
+            f"ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.rowid, old.{col}); "
+            f"INSERT INTO {fts}(rowid, {col}) VALUES (new.rowid, new.{col}); END",
+            # Index rows that existed before the table was created
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ]
+
+    return []
+
+
+def _drop_statements(connection, db_table, column):
+    qn = connection.ops.quote_name
+
+    if connection.vendor == "postgresql":
+        return [f"DROP INDEX CONCURRENTLY IF EXISTS {qn(index_name(db_table, column))}"]
+
+    if connection.vendor == "sqlite":
+        fts = fts_table_name(db_table, column)
+        return [f"DROP TRIGGER IF EXISTS {qn(fts + suffix)}" for suffix in ("_ai", "_ad", "_au")] + [
+            f"DROP TABLE IF EXISTS {qn(fts)}"
+        ]
+
+    return []
+
+
+def missing_index_objects(connection, db_table, column):
+    """Return the names of the database objects of the full-text index on ``db_table.column`` that do not exist"""
+    if connection.vendor == "postgresql":
+        expected = [index_name(db_table, column)]
+        query = "SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)"
+    elif connection.vendor == "sqlite":
+        fts = fts_table_name(db_table, column)
+        expected = [fts] + [fts + suffix for suffix in ("_ai", "_ad", "_au")]
+        query = f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(expected))})"
+    else:
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, [expected] if connection.vendor == "postgresql" else expected)
+        existing = {name for (name,) in cursor.fetchall()}
+    return [name for name in expected if name not in existing]
+
+
+def applied_full_text_indexes(connection):
+    """Return the ``(app_label, model_name, field_name)`` of every applied ``AddFullTextIndex``"""
+    loader = MigrationLoader(connection, ignore_no_migrations=True)
+    indexes = set()
+    for key in loader.applied_migrations:
+        migration = loader.disk_migrations.get(key)
+        for operation in migration.operations if migration else []:
+            if isinstance(operation, AddFullTextIndex):
+                indexes.add((key[0], operation.model_name, operation.field_name))
+    return sorted(indexes)
+
+
+def full_text_indexes(alias):
+    """Return the ``(model, field_name)`` of every applied full-text index that lives in database ``alias``"""
+    indexes = []
+    for app_label, model_name, field_name in applied_full_text_indexes(connections[alias]):
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            continue
+        if router.allow_migrate_model(alias, model):
+            indexes.append((model, field_name))
+    return indexes
+
+
+def rebuild_full_text_indexes(using="default", **kwargs):
+    """
+    Recreate the missing objects of every full-text index in ``using`` and reindex its rows.
+
+    Also connected to ``post_migrate``, as a migration that rebuilds a SQLite table renumbers
+    its rowids and drops the triggers on it. Returns the labels of the rebuilt fields.
+    """
+    connection = connections[using]
+    rebuilt = []
+    for model, field_name in full_text_indexes(using):
+        column = model._meta.get_field(field_name).column
+        with connection.cursor() as cursor:
+            for sql in _create_statements(connection, model._meta.db_table, column):
+                cursor.execute(sql)
+        rebuilt.append(f"{model._meta.label}.{field_name}")
+    return rebuilt
+
+
+class AddFullTextIndex(Operation):
+    """
+    Create the full-text index for ``model_name.field_name``.
+
+    On PostgreSQL the index is built concurrently, so the migration must set ``atomic = False``.
+    On SQLite, a later migration that rebuilds the table drops the triggers along with it;
+    ``rebuild_full_text_indexes`` puts them back once ``migrate`` finishes, and the
+    ``core.W001`` check (see ``grid.core.checks``) warns when an index is still incomplete.
+    """
+
+    reversible = True
+
+    def __init__(self, model_name, field_name):
+        self.model_name = model_name
+        self.field_name = field_name
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _run(self, statements, app_label, schema_editor, state):
+        model = state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        column = model._meta.get_field(self.field_name).column
+        for sql in statements(schema_editor.connection, model._meta.db_table, column):
+            schema_editor.execute(sql, params=None)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._run(_create_statements, app_label, schema_editor, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._run(_drop_statements, app_label, schema_editor, from_state)
+
+    def describe(self):
+        return f"Create full-text index on {self.model_name}.{self.field_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_{self.field_name}_fulltext"
+
+
+def to_fts5_query(query):
+    """
+    Turn free text into a safe FTS5 expression.
+
+    Every word is quoted so user input can never be parsed as FTS5 syntax, and the last
+    word is matched as a prefix so results show up while the user is still typing.
+    """
+    tokens = FTS5_TOKEN_RE.findall(query)
+    if not tokens:
+        return ""
+
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search(queryset, query, field_name="content"):
+    """
+    Filter ``queryset`` to rows whose ``field_name`` matches ``query``.
+
+    Matching rows are annotated with ``search_rank`` (higher is better) and
+    ``search_snippet``, a short excerpt with the matched terms wrapped in ``<mark>`` tags.
+    """
+    query = (query or "").strip()
+    if not query:
+        return queryset.none()
+
+    connection = connections[queryset.db]
+    qn = connection.ops.quote_name
+    model = queryset.model
+    db_table = model._meta.db_table
+    column = model._meta.get_field(field_name).column
+
+    if connection.vendor == "postgresql":
+        document = _postgres_document(qn, db_table, column)
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        match = RawSQL(f"{document} @@ {tsquery}", (query,), output_field=models.BooleanField())
+        rank = RawSQL(f"ts_rank_cd({document}, {tsquery})", (query,), output_field=models.FloatField())
+        snippet = RawSQL(
+            f"ts_headline('{SEARCH_CONFIG}', COALESCE({qn(db_table)}.{qn(column)}, ''), {tsquery}, %s)",
+            (query, HEADLINE_OPTIONS),
+            output_field=models.TextField(),
+        )
+
+    elif connection.vendor == "sqlite":
+        match_query = to_fts5_query(query)
+        if not match_query:
+            return queryset.none()
+
+        fts = qn(fts_table_name(db_table, column))
+        rowid = f"{qn(db_table)}.rowid"
+        matched_row = f"FROM {fts} WHERE {fts} MATCH %s AND {fts}.rowid = {rowid}"
+        match = RawSQL(
+            f"{rowid} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)",
+            (match_query,),
+            output_field=models.BooleanField(),
+        )
+        # bm25() is lower for better matches, so negate it to share "higher is better" with PostgreSQL
+        rank = RawSQL(f"(SELECT -bm25({fts}) {matched_row})", (match_query,), output_field=models.FloatField())
+        snippet = RawSQL(
+            f"(SELECT snippet({fts}, 0, %s, %s, '…', %s) {matched_row})",
+            (HIGHLIGHT_START, HIGHLIGHT_STOP, SNIPPET_WORDS, match_query),
+            output_field=models.TextField(),
+        )
+
+    else:
+        raise NotImplementedError(f"Full-text search is not supported on {connection.vendor}")
+
+    return queryset.filter(match).annotate(search_rank=rank, search_snippet=snippet)
@@ -0,0 +1,122 @@
+"""
+Resized variants of stored images.
+
+Images are stored by ``grid.core.storage.ContentAddressedStorage``, so a changed picture gets
+a new name and every URL derived from it is safe to cache forever.
+
+Variants are resized copies of a stored image in one of ``IMAGE_VARIANT_SIZES`` (the longest
+side, in pixels) and ``IMAGE_VARIANT_FORMATS``. They are not made on upload: the first request
+for ``<MEDIA_URL>variants/<size>/<name>.<format>`` renders the variant to that same path in
+the media root through ``image_variant``, and from then on it is served from disk like any
+other media file.
+"""
+
+import posixpath
+
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.views.decorators.http import require_GET
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+
+VARIANTS_DIR = "variants"
+
+IMAGE_VARIANT_SIZES = (48, 128, 512)
+IMAGE_VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+VARIANT_QUALITY = 85
+VARIANT_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def variant_name(name, size, image_format):
+    return f"{VARIANTS_DIR}/{size}/{name}.{image_format}"
+
+
+def variant_urls(field_file):
+    """URLs of every variant of ``field_file`` by format and size, or ``None`` without a file"""
+    if not field_file:
+        return None
+    storage = field_file.storage
+    return {
+        image_format: {
+            str(size): storage.url(variant_name(field_file.name, size, image_format)) for size in IMAGE_VARIANT_SIZES
+        }
+        for image_format in IMAGE_VARIANT_FORMATS
+    }
+
+
+class ImageVariantsField(serializers.Field):
+    """Read-only variant URLs of the image field given as ``source``"""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        urls = variant_urls(value)
+        request = self.context.get("request")
+        if urls and request:
+            urls = {
+                image_format: {size: request.build_absolute_uri(url) for size, url in sizes.items()}
+                for image_format, sizes in urls.items()
+            }
+        return urls
+
+
+def render_variant(source, size, image_format):
+    """Return the bytes of ``source`` scaled to fit ``size`` pixels, without enlarging it"""
+    pil_format, _ = IMAGE_VARIANT_FORMATS[image_format]
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size), Image.LANCZOS)
+        if pil_format == "JPEG" and image.mode != "RGB":
+            # JPEG has no alpha channel; flatten onto white
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+            image = background
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        output = BytesIO()
+        image.save(output, pil_format, quality=VARIANT_QUALITY, optimize=True)
+        return output.getvalue()
+
+
+def get_variant(name, size, image_format, storage=default_storage):
+    """Return the name of the variant of the stored image ``name``, rendering it on first use"""
+    path = variant_name(name, size, image_format)
+    if not storage.exists(path):
+        with storage.open(name, "rb") as source:
+            data = render_variant(source, size, image_format)
+        # A concurrent request may have saved it meanwhile, and saving again would add a renamed copy
+        if not storage.exists(path):
+            storage.save(path, ContentFile(data))
+    return path
+
+
+@require_GET
+def image_variant(request, size, name, image_format):
+    """Serve a variant of the media file ``name``; web servers serve it directly once rendered"""
+    name = posixpath.normpath(name)
+    if (
+        size not in IMAGE_VARIANT_SIZES
+        or image_format not in IMAGE_VARIANT_FORMATS
+        or name.startswith(("/", "..", f"{VARIANTS_DIR}/"))
+        or not default_storage.exists(name)
+    ):
+        raise Http404("No such image variant")
+
+    try:
+        path = get_variant(name, size, image_format)
+    except (OSError, Image.DecompressionBombError):
+        raise Http404("Not an image")
+
+    response = FileResponse(default_storage.open(path, "rb"), content_type=IMAGE_VARIANT_FORMATS[image_format][1])
+    response["Cache-Control"] = f"public, max-age={VARIANT_MAX_AGE}, immutable"
+    return response
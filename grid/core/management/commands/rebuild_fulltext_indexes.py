@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from grid.core.fulltext import rebuild_full_text_indexes
+
+
+class Command(BaseCommand):
+    help = "Recreate missing full-text index objects and reindex every row, e.g. after a SQLite VACUUM"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database to rebuild the indexes of")
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_full_text_indexes(options["database"])
+        for label in rebuilt:
+            self.stdout.write(f"  {label}")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rebuilt)} full-text indexes"))
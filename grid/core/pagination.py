@@ -1,7 +1,82 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+# Below this many rows an exact count is cheap enough
+EXACT_COUNT_THRESHOLD = 1000
+
+
+def estimate_count(queryset):
+    """
+    Return ``(count, exact)`` for ``queryset``.
+
+    On PostgreSQL the planner's row estimate is used when it exceeds ``EXACT_COUNT_THRESHOLD``,
+    so large tables are not scanned just to be counted; smaller results and other databases
+    are counted exactly.
+    """
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor == "postgresql":
+        plan = json.loads(queryset.explain(format="json"))
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate > EXACT_COUNT_THRESHOLD:
+            return estimate, False
+    return queryset.count(), True
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class SearchRankCursorPagination(CursorPagination):
+    """
+    Cursor pagination for results annotated by ``grid.core.fulltext.search``.
+
+    Pages are keyed on the rank of the last row instead of an offset, so deep pages
+    cost the same as the first one.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-search_rank", "-created_at")
+
+
+class EstimatedCountCursorPagination(CursorPagination):
+    """
+    Cursor pagination that also reports how many rows there are in total, from
+    ``estimate_count``, as ``count`` and ``count_is_exact``.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-created_at"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count, self.count_is_exact = estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.count,
+                "count_is_exact": self.count_is_exact,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"] = {
+            "count": {"type": "integer", "example": 123},
+            "count_is_exact": {"type": "boolean"},
+            **response_schema["properties"],
+        }
+        return response_schema
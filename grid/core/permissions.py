@@ -2,7 +2,6 @@ from rest_framework.permissions import BasePermission
 
 from grid.admins.models import AdminUserProfile
 from grid.clients.models import ClientUserProfile
-from grid.recruiters.models import Recruiter
 from grid.users.choices import Roles
 
 
@@ -28,62 +27,70 @@ class IsAdmin(BasePermission):
 
 
 # Permissions for Subroles
+#
+# These read the profiles loaded with the user by ``grid.users.authentication``, so checking
+# them costs no queries
+
+
+def user_profile(user, relation):
+    """The user's ``adminuserprofile``, ``clientuserprofile`` or ``recruiter``, or ``None``"""
+    return getattr(user, relation, None)
+
+
+def user_type(user, relation):
+    return getattr(user_profile(user, relation), "user_type", None)
 
 
 class IsRecruiterSuperAdmin(BasePermission):
     def has_permission(self, request, view):
-        return Recruiter.objects.filter(user=request.user, superuser=True).exists()
+        recruiter = user_profile(request.user, "recruiter")
+        return recruiter is not None and recruiter.superuser
 
 
 class IsRecruiterMember(BasePermission):
     def has_permission(self, request, view):
-        return Recruiter.objects.filter(user=request.user, superuser=False).exists()
+        recruiter = user_profile(request.user, "recruiter")
+        return recruiter is not None and not recruiter.superuser
 
 
 class IsClientSuperAdmin(BasePermission):
     def has_permission(self, request, view):
-        return ClientUserProfile.objects.filter(
-            user=request.user, user_type=ClientUserProfile.UserType.SUPERUSER
-        ).exists()
+        return user_type(request.user, "clientuserprofile") == ClientUserProfile.UserType.SUPERUSER
 
 
 class IsClientAdmin(BasePermission):
     def has_permission(self, request, view):
-        return ClientUserProfile.objects.filter(user=request.user, user_type=ClientUserProfile.UserType.ADMIN).exists()
+        return user_type(request.user, "clientuserprofile") == ClientUserProfile.UserType.ADMIN
 
 
 class IsAdminSuperAdmin(BasePermission):
     def has_permission(self, request, view):
-        return AdminUserProfile.objects.filter(
-            user=request.user, user_type=AdminUserProfile.UserType.SUPERADMIN
-        ).exists()
+        return user_type(request.user, "adminuserprofile") == AdminUserProfile.UserType.SUPERADMIN
 
 
 class IsAdminAdmin(BasePermission):
     def has_permission(self, request, view):
-        return AdminUserProfile.objects.filter(user=request.user, user_type=AdminUserProfile.UserType.ADMIN).exists()
+        return user_type(request.user, "adminuserprofile") == AdminUserProfile.UserType.ADMIN
 
 
 class IsAdminEditor(BasePermission):
     def has_permission(self, request, view):
-        return AdminUserProfile.objects.filter(user=request.user, user_type=AdminUserProfile.UserType.EDITOR).exists()
+        return user_type(request.user, "adminuserprofile") == AdminUserProfile.UserType.EDITOR
 
 
 class IsAdminViewer(BasePermission):
     def has_permission(self, request, view):
-        return AdminUserProfile.objects.filter(user=request.user, user_type=AdminUserProfile.UserType.VIEWER).exists()
+        return user_type(request.user, "adminuserprofile") == AdminUserProfile.UserType.VIEWER
 
 
 class IsAdminAccountant(BasePermission):
     def has_permission(self, request, view):
-        return AdminUserProfile.objects.filter(
-            user=request.user, user_type=AdminUserProfile.UserType.ACCOUNTANT
-        ).exists()
+        return user_type(request.user, "adminuserprofile") == AdminUserProfile.UserType.ACCOUNTANT
 
 
 class IsAdminMember(BasePermission):
     def has_permission(self, request, view):
-        return AdminUserProfile.objects.filter(user=request.user, user_type=AdminUserProfile.UserType.MEMBER).exists()
+        return user_type(request.user, "adminuserprofile") == AdminUserProfile.UserType.MEMBER
 
 
 # class IsUserBelongsToClient (BasePermission):
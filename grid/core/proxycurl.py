@@ -0,0 +1,250 @@
+"""
+Cached Proxycurl person and company lookups.
+
+LinkedIn URLs are normalized before lookup, so the variants of one profile URL (``http``,
+country subdomains, missing ``www``, query strings, trailing slashes, letter case) share a
+single cache entry. Responses are kept in the Django cache for ``PROXYCURL_CACHE_TTL``
+seconds, and 404s for ``PROXYCURL_NOT_FOUND_TTL`` seconds so that a profile that does not
+exist is not looked up again on every keystroke. Other errors are not cached.
+
+Concurrent lookups of the same URL make a single upstream call: threads of one process wait
+for the thread already fetching it, and other processes wait for the entry while a lock key
+in the cache is held. Without a shared cache only the first of these applies.
+
+Requests go through the transport named by ``PROXYCURL_TRANSPORT``; ``StubTransport``
+answers from memory, for tests and for development without an API key. Hit and miss counts
+are kept in the cache as well and reported by ``lookup_stats``.
+"""
+
+import hashlib
+import re
+import threading
+import time
+
+from contextlib import contextmanager
+from urllib.parse import unquote, urlsplit
+
+import requests
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+PERSON = "person"
+COMPANY = "company"
+
+ENDPOINTS = {
+    PERSON: ("https://nubela.co/proxycurl/api/v2/linkedin", "linkedin_profile_url"),
+    COMPANY: ("https://nubela.co/proxycurl/api/linkedin/company", "url"),
+}
+
+UPSTREAM_TIMEOUT = 30
+LOCK_TIMEOUT = UPSTREAM_TIMEOUT + 5
+LOCK_POLL_INTERVAL = 0.1
+
+STAT_EVENTS = ["hits", "misses", "coalesced", "errors"]
+
+LINKEDIN_HOST_RE = re.compile(r"^(?:[a-z]{2,3}\.|www\.)?linkedin\.com$")
+
+
+def normalize_linkedin_url(url):
+    """
+    Return the canonical ``https://www.linkedin.com/<path>`` form of a LinkedIn URL.
+
+    URLs of other hosts are returned stripped but otherwise unchanged.
+    """
+    url = (url or "").strip()
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+    host = parts.netloc.lower().rsplit("@", 1)[-1].split(":", 1)[0]
+    if not LINKEDIN_HOST_RE.match(host):
+        return url
+
+    path = re.sub(r"/{2,}", "/", unquote(parts.path).lower()).rstrip("/")
+    return f"https://www.linkedin.com{path}/"
+
+
+class HttpTransport:
+    """Calls the Proxycurl API"""
+
+    def get(self, kind, linkedin_url):
+        """Return ``(status_code, data)`` for 200 and 404 responses and raise for any other"""
+        endpoint, param = ENDPOINTS[kind]
+        response = requests.get(
+            endpoint,
+            headers={"Authorization": f"Bearer {settings.PROXYCURL_API_KEY}"},
+            params={param: linkedin_url},
+            timeout=UPSTREAM_TIMEOUT,
+        )
+        if response.status_code == 200:
+            return 200, response.json()
+        if response.status_code == 404:
+            return 404, None
+        response.raise_for_status()
+        raise requests.HTTPError(f"{response.status_code} Unexpected response for url: {response.url}")
+
+
+class StubTransport:
+    """Answers from ``responses``, keyed by ``(kind, normalized url)``; anything else is a 404"""
+
+    def __init__(self, responses=None, delay=0):
+        self.responses = dict(responses or {})
+        self.delay = delay
+        self.calls = []
+
+    def add(self, kind, linkedin_url, data):
+        self.responses[(kind, normalize_linkedin_url(linkedin_url))] = data
+
+    def get(self, kind, linkedin_url):
+        self.calls.append((kind, linkedin_url))
+        if self.delay:
+            time.sleep(self.delay)
+        data = self.responses.get((kind, linkedin_url))
+        return (200, data) if data is not None else (404, None)
+
+
+_transports = {}
+_transport_override = None
+
+
+def get_transport():
+    if _transport_override is not None:
+        return _transport_override
+    path = settings.PROXYCURL_TRANSPORT
+    if path not in _transports:
+        _transports[path] = import_string(path)()
+    return _transports[path]
+
+
+@contextmanager
+def use_transport(transport):
+    """Send lookups to ``transport`` inside the block"""
+    global _transport_override
+    previous, _transport_override = _transport_override, transport
+    try:
+        yield transport
+    finally:
+        _transport_override = previous
+
+
+def cache_key(kind, linkedin_url):
+    return f"proxycurl:{kind}:{hashlib.sha1(linkedin_url.encode()).hexdigest()}"
+
+
+def stat_key(kind, event):
+    return f"proxycurl:stats:{kind}:{event}"
+
+
+def record(kind, event):
+    key = stat_key(kind, event)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def lookup_stats():
+    """Lookup counts per kind since the counters were last reset, with the share served without an upstream call"""
+    keys = {(kind, event): stat_key(kind, event) for kind in ENDPOINTS for event in STAT_EVENTS}
+    values = cache.get_many(keys.values())
+
+    stats = {}
+    for kind in ENDPOINTS:
+        counts = {event: values.get(keys[kind, event], 0) for event in STAT_EVENTS}
+        total = counts["hits"] + counts["misses"] + counts["coalesced"]
+        counts["hit_rate"] = round((counts["hits"] + counts["coalesced"]) / total, 4) if total else None
+        stats[kind] = counts
+    return stats
+
+
+def reset_lookup_stats():
+    cache.delete_many([stat_key(kind, event) for kind in ENDPOINTS for event in STAT_EVENTS])
+
+
+class InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+        self.error = None
+
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def unpack(entry, linkedin_url):
+    status_code, data = entry
+    if status_code == 404:
+        raise requests.HTTPError(f"404 Client Error: Not Found for url: {linkedin_url}")
+    return data
+
+
+def fetch(kind, linkedin_url, key):
+    """Call upstream and cache the result, unless another process is already doing so"""
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                record(kind, "coalesced")
+                return entry
+            if cache.get(lock_key) is None:
+                break
+        # The other process failed or gave up; fetch without the lock
+
+    try:
+        record(kind, "misses")
+        try:
+            entry = get_transport().get(kind, linkedin_url)
+        except Exception:
+            record(kind, "errors")
+            raise
+        timeout = settings.PROXYCURL_CACHE_TTL if entry[0] == 200 else settings.PROXYCURL_NOT_FOUND_TTL
+        cache.set(key, entry, timeout=timeout)
+        return entry
+    finally:
+        cache.delete(lock_key)
+
+
+def lookup(kind, linkedin_url):
+    """
+    Return Proxycurl's data for the ``kind`` of profile at ``linkedin_url``.
+
+    Raises ``requests.HTTPError`` when the profile does not exist or the API call fails.
+    """
+    linkedin_url = normalize_linkedin_url(linkedin_url)
+    key = cache_key(kind, linkedin_url)
+
+    entry = cache.get(key)
+    if entry is not None:
+        record(kind, "hits")
+        return unpack(entry, linkedin_url)
+
+    with _in_flight_lock:
+        call = _in_flight.get(key)
+        leader = call is None
+        if leader:
+            call = _in_flight[key] = InFlight()
+
+    if not leader:
+        call.done.wait(LOCK_TIMEOUT)
+        if call.error is not None:
+            raise call.error
+        if call.entry is None:
+            raise requests.Timeout(f"Timed out waiting for the lookup of {linkedin_url}")
+        record(kind, "coalesced")
+        return unpack(call.entry, linkedin_url)
+
+    try:
+        call.entry = fetch(kind, linkedin_url, key)
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+        call.done.set()
+    return unpack(call.entry, linkedin_url)
@@ -0,0 +1,45 @@
+"""
+Content-addressed file storage.
+
+``ContentAddressedStorage`` saves each file as ``images/<aa>/<sha256>.<ext>``, named after the
+hash of its content, so the same picture uploaded for several profiles is stored once.
+"""
+
+import hashlib
+import os
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+IMAGES_DIR = "images"
+
+
+def file_digest(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores files under the hash of their content, keeping only the extension of the name
+    given by ``upload_to``. Saving a file that is already stored is a no-op.
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest = file_digest(content)
+        ext = os.path.splitext(name or "")[1].lower().replace(".jpeg", ".jpg")
+        name = f"{IMAGES_DIR}/{digest[:2]}/{digest}{ext}"
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+content_addressed_storage = ContentAddressedStorage()
@@ -0,0 +1,168 @@
+"""
+Helpers for streaming large downloads without building them in memory.
+"""
+
+import codecs
+import csv
+import io
+import re
+import zipfile
+
+from decimal import Decimal
+from itertools import islice
+from xml.sax.saxutils import escape
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only sink that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def zip_stream(files, compression=zipfile.ZIP_DEFLATED):
+    """
+    Yield a ZIP archive of ``files`` chunk by chunk.
+
+    ``files`` is an iterable of ``(name, content)`` where content is bytes or an iterable of
+    bytes. Only one entry is held in memory at a time, so the result can be passed straight
+    to a ``StreamingHttpResponse``.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=compression) as archive:
+        for name, content in files:
+            with archive.open(name, "w") as entry:
+                for chunk in [content] if isinstance(content, bytes) else content:
+                    entry.write(chunk)
+                    if data := buffer.drain():
+                        yield data
+            if data := buffer.drain():
+                yield data
+    # Closing the archive writes the central directory
+    yield buffer.drain()
+
+
+# Leading characters that make a spreadsheet read a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def spreadsheet_text(value):
+    """
+    Return ``value`` with a leading ``'`` when it is text a spreadsheet would evaluate, so
+    exported names and addresses cannot smuggle formulas into the file (CSV injection)
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+class _Echo:
+    """File-like object whose ``write`` returns what it was given, for ``csv.writer``"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(header, rows, batch_size=500):
+    """
+    Yield a UTF-8 CSV of ``header`` and ``rows`` in batches of ``batch_size`` lines.
+
+    Starts with a byte order mark so spreadsheet applications detect the encoding.
+    Text cells are passed through ``spreadsheet_text``.
+    """
+    writer = csv.writer(_Echo())
+    yield codecs.BOM_UTF8 + writer.writerow(header).encode()
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield "".join(writer.writerow(map(spreadsheet_text, row)) for row in batch).encode()
+
+
+# Control characters other than tab and newlines are not allowed in XML
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(_XML_ILLEGAL.sub("", spreadsheet_text(str(value))))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_sheet(header, rows, batch_size):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    ).encode()
+    rows = iter(rows)
+    batch = [header]
+    while batch:
+        yield "".join(f"<row>{''.join(map(_xlsx_cell, row))}</row>" for row in batch).encode()
+        batch = list(islice(rows, batch_size))
+    yield b"</sheetData></worksheet>"
+
+
+def xlsx_stream(header, rows, sheet_name="Sheet1", batch_size=500):
+    """
+    Yield a single-sheet XLSX workbook of ``header`` and ``rows`` chunk by chunk.
+
+    Cells are written as inline strings and numbers, without a shared string table, so
+    nothing but the current batch of rows is held in memory. Other values are written
+    as their ``str``, through ``spreadsheet_text``.
+    """
+    files = [
+        ("[Content_Types].xml", _XLSX_CONTENT_TYPES.encode()),
+        ("_rels/.rels", _XLSX_ROOT_RELS.encode()),
+        ("xl/workbook.xml", _XLSX_WORKBOOK.format(name=escape(sheet_name[:31], {'"': "&quot;"})).encode()),
+        ("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS.encode()),
+        ("xl/worksheets/sheet1.xml", _xlsx_sheet(header, rows, batch_size)),
+    ]
+    return zip_stream(files)
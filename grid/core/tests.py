@@ -1,4 +1,290 @@
-from django.test import TestCase
+import csv
+import io
+import shutil
+import tempfile
+import threading
+import zipfile
 
+from io import BytesIO
+from unittest import skipUnless
 
-# Create your tests here.
+import requests
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from grid.core.checks import check_full_text_indexes
+from grid.core.fulltext import fts_table_name, rebuild_full_text_indexes, search
+from grid.core.helpers import get_company_data, get_person_data
+from grid.core.images import ImageVariantsField, image_variant, variant_urls
+from grid.core.proxycurl import (
+    COMPANY,
+    PERSON,
+    StubTransport,
+    cache_key,
+    lookup_stats,
+    normalize_linkedin_url,
+    reset_lookup_stats,
+    stat_key,
+    use_transport,
+)
+from grid.core.storage import content_addressed_storage
+from grid.core.streaming import csv_stream, xlsx_stream
+from grid.recruiters.models import Recruiter
+from grid.users.choices import Roles
+
+
+User = get_user_model()
+
+
+PROFILE = {"full_name": "Jane Doe", "headline": "Technical recruiter"}
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ProxycurlLookupTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        reset_lookup_stats()
+        self.stub = StubTransport()
+        self.stub.add(PERSON, "https://www.linkedin.com/in/jane-doe", PROFILE)
+        self.stub.add(COMPANY, "https://www.linkedin.com/company/acme", {"name": "Acme"})
+        self.enterContext(use_transport(self.stub))
+
+    def test_normalize_linkedin_url(self):
+        for url in [
+            "https://www.linkedin.com/in/jane-doe",
+            "http://linkedin.com/in/Jane-Doe/",
+            "https://uk.linkedin.com/in/jane-doe?trk=public_profile#about",
+            "www.linkedin.com//in/jane%2Ddoe",
+        ]:
+            self.assertEqual(normalize_linkedin_url(url), "https://www.linkedin.com/in/jane-doe/")
+
+    def test_url_variants_share_one_cache_entry(self):
+        self.assertEqual(get_person_data("https://www.linkedin.com/in/jane-doe"), PROFILE)
+        self.assertEqual(get_person_data("http://uk.linkedin.com/in/Jane-Doe/?trk=x"), PROFILE)
+        self.assertEqual(get_company_data("linkedin.com/company/ACME"), {"name": "Acme"})
+
+        self.assertEqual(
+            self.stub.calls,
+            [(PERSON, "https://www.linkedin.com/in/jane-doe/"), (COMPANY, "https://www.linkedin.com/company/acme/")],
+        )
+        stats = lookup_stats()
+        self.assertEqual((stats[PERSON]["hits"], stats[PERSON]["misses"]), (1, 1))
+        self.assertEqual(stats[PERSON]["hit_rate"], 0.5)
+        self.assertEqual(stats[COMPANY]["hit_rate"], 0)
+
+    def test_not_found_is_cached(self):
+        for _ in range(3):
+            with self.assertRaisesRegex(requests.HTTPError, "404"):
+                get_person_data("https://www.linkedin.com/in/nobody")
+
+        self.assertEqual(len(self.stub.calls), 1)
+        self.assertEqual(lookup_stats()[PERSON]["hits"], 2)
+
+    @override_settings(PROXYCURL_NOT_FOUND_TTL=0)
+    def test_not_found_ttl(self):
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                get_person_data("https://www.linkedin.com/in/nobody")
+
+        self.assertEqual(len(self.stub.calls), 2)
+
+    def test_errors_are_not_cached(self):
+        class FailingTransport(StubTransport):
+            def get(self, kind, linkedin_url):
+                super().get(kind, linkedin_url)
+                raise requests.HTTPError("503 Server Error")
+
+        failing = FailingTransport()
+        with use_transport(failing):
+            for _ in range(2):
+                with self.assertRaisesRegex(requests.HTTPError, "503"):
+                    get_person_data("https://www.linkedin.com/in/jane-doe")
+
+        self.assertEqual(len(failing.calls), 2)
+        self.assertEqual(lookup_stats()[PERSON]["errors"], 2)
+
+    def test_concurrent_lookups_make_one_upstream_call(self):
+        self.stub.delay = 0.2
+        results = []
+
+        def look_up():
+            results.append(get_person_data("https://www.linkedin.com/in/jane-doe/"))
+
+        threads = [threading.Thread(target=look_up) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [PROFILE] * 8)
+        self.assertEqual(len(self.stub.calls), 1)
+        stats = lookup_stats()[PERSON]
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"] + stats["coalesced"], 7)
+
+
+@skipUnless(
+    settings.CACHES["default"]["BACKEND"] == "django_redis.cache.RedisCache", "runs against the configured Redis cache"
+)
+class SharedCacheTests(SimpleTestCase):
+    """Uses the cache as configured, with a second client standing in for another worker process"""
+
+    def setUp(self):
+        reset_lookup_stats()
+        self.addCleanup(reset_lookup_stats)
+        self.other_worker = caches.create_connection("default")
+
+    def test_lookup_stats_are_shared(self):
+        key = cache_key(PERSON, "https://www.linkedin.com/in/nobody/")
+        cache.delete(key)
+        self.addCleanup(cache.delete, key)
+        with use_transport(StubTransport()):
+            with self.assertRaises(requests.HTTPError):
+                get_person_data("https://www.linkedin.com/in/nobody")
+
+        self.assertEqual(self.other_worker.get(stat_key(PERSON, "misses")), 1)
+
+    def test_fetch_lock_is_shared(self):
+        lock_key = f"{cache_key(PERSON, 'https://www.linkedin.com/in/jane-doe/')}:lock"
+        self.addCleanup(cache.delete, lock_key)
+
+        self.assertTrue(cache.add(lock_key, 1, timeout=5))
+        self.assertFalse(self.other_worker.add(lock_key, 1, timeout=5))
+
+
+def png_bytes(width, height, color=(200, 30, 30, 128)):
+    output = BytesIO()
+    Image.new("RGBA", (width, height), color).save(output, "PNG")
+    return output.getvalue()
+
+
+class ImageVariantTests(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, MEDIA_URL="/media/"))
+        self.factory = RequestFactory()
+
+    def test_identical_content_is_stored_once(self):
+        first = content_addressed_storage.save("clients/logos/a/logo.PNG", ContentFile(png_bytes(10, 10)))
+        second = content_addressed_storage.save("recruiters/b/profile_photo.png", ContentFile(png_bytes(10, 10)))
+        other = content_addressed_storage.save("profile_photos/c.png", ContentFile(png_bytes(11, 10)))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r"^images/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+        self.assertEqual(len(content_addressed_storage.listdir(first.rsplit("/", 1)[0])[1]), 1)
+
+    def test_variant_is_rendered_on_first_request_and_kept(self):
+        name = content_addressed_storage.save("logo.png", ContentFile(png_bytes(1000, 500)))
+
+        response = image_variant(self.factory.get("/"), 128, name, "jpeg")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+        with Image.open(BytesIO(b"".join(response.streaming_content))) as variant:
+            self.assertEqual((variant.format, variant.size), ("JPEG", (128, 64)))
+
+        path = f"variants/128/{name}.jpeg"
+        self.assertTrue(default_storage.exists(path))
+        modified = default_storage.get_modified_time(path)
+        image_variant(self.factory.get("/"), 128, name, "jpeg")
+        self.assertEqual(default_storage.get_modified_time(path), modified)
+
+        # Smaller images are not enlarged
+        small = content_addressed_storage.save("logo.png", ContentFile(png_bytes(100, 50)))
+        response = image_variant(self.factory.get("/"), 512, small, "webp")
+        with Image.open(BytesIO(b"".join(response.streaming_content))) as variant:
+            self.assertEqual((variant.format, variant.size), ("WEBP", (100, 50)))
+
+    def test_unknown_variants_are_not_found(self):
+        name = content_addressed_storage.save("logo.png", ContentFile(png_bytes(10, 10)))
+        resume = default_storage.save("resumes/cv.pdf", ContentFile(b"%PDF-1.4"))
+
+        for size, path, image_format in [
+            (100, name, "jpeg"),
+            (48, name, "gif"),
+            (48, "images/missing.png", "webp"),
+            (48, f"../{name}", "webp"),
+            (48, resume, "webp"),
+        ]:
+            with self.assertRaises(Http404):
+                image_variant(self.factory.get("/"), size, path, image_format)
+
+    def test_variant_urls(self):
+        name = content_addressed_storage.save("logo.png", ContentFile(png_bytes(10, 10)))
+        field_file = Recruiter(profile_photo=name).profile_photo
+
+        urls = variant_urls(field_file)
+        self.assertEqual(set(urls), {"webp", "jpeg"})
+        self.assertEqual(urls["webp"]["48"], f"/media/variants/48/{name}.webp")
+
+        field = ImageVariantsField(source="profile_photo")
+        field._context = {"request": self.factory.get("/")}
+        self.assertEqual(
+            field.to_representation(field_file)["jpeg"]["512"], f"http://testserver/media/variants/512/{name}.jpeg"
+        )
+        self.assertIsNone(variant_urls(Recruiter().profile_photo))
+
+
+class FullTextIndexCheckTests(TestCase):
+    def test_migrated_indexes_are_complete(self):
+        self.assertEqual(check_full_text_indexes(databases=["default"]), [])
+
+    @skipUnless(connection.vendor == "sqlite", "triggers only back the SQLite index")
+    def test_dropped_trigger_is_reported(self):
+        trigger = fts_table_name(Recruiter._meta.db_table, "search_document") + "_au"
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {connection.ops.quote_name(trigger)}")
+
+        [warning] = check_full_text_indexes(databases=["default"])
+        self.assertEqual(warning.id, "core.W001")
+        self.assertIn(trigger, warning.msg)
+
+        call_command("rebuild_fulltext_indexes", stdout=io.StringIO())
+        self.assertEqual(check_full_text_indexes(databases=["default"]), [])
+
+    @skipUnless(connection.vendor == "sqlite", "only the SQLite index is keyed on rowids")
+    def test_rebuild_follows_renumbered_rows(self):
+        recruiter = Recruiter.objects.create(
+            user=User.objects.create_user(email="ada@example.com", password="testpass123", role=Roles.RECRUITER),
+            first_name="Ada",
+            last_name="Lovelace",
+            linkedin="https://linkedin.com/in/ada",
+        )
+        # What VACUUM may do to a table without an integer primary key; no trigger follows the move
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {Recruiter._meta.db_table} SET rowid = rowid + 1000 WHERE uuid = %s", [recruiter.pk.hex]
+            )
+        self.assertFalse(search(Recruiter.objects.all(), "Lovelace", "search_document").exists())
+
+        self.assertIn("recruiters.Recruiter.search_document", rebuild_full_text_indexes())
+        self.assertEqual(list(search(Recruiter.objects.all(), "Lovelace", "search_document")), [recruiter])
+
+
+class SpreadsheetExportTests(SimpleTestCase):
+    rows = [['=HYPERLINK("http://evil")', "+1", "-2", "@SUM(A1)", "\tTab", "\rReturn", "Plain", -3]]
+
+    def test_formulas_are_escaped_in_csv(self):
+        content = b"".join(csv_stream(["Name"] * 8, self.rows)).decode("utf-8-sig")
+        [_, row] = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(
+            row, ['\'=HYPERLINK("http://evil")', "'+1", "'-2", "'@SUM(A1)", "'\tTab", "'\rReturn", "Plain", "-3"]
+        )
+
+    def test_formulas_are_escaped_in_xlsx(self):
+        with zipfile.ZipFile(BytesIO(b"".join(xlsx_stream(["Name"] * 8, self.rows)))) as workbook:
+            sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        self.assertIn('<t xml:space="preserve">\'=HYPERLINK', sheet)
+        self.assertIn('<t xml:space="preserve">\'@SUM(A1)</t>', sheet)
+        self.assertIn('<t xml:space="preserve">Plain</t>', sheet)
+        self.assertIn('<c t="n"><v>-3</v></c>', sheet)
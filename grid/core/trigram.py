@@ -0,0 +1,159 @@
+"""
+Trigram search over a single denormalized text column.
+
+The column holds one searchable value per line, lowercased (see ``search_document``), so a
+search filters one indexed column instead of OR-ing lookups across joined tables.
+
+On PostgreSQL the column is indexed with a GIN ``gin_trgm_ops`` index from ``pg_trgm``,
+which serves the ``LIKE '%term%'`` filters below, and ranking uses ``similarity``. SQLite has
+no trigram index; there the filters scan the column and ranking uses ``line_similarity``,
+a pure-Python equivalent registered as an SQL function on every connection.
+
+Add the index with the ``AddTrigramIndex`` migration operation and query it with ``search``.
+"""
+
+import re
+
+from django.db import connections, models
+from django.db.migrations.operations.base import Operation
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+QUOTED_RE = re.compile(r'^"(.*)"$')
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def index_name(db_table, column):
+    return f"{db_table}_{column}_trgm_idx"
+
+
+def search_document(values):
+    """
+    Build the document for a row from its searchable ``values``.
+
+    Values are lowercased and written one per line, with a newline at both ends so that
+    ``"\\n" + value + "\\n"`` matches exactly one whole value. Empty values are skipped.
+    """
+    lines = [" ".join(str(value).lower().split()) for value in values if value]
+    return "\n" + "\n".join(lines) + "\n" if lines else ""
+
+
+def trigrams(text):
+    """Return the set of trigrams of ``text`` the way pg_trgm extracts them"""
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[index : index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+def similarity(left, right):
+    """Share of trigrams the two strings have in common, from 0 to 1, like pg_trgm's ``similarity``"""
+    left, right = trigrams(left), trigrams(right)
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def line_similarity(query, document):
+    """Similarity of ``query`` to the closest line of ``document``"""
+    if not query or not document:
+        return 0.0
+    return max((similarity(query, line) for line in document.split("\n") if line), default=0.0)
+
+
+def register_functions(sender, connection, **kwargs):
+    """``connection_created`` receiver that adds the SQLite fallbacks of the pg_trgm functions"""
+    if connection.vendor == "sqlite":
+        connection.connection.create_function("line_similarity", 2, line_similarity, deterministic=True)
+
+
+class AddTrigramIndex(Operation):
+    """
+    Create the trigram index for ``model_name.field_name`` on PostgreSQL; a no-op elsewhere.
+
+    The index is built concurrently, so the migration must set ``atomic = False``.
+    """
+
+    reversible = True
+
+    def __init__(self, model_name, field_name):
+        self.model_name = model_name
+        self.field_name = field_name
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _run(self, app_label, schema_editor, state, create):
+        connection = schema_editor.connection
+        model = state.apps.get_model(app_label, self.model_name)
+        if connection.vendor != "postgresql" or not self.allow_migrate_model(connection.alias, model):
+            return
+
+        qn = connection.ops.quote_name
+        db_table = model._meta.db_table
+        column = model._meta.get_field(self.field_name).column
+        name = qn(index_name(db_table, column))
+        if create:
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm", params=None)
+            schema_editor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {qn(db_table)} USING GIN ({qn(column)} gin_trgm_ops)",
+                params=None,
+            )
+        else:
+            schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}", params=None)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._run(app_label, schema_editor, to_state, create=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._run(app_label, schema_editor, from_state, create=False)
+
+    def describe(self):
+        return f"Create trigram index on {self.model_name}.{self.field_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_{self.field_name}_trigram"
+
+
+def search(queryset, query, field_name="search_document"):
+    """
+    Filter ``queryset`` to rows whose ``search_document`` column ``field_name`` matches ``query``.
+
+    A query in double quotes must equal one of the document's values, ignoring case;
+    otherwise every word of the query must appear somewhere in the document. Matching rows
+    are annotated with ``search_rank``, the similarity of the query to the closest value
+    (higher is better).
+    """
+    query = " ".join((query or "").lower().split())
+    quoted = QUOTED_RE.match(query)
+    if quoted:
+        phrase = quoted.group(1).strip()
+        match = Q(**{f"{field_name}__contains": f"\n{phrase}\n"})
+    else:
+        phrase = query
+        match = Q()
+        for word in query.split():
+            match &= Q(**{f"{field_name}__contains": word})
+    if not phrase:
+        return queryset
+
+    connection = connections[queryset.db]
+    qn = connection.ops.quote_name
+    model = queryset.model
+    column = f"{qn(model._meta.db_table)}.{qn(model._meta.get_field(field_name).column)}"
+
+    if connection.vendor == "postgresql":
+        rank = RawSQL(
+            f"(SELECT COALESCE(MAX(similarity(%s, line)), 0) FROM unnest(string_to_array({column}, E'\\n')) AS line)",
+            (phrase,),
+            output_field=models.FloatField(),
+        )
+    elif connection.vendor == "sqlite":
+        rank = RawSQL(f"line_similarity(%s, {column})", (phrase,), output_field=models.FloatField())
+    else:
+        raise NotImplementedError(f"Trigram search is not supported on {connection.vendor}")
+
+    return queryset.filter(match).annotate(search_rank=rank)
@@ -1,9 +1,10 @@
 from django.urls import path
 
-from .views import ProxycurlCompanyView, ProxycurlPersonView
+from .views import ProxycurlCompanyView, ProxycurlPersonView, ProxycurlStatsView
 
 
 urlpatterns = [
     path("proxycurl/person/", ProxycurlPersonView.as_view(), name="proxycurl-person"),
     path("proxycurl/company/", ProxycurlCompanyView.as_view(), name="proxycurl-company"),
+    path("proxycurl/stats/", ProxycurlStatsView.as_view(), name="proxycurl-stats"),
 ]
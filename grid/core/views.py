@@ -3,10 +3,13 @@ import requests
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .helpers import get_company_data, get_person_data  # Import the helper function
+from .permissions import IsAdmin
+from .proxycurl import lookup_stats
 
 
 class ProxycurlPersonView(APIView):
@@ -65,3 +68,14 @@ class ProxycurlCompanyView(APIView):
             return Response(company_data, status=status.HTTP_200_OK)
         except requests.exceptions.HTTPError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ProxycurlStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    @swagger_auto_schema(
+        operation_description="Proxycurl lookup counts and cache hit rates per kind of profile",
+        responses={200: "Success - Returns hits, misses, coalesced, errors and hit_rate per kind"},
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(lookup_stats(), status=status.HTTP_200_OK)
@@ -1,6 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from .models import Hire, RecruiterPayment
+from .models import DunningNotice, Hire, RecruiterPayment
+from .payouts import generate_payout_schedules
+from .utils import generate_invoices_for_hires
 
 
 @admin.register(Hire)
@@ -15,6 +17,29 @@ class HireAdmin(admin.ModelAdmin):
         "recruiter__last_name",
     )
     ordering = ("-join_date",)
+    actions = ["generate_invoices", "generate_payout_schedules"]
+
+    @admin.action(description="Generate invoices for selected hires")
+    def generate_invoices(self, request, queryset):
+        result = generate_invoices_for_hires(queryset)
+        self.message_user(request, f"Created {result['created']} invoices in {result['seconds']:.2f}s.")
+        if result["skipped"]:
+            self.message_user(
+                request, f"Skipped {len(result['skipped'])} hires whose client has no address.", messages.WARNING
+            )
+
+    @admin.action(description="Regenerate payout schedules for selected hires")
+    def generate_payout_schedules(self, request, queryset):
+        result = generate_payout_schedules(queryset)
+        self.message_user(
+            request,
+            f"Updated {result['updated']} schedules ({result['created']} payments created, "
+            f"{result['deleted']} replaced) in {result['seconds']:.2f}s.",
+        )
+        if result["skipped"]:
+            self.message_user(
+                request, f"Skipped {len(result['skipped'])} hires with no share or currency.", messages.WARNING
+            )
 
 
 @admin.register(RecruiterPayment)
@@ -23,3 +48,12 @@ class RecruiterPaymentAdmin(admin.ModelAdmin):
     list_filter = ("status", "currency")
     search_fields = ("hire__candidate__first_name", "hire__candidate__last_name", "amount")
     ordering = ("-due_on",)
+
+
+@admin.register(DunningNotice)
+class DunningNoticeAdmin(admin.ModelAdmin):
+    list_display = ("invoice", "client", "due_date", "sent_at")
+    list_filter = ("sent_at",)
+    search_fields = ("invoice__invoice_code", "client__company_name")
+    ordering = ("-due_date",)
+    raw_id_fields = ("invoice", "client")
@@ -0,0 +1,110 @@
+"""
+Overdue invoice sweep and dunning reminders.
+
+``sweep_overdue_invoices`` queues a ``DunningNotice`` for every due invoice whose due date
+passed since the previous sweep. It reads the window between its watermark and now through
+the partial index on due invoices, so each run costs the number of invoices that lapsed in
+the window rather than the size of the table. Only the first run, with no watermark yet,
+scans every overdue invoice. Invoices whose due date is moved into an already swept window
+are not picked up.
+
+``send_dunning_reminders`` sends one email per client covering all its queued notices.
+"""
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from grid.clients.models import ClientUserProfile
+
+from .models import DunningNotice, Invoice, SweepWatermark
+
+
+OVERDUE_WATERMARK = "overdue-invoices"
+
+
+def sweep_overdue_invoices(now=None):
+    """
+    Queue notices for due invoices that became overdue since the last sweep and return how many.
+    """
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        # Locking the watermark keeps concurrent sweeps from queueing the same window twice
+        watermark = SweepWatermark.objects.select_for_update().filter(name=OVERDUE_WATERMARK).first()
+        lapsed = Invoice.objects.filter(status=Invoice.InvoiceStatus.DUE, due_date__lt=now)
+        if watermark:
+            lapsed = lapsed.filter(due_date__gte=watermark.position)
+
+        notices = [
+            DunningNotice(invoice_id=invoice_id, client_id=client_id, due_date=due_date)
+            for invoice_id, client_id, due_date in lapsed.values_list("pk", "client_id", "due_date")
+        ]
+        DunningNotice.objects.bulk_create(notices, ignore_conflicts=True)
+        SweepWatermark.objects.update_or_create(name=OVERDUE_WATERMARK, defaults={"position": now})
+
+    return len(notices)
+
+
+def reminder_recipients(client):
+    """Send to the billing address, or to the client's admins when there is none"""
+    if client.billing_email:
+        return [client.billing_email]
+    return [profile.user.email for profile in client.admin_profiles]
+
+
+def send_dunning_reminders(now=None):
+    """
+    Send one reminder per client for its queued notices and return the number of emails sent.
+
+    Notices of invoices that were settled since they were queued are dropped, and clients
+    with nobody to email keep their notices queued.
+    """
+    now = now or timezone.now()
+    pending = DunningNotice.objects.filter(sent_at__isnull=True)
+
+    # Settled since they were queued
+    pending.exclude(invoice__status=Invoice.InvoiceStatus.DUE).delete()
+
+    admins = ClientUserProfile.objects.filter(
+        user_type__in=[ClientUserProfile.UserType.SUPERUSER, ClientUserProfile.UserType.ADMIN]
+    ).select_related("user")
+    notices = pending.select_related("invoice__currency", "client").prefetch_related(
+        Prefetch("client__clientuserprofile_set", queryset=admins, to_attr="admin_profiles")
+    )
+
+    by_client = {}
+    for notice in notices.order_by("client_id", "due_date"):
+        by_client.setdefault(notice.client, []).append(notice)
+
+    messages, sent_notices = [], []
+    for client, client_notices in by_client.items():
+        recipients = reminder_recipients(client)
+        if not recipients:
+            continue
+
+        invoices = [notice.invoice for notice in client_notices]
+        context = {
+            "company_name": client.company_name,
+            "invoices": invoices,
+            "invoices_link": f"{settings.FRONTEND_URL}/invoices",
+        }
+        message = EmailMultiAlternatives(
+            subject=f"{len(invoices)} overdue invoice{'s' if len(invoices) > 1 else ''} for {client.company_name}",
+            body="",
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=recipients,
+        )
+        message.attach_alternative(render_to_string("hires/dunning_reminder.html", context), "text/html")
+        messages.append(message)
+        sent_notices.extend(client_notices)
+
+    if messages:
+        # One connection for the whole batch
+        get_connection().send_messages(messages)
+        DunningNotice.objects.filter(pk__in=[notice.pk for notice in sent_notices]).update(sent_at=now)
+
+    return len(messages)
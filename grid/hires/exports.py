@@ -0,0 +1,88 @@
+"""
+Streaming CSV and XLSX exports of invoices, hires and recruiter payments.
+
+Rows are read with a server-side cursor and written as they arrive, so memory use does not
+depend on the number of rows exported.
+"""
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from grid.core.streaming import csv_stream, xlsx_stream
+
+from .rollups import money
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", csv_stream),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", xlsx_stream),
+}
+
+
+def date_value(value):
+    return value.isoformat() if value else None
+
+
+INVOICE_COLUMNS = [
+    ("Invoice", lambda invoice: invoice.invoice_code),
+    ("Status", lambda invoice: invoice.get_status_display()),
+    ("Client", lambda invoice: invoice.client.company_name),
+    ("Customer", lambda invoice: invoice.customer_name),
+    ("Issued", lambda invoice: date_value(invoice.created_at)),
+    ("Due", lambda invoice: date_value(invoice.due_date)),
+    ("Overdue", lambda invoice: "yes" if invoice.overdue else "no"),
+    ("Currency", lambda invoice: invoice.currency.three_letter_code),
+    ("Subtotal", lambda invoice: invoice.subtotal),
+    ("Tax", lambda invoice: invoice.tax_name),
+    ("Tax %", lambda invoice: invoice.tax_percentage),
+    ("Tax amount", lambda invoice: money(invoice.tax_amount)),
+    ("Total", lambda invoice: money(invoice.total)),
+]
+INVOICE_RELATIONS = ["client", "currency"]
+
+HIRE_COLUMNS = [
+    ("Hire", lambda hire: hire.uuid),
+    ("Job", lambda hire: hire.job.title),
+    ("Candidate", lambda hire: f"{hire.candidate.first_name} {hire.candidate.last_name}"),
+    ("Recruiter", lambda hire: f"{hire.recruiter.first_name} {hire.recruiter.last_name}"),
+    ("Payment status", lambda hire: hire.get_payment_status_display()),
+    ("Join date", lambda hire: date_value(hire.join_date)),
+    ("Base salary", lambda hire: hire.base_salary),
+    ("Commission %", lambda hire: hire.commission_percentage),
+    ("Commission", lambda hire: hire.commission),
+    ("Payout", lambda hire: hire.payout),
+]
+HIRE_RELATIONS = ["job", "candidate", "recruiter"]
+
+PAYMENT_COLUMNS = [
+    ("Payment", lambda payment: payment.uuid),
+    ("Hire", lambda payment: payment.hire_id),
+    ("Recruiter", lambda payment: f"{payment.hire.recruiter.first_name} {payment.hire.recruiter.last_name}"),
+    ("Status", lambda payment: payment.get_status_display()),
+    ("Due", lambda payment: date_value(payment.due_on)),
+    ("Currency", lambda payment: payment.currency.three_letter_code),
+    ("Amount", lambda payment: payment.amount),
+    ("% of full", lambda payment: payment.percentage_of_full),
+]
+PAYMENT_RELATIONS = ["hire__recruiter", "currency"]
+
+
+def export_response(queryset, columns, basename, export_format):
+    """
+    Return a ``StreamingHttpResponse`` with ``queryset`` exported as ``export_format``.
+
+    ``columns`` is a list of ``(header, value)`` pairs where ``value`` maps a row to a cell.
+    """
+    content_type, stream = EXPORT_FORMATS[export_format]
+    rows = (
+        [value(instance) for _, value in columns]
+        for instance in queryset.order_by("created_at").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    header = [header for header, _ in columns]
+
+    response = StreamingHttpResponse(stream(header, rows), content_type=content_type)
+    filename = f"{basename}-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,10 +1,17 @@
+from datetime import datetime, time, timedelta
+
 import django_filters
 
-from django.utils.timezone import now
+from django.utils.timezone import make_aware, now
 
 from grid.site_settings.models import Currency
 
-from .models import Invoice
+from .models import AgencyPayoutRollup, ClientRevenueRollup, Hire, Invoice
+
+
+def start_of_day(day):
+    """Midnight at the start of ``day`` in the current time zone"""
+    return make_aware(datetime.combine(day, time.min))
 
 
 class InvoiceFilter(django_filters.FilterSet):
@@ -36,3 +43,50 @@ class InvoiceFilter(django_filters.FilterSet):
             return queryset.filter(status=Invoice.InvoiceStatus.DUE, due_date__lt=now())
         else:  # If overdue is False
             return queryset.exclude(status=Invoice.InvoiceStatus.DUE, due_date__lt=now())
+
+
+class HireFilter(django_filters.FilterSet):
+    payment_status = django_filters.NumberFilter(field_name="payment_status")
+
+    # Filters for join_date range, by calendar day so the end date is inclusive. The bounds are
+    # compared as datetimes rather than casting the column to a date, so the join_date index is used
+    join_date__gte = django_filters.DateFilter(field_name="join_date", method="filter_join_date_from")
+    join_date__lte = django_filters.DateFilter(field_name="join_date", method="filter_join_date_to")
+
+    recruiter = django_filters.UUIDFilter(field_name="recruiter")
+
+    class Meta:
+        model = Hire
+        fields = ["payment_status", "join_date", "recruiter"]
+
+    def filter_join_date_from(self, queryset, name, value):
+        return queryset.filter(**{f"{name}__gte": start_of_day(value)})
+
+    def filter_join_date_to(self, queryset, name, value):
+        return queryset.filter(**{f"{name}__lt": start_of_day(value + timedelta(days=1))})
+
+
+class ClientRevenueRollupFilter(django_filters.FilterSet):
+    # Filters for the reporting month range
+    period__gte = django_filters.DateFilter(field_name="period", lookup_expr="gte")
+    period__lte = django_filters.DateFilter(field_name="period", lookup_expr="lte")
+
+    client = django_filters.UUIDFilter(field_name="client")
+    currency = django_filters.UUIDFilter(field_name="currency")
+
+    class Meta:
+        model = ClientRevenueRollup
+        fields = ["period", "client", "currency"]
+
+
+class AgencyPayoutRollupFilter(django_filters.FilterSet):
+    # Filters for the reporting month range
+    period__gte = django_filters.DateFilter(field_name="period", lookup_expr="gte")
+    period__lte = django_filters.DateFilter(field_name="period", lookup_expr="lte")
+
+    agency = django_filters.UUIDFilter(field_name="agency")
+    currency = django_filters.UUIDFilter(field_name="currency")
+
+    class Meta:
+        model = AgencyPayoutRollup
+        fields = ["period", "agency", "currency"]
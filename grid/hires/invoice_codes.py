@@ -0,0 +1,94 @@
+"""
+Invoice code allocation.
+
+Codes are derived from a database sequence run through a keyed Feistel permutation of
+the 8-character A-Z0-9 code space. Distinct sequence values always map to distinct codes,
+so allocation needs no uniqueness retries, and the codes do not reveal how many invoices
+exist or which code comes next.
+
+The permutation key comes from ``INVOICE_CODE_SECRET``. It must never change once
+invoices have been issued, otherwise new codes can collide with existing ones.
+"""
+
+import hashlib
+import hmac
+import string
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Invoice, InvoiceCodeSequence
+
+
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 8
+
+# The code space is split into two halves of 4 characters each for the Feistel rounds
+HALF_SPACE = len(ALPHABET) ** (CODE_LENGTH // 2)
+CODE_SPACE = HALF_SPACE * HALF_SPACE
+ROUNDS = 6
+
+SEQUENCE_NAME = "hires_invoice_code_seq"
+
+
+def _key():
+    return hmac.new(settings.INVOICE_CODE_SECRET.encode(), b"invoice-code", hashlib.sha256).digest()
+
+
+def _round_function(key, round_number, value):
+    digest = hmac.new(key, f"{round_number}:{value}".encode(), hashlib.sha256).digest()
+    return int.from_bytes(digest[:8], "big") % HALF_SPACE
+
+
+def permute(number, key=None):
+    """Map ``number`` to a unique, unpredictable position in the code space"""
+    key = key or _key()
+    left, right = divmod(number % CODE_SPACE, HALF_SPACE)
+    for round_number in range(ROUNDS):
+        left, right = right, (left + _round_function(key, round_number, right)) % HALF_SPACE
+    return left * HALF_SPACE + right
+
+
+def encode(number):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        number, index = divmod(number, len(ALPHABET))
+        chars.append(ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+def reserve_sequence_values(count):
+    """Reserve ``count`` values from the invoice code sequence in one round trip"""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [SEQUENCE_NAME, count])
+            return [row[0] for row in cursor.fetchall()]
+
+    # Databases without sequences use a locked counter row instead
+    with transaction.atomic():
+        counter, _ = InvoiceCodeSequence.objects.select_for_update().get_or_create(name=SEQUENCE_NAME)
+        start = counter.last_value + 1
+        counter.last_value += count
+        counter.save(update_fields=["last_value"])
+    return list(range(start, start + count))
+
+
+def allocate_invoice_codes(count):
+    """
+    Return ``count`` new invoice codes.
+
+    Codes issued by the allocator never collide with each other. Codes from before the
+    allocator existed were random, so each block is checked against the table once
+    and any clash is skipped.
+    """
+    key = _key()
+    codes = []
+    while len(codes) < count:
+        candidates = [encode(permute(value, key)) for value in reserve_sequence_values(count - len(codes))]
+        taken = set(Invoice.objects.filter(invoice_code__in=candidates).values_list("invoice_code", flat=True))
+        codes += [code for code in candidates if code not in taken]
+    return codes
+
+
+def allocate_invoice_code():
+    return allocate_invoice_codes(1)[0]
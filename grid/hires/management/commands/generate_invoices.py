@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from grid.hires.utils import INVOICE_BATCH_SIZE, generate_invoices_for_hires
+
+
+class Command(BaseCommand):
+    help = "Create invoices for all hires that do not have one yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=INVOICE_BATCH_SIZE, help="Number of invoices written per transaction"
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        result = generate_invoices_for_hires(batch_size=options["batch_size"])
+        seconds = result["seconds"]
+        rate = result["created"] / seconds if seconds else 0
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {result['created']} invoices in {seconds:.2f}s ({rate:.0f} invoices/s)")
+        )
+        if result["skipped"]:
+            self.stdout.write(
+                self.style.WARNING(f"Skipped {len(result['skipped'])} hires whose client has no address:")
+            )
+            for hire_id in result["skipped"]:
+                self.stdout.write(f"  {hire_id}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from grid.hires.payouts import PAYOUT_BATCH_SIZE, generate_payout_schedules
+
+
+class Command(BaseCommand):
+    help = "Bring every hire's recruiter payout schedule in line with the current instalments and share tiers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=PAYOUT_BATCH_SIZE, help="Number of hires written per transaction"
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        try:
+            result = generate_payout_schedules(batch_size=options["batch_size"])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {result['updated']} schedules in {result['seconds']:.2f}s "
+                f"({result['created']} payments created, {result['deleted']} replaced)"
+            )
+        )
+        if result["skipped"]:
+            self.stdout.write(self.style.WARNING(f"Skipped {len(result['skipped'])} hires with no share or currency:"))
+            for hire_id in result["skipped"]:
+                self.stdout.write(f"  {hire_id}")
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from grid.hires.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the client revenue and agency payout rollups from invoices and recruiter payments"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = rebuild_rollups()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {result['clients']} client and {result['agencies']} agency rollups "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        )
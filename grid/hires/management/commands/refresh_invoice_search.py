@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from grid.hires.utils import refresh_invoice_search_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuild invoice search documents, e.g. after clients or candidates were renamed"
+
+    def handle(self, *args, **options):
+        changed = refresh_invoice_search_documents()
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} invoice search documents"))
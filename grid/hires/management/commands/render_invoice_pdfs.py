@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from grid.hires.models import Invoice
+from grid.hires.utils import ensure_invoice_pdfs
+
+
+class Command(BaseCommand):
+    help = "Render PDFs for invoices whose printed fields changed since they were last rendered"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Number of render processes (default: CPUs)")
+        parser.add_argument("--month", help="Only invoices created in this month, as YYYY-MM")
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.select_related("currency")
+
+        if options["month"]:
+            try:
+                year, month = (int(part) for part in options["month"].split("-"))
+            except ValueError:
+                raise CommandError("--month must be given as YYYY-MM")
+            invoices = invoices.filter(created_at__year=year, created_at__month=month)
+
+        started = time.perf_counter()
+        invoices = list(invoices)
+        rendered = ensure_invoice_pdfs(invoices, workers=options["workers"])
+        seconds = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {rendered} of {len(invoices)} invoices in {seconds:.2f}s "
+                f"({rendered / seconds if seconds else 0:.0f} invoices/s)"
+            )
+        )
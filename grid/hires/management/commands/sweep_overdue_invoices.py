@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from grid.hires.dunning import send_dunning_reminders, sweep_overdue_invoices
+
+
+class Command(BaseCommand):
+    help = "Queue reminders for invoices that became overdue since the last run and email them per client"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-send", action="store_true", help="Only queue notices, do not send emails")
+
+    def handle(self, *args, **options):
+        queued = sweep_overdue_invoices()
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} overdue invoices"))
+
+        if not options["no_send"]:
+            sent = send_dunning_reminders()
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} reminder emails"))
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:25
+
+from django.db import migrations, models
+
+
+def create_sequence(apps, schema_editor):
+    # PostgreSQL hands out invoice code numbers from a native sequence; other databases use the counter table
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE SEQUENCE IF NOT EXISTS hires_invoice_code_seq")
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP SEQUENCE IF EXISTS hires_invoice_code_seq")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hires", "0004_invoice_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InvoiceCodeSequence",
+            fields=[
+                ("name", models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ("last_value", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:28
+
+from django.db import migrations, models
+import grid.hires.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hires", "0005_invoice_code_sequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="pdf",
+            field=models.FileField(
+                blank=True, editable=False, max_length=255, null=True, upload_to=grid.hires.models.get_invoice_pdf_path
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hires", "0006_invoice_pdf"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="hire",
+            index=models.Index(fields=["payment_status", "-created_at"], name="hires_hire_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hire",
+            index=models.Index(fields=["recruiter", "-created_at"], name="hires_hire_recruiter_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hire",
+            index=models.Index(fields=["join_date"], name="hires_hire_join_date_idx"),
+        ),
+    ]
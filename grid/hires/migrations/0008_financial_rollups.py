@@ -0,0 +1,90 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("clients", "0013_alter_clientuserprofile_profile_photo"),
+        ("recruiters", "0012_alter_recruiter_agency"),
+        ("site_settings", "0009_state_tax_name_state_tax_percentage"),
+        ("hires", "0007_hire_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClientRevenueRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("period", models.DateField(help_text="First day of the month")),
+                ("invoiced", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("paid", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("overdue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("refunded", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("hire_count", models.PositiveIntegerField(default=0)),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="revenue_rollups", to="clients.client"
+                    ),
+                ),
+                (
+                    "currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="revenue_rollups",
+                        to="site_settings.currency",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-period"],
+            },
+        ),
+        migrations.CreateModel(
+            name="AgencyPayoutRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("period", models.DateField(help_text="First day of the month")),
+                ("payouts_due", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("payouts_paid", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("hire_count", models.PositiveIntegerField(default=0)),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "agency",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payout_rollups",
+                        to="recruiters.agency",
+                    ),
+                ),
+                (
+                    "currency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payout_rollups",
+                        to="site_settings.currency",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-period"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="clientrevenuerollup",
+            constraint=models.UniqueConstraint(
+                fields=("period", "client", "currency"), name="hires_revenue_rollup_uniq"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="agencypayoutrollup",
+            constraint=models.UniqueConstraint(
+                fields=("period", "agency", "currency"), name="hires_payout_rollup_uniq"
+            ),
+        ),
+    ]
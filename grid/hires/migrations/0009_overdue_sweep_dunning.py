@@ -0,0 +1,66 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("clients", "0013_alter_clientuserprofile_profile_photo"),
+        ("hires", "0008_financial_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DunningNotice",
+            fields=[
+                ("uuid", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="created")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="updated")),
+                ("is_active", models.BooleanField(db_index=True, default=True)),
+                ("due_date", models.DateTimeField()),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["due_date"],
+            },
+        ),
+        migrations.CreateModel(
+            name="SweepWatermark",
+            fields=[
+                ("name", models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ("position", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                condition=models.Q(("status", 1)), fields=["due_date"], name="hires_invoice_open_due_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="dunningnotice",
+            name="client",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name="dunning_notices", to="clients.client"
+            ),
+        ),
+        migrations.AddField(
+            model_name="dunningnotice",
+            name="invoice",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name="dunning_notices", to="hires.invoice"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dunningnotice",
+            index=models.Index(
+                condition=models.Q(("sent_at__isnull", True)), fields=["client"], name="hires_dunning_pending_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dunningnotice",
+            constraint=models.UniqueConstraint(fields=("invoice", "due_date"), name="hires_dunning_invoice_due_uniq"),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:42
+
+from itertools import islice
+
+from django.db import migrations, models
+
+from grid.core.trigram import AddTrigramIndex, search_document
+
+
+SEARCH_FIELDS = [
+    "invoice_code",
+    "customer_name",
+    "customer_address",
+    "tax_name",
+    "client__company_name",
+    "client__about",
+    "hire__candidate__first_name",
+    "hire__candidate__last_name",
+]
+
+
+def build_search_documents(apps, schema_editor):
+    Invoice = apps.get_model("hires", "Invoice")
+    rows = Invoice.objects.order_by().values_list("pk", *SEARCH_FIELDS).iterator(chunk_size=1000)
+    while chunk := list(islice(rows, 1000)):
+        Invoice.objects.bulk_update(
+            [Invoice(pk=pk, search_document=search_document(values)) for pk, *values in chunk], ["search_document"]
+        )
+
+
+class Migration(migrations.Migration):
+    # The PostgreSQL index is built concurrently, which cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("hires", "0009_overdue_sweep_dunning"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+        AddTrigramIndex(model_name="invoice", field_name="search_document"),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-19 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("hires", "0010_invoice_search_document"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="agencypayoutrollup",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("agency__isnull", True)),
+                fields=("period", "currency"),
+                name="hires_payout_rollup_noagency_uniq",
+            ),
+        ),
+    ]
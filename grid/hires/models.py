@@ -1,14 +1,13 @@
-import secrets
-import string
-
 from django.db import models
+from django.db.models import Q
 from django.utils.timezone import now
 
 from grid.candidates.models import Candidate
 from grid.clients.models import Client
 from grid.core.models import CoreModel
+from grid.core.trigram import search_document
 from grid.jobs.models import Job
-from grid.recruiters.models import Recruiter
+from grid.recruiters.models import Agency, Recruiter
 from grid.site_settings.models import Currency
 
 
@@ -31,10 +30,45 @@ class Hire(CoreModel):
 
     class Meta:
         ordering = ["-join_date"]
+        indexes = [
+            # Serve the filtered, keyset-paginated hire listing
+            models.Index(fields=["payment_status", "-created_at"], name="hires_hire_status_idx"),
+            models.Index(fields=["recruiter", "-created_at"], name="hires_hire_recruiter_idx"),
+            models.Index(fields=["join_date"], name="hires_hire_join_date_idx"),
+        ]
 
     def __str__(self):
         return f"Hire for {self.candidate} in Job {self.job}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the recruiter and job as loaded, so a save that moves the hire refreshes both leaderboard rows
+        instance._stats_recruiter_id = instance.recruiter_id if "recruiter_id" in field_names else None
+        instance._stats_job_id = instance.job_id if "job_id" in field_names else None
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from grid.recruiters.commission import schedule_commission_shares
+        from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+        loaded = (getattr(self, "_stats_recruiter_id", None), getattr(self, "_stats_job_id", None))
+        recruiter_ids = [loaded[0], self.recruiter_id]
+        schedule_recruiter_stats(recruiter_ids, jobs=[loaded, (self.recruiter_id, self.job_id)])
+        schedule_commission_shares(recruiter_ids)
+        self._stats_recruiter_id, self._stats_job_id = self.recruiter_id, self.job_id
+
+    def delete(self, *args, **kwargs):
+        recruiter_id, job_id = self.recruiter_id, self.job_id
+        result = super().delete(*args, **kwargs)
+        from grid.recruiters.commission import schedule_commission_shares
+        from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+        schedule_recruiter_stats([recruiter_id], jobs=[(recruiter_id, job_id)])
+        schedule_commission_shares([recruiter_id])
+        return result
+
 
 class RecruiterPayment(CoreModel):
     class RecruiterPaymentStatus(models.IntegerChoices):
@@ -53,15 +87,50 @@ class RecruiterPayment(CoreModel):
     class Meta:
         ordering = ["-due_on"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the rollup bucket as loaded, so a save that moves the payment refreshes both
+        instance._rollup_key = (
+            instance.rollup_key() if {"due_on", "hire_id", "currency_id"} <= set(field_names) else None
+        )
+        return instance
+
+    def rollup_key(self):
+        return (self.due_on, self.hire_id, self.currency_id)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .rollups import schedule_payment_rollups
+
+        schedule_payment_rollups([getattr(self, "_rollup_key", None), self.rollup_key()])
+        self._rollup_key = self.rollup_key()
+
+    def delete(self, *args, **kwargs):
+        key = self.rollup_key()
+        result = super().delete(*args, **kwargs)
+        from .rollups import schedule_payment_rollups
+
+        schedule_payment_rollups([key])
+        return result
+
     def __str__(self):
         return f"Payment of {self.amount} for Hire {self.hire}"
 
 
-def generate_unique_code():
-    """Generate cryptographically secure unique code for invoices."""
-    length = 8
-    chars = string.ascii_uppercase + string.digits
-    return "".join(secrets.choice(chars) for _ in range(length))  # Use secrets instead of random
+class InvoiceCodeSequence(models.Model):
+    """Counter backing invoice code allocation on databases without native sequences."""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} at {self.last_value}"
+
+
+def get_invoice_pdf_path(instance, filename):
+    """Generate path for rendered invoice PDFs; the filename is the hash of the rendered content"""
+    return f"invoices/pdf/{instance.uuid}/{filename}"
 
 
 class Invoice(CoreModel):
@@ -85,6 +154,28 @@ class Invoice(CoreModel):
     tax_name = models.CharField(max_length=100, default="GST/HST/VAT")
     tax_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     status = models.SmallIntegerField(choices=InvoiceStatus.choices, default=InvoiceStatus.DUE)
+    pdf = models.FileField(upload_to=get_invoice_pdf_path, max_length=255, null=True, blank=True, editable=False)
+    # Lowercased SEARCH_FIELDS values, one per line, behind a trigram index (see grid.core.trigram)
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    SEARCH_FIELDS = [
+        "invoice_code",
+        "customer_name",
+        "customer_address",
+        "tax_name",
+        "client__company_name",
+        "client__about",
+        "hire__candidate__first_name",
+        "hire__candidate__last_name",
+    ]
+    # The invoice fields the document is built from; saving only other fields leaves it alone
+    SEARCH_ROOTS = {path.split("__")[0] for path in SEARCH_FIELDS}
+
+    class Meta:
+        indexes = [
+            # Only due invoices (InvoiceStatus.DUE) can become overdue, so settled history stays out of the index
+            models.Index(fields=["due_date"], condition=Q(status=1), name="hires_invoice_open_due_idx"),
+        ]
 
     @property
     def subtotal(self):
@@ -106,16 +197,147 @@ class Invoice(CoreModel):
         """Checks if the invoice is overdue."""
         return self.status == self.InvoiceStatus.DUE and self.due_date < now()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the rollup bucket as loaded, so a save that moves the invoice refreshes both
+        instance._rollup_key = (
+            instance.rollup_key() if {"created_at", "client_id", "currency_id"} <= set(field_names) else None
+        )
+        return instance
+
+    def rollup_key(self):
+        return (self.created_at, self.client_id, self.currency_id)
+
+    def build_search_document(self):
+        values = []
+        for path in self.SEARCH_FIELDS:
+            value = self
+            for attribute in path.split("__"):
+                value = getattr(value, attribute)
+            values.append(value)
+        return search_document(values)
+
     def save(self, *args, **kwargs):
         if not self.invoice_code:
-            self.invoice_code = self.generate_unique_code()
-            # Ensure uniqueness by regenerating if necessary
-            while Invoice.objects.filter(invoice_code=self.invoice_code).exists():
-                self.invoice_code = self.generate_unique_code()
+            from .invoice_codes import allocate_invoice_code
+
+            self.invoice_code = allocate_invoice_code()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.search_document = self.build_search_document()
+        elif {self._meta.get_field(name).name for name in update_fields} & self.SEARCH_ROOTS:
+            self.search_document = self.build_search_document()
+            kwargs["update_fields"] = {*update_fields, "search_document"}
         super().save(*args, **kwargs)
+        from .rollups import schedule_invoice_rollups
+
+        schedule_invoice_rollups([getattr(self, "_rollup_key", None), self.rollup_key()])
+        self._rollup_key = self.rollup_key()
+
+    def delete(self, *args, **kwargs):
+        key = self.rollup_key()
+        result = super().delete(*args, **kwargs)
+        from .rollups import schedule_invoice_rollups
 
-    def generate_unique_code(self):
-        return generate_unique_code()
+        schedule_invoice_rollups([key])
+        return result
 
     def __str__(self):
         return f"Invoice {self.invoice_code} for {self.client.company_name}"
+
+
+class ClientRevenueRollup(models.Model):
+    """
+    Invoice totals for one client in one currency over one calendar month.
+
+    Maintained by ``grid.hires.rollups`` whenever an invoice changes, and rebuilt in full
+    by the ``rebuild_financial_rollups`` command. Months follow the invoice creation date.
+    """
+
+    period = models.DateField(help_text="First day of the month")
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="revenue_rollups")
+    currency = models.ForeignKey(Currency, on_delete=models.CASCADE, related_name="revenue_rollups")
+    invoiced = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    overdue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refunded = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    hire_count = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-period"]
+        constraints = [
+            models.UniqueConstraint(fields=["period", "client", "currency"], name="hires_revenue_rollup_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} {self.period:%Y-%m} {self.currency_id}"
+
+
+class AgencyPayoutRollup(models.Model):
+    """
+    Recruiter payout totals for one agency in one currency over one calendar month.
+
+    Maintained like ``ClientRevenueRollup``; months follow the payment due date. Payments of
+    recruiters outside any agency roll up under an empty agency.
+    """
+
+    period = models.DateField(help_text="First day of the month")
+    agency = models.ForeignKey(Agency, on_delete=models.CASCADE, null=True, blank=True, related_name="payout_rollups")
+    currency = models.ForeignKey(Currency, on_delete=models.CASCADE, related_name="payout_rollups")
+    payouts_due = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payouts_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    hire_count = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-period"]
+        constraints = [
+            models.UniqueConstraint(fields=["period", "agency", "currency"], name="hires_payout_rollup_uniq"),
+            # NULLs never collide in the constraint above, so the agency-less rows need their own
+            models.UniqueConstraint(
+                fields=["period", "currency"],
+                condition=Q(agency__isnull=True),
+                name="hires_payout_rollup_noagency_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.agency_id} {self.period:%Y-%m} {self.currency_id}"
+
+
+class SweepWatermark(models.Model):
+    """How far a periodic sweep has progressed, so each run only scans what is new since the last."""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    position = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} at {self.position}"
+
+
+class DunningNotice(CoreModel):
+    """
+    An overdue invoice waiting for, or already covered by, a reminder email to its client.
+
+    Queued by ``grid.hires.dunning.sweep_overdue_invoices``; one notice per invoice and due date,
+    so an invoice whose due date was extended is reminded again when it lapses once more.
+    """
+
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name="dunning_notices")
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="dunning_notices")
+    due_date = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["due_date"]
+        constraints = [
+            models.UniqueConstraint(fields=["invoice", "due_date"], name="hires_dunning_invoice_due_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["client"], condition=Q(sent_at__isnull=True), name="hires_dunning_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"Reminder for invoice {self.invoice_id} due {self.due_date:%Y-%m-%d}"
@@ -0,0 +1,206 @@
+"""
+Recruiter payout schedules.
+
+A hire's payout is its commission times the recruiter's share: the recruiter's own
+``commission_share`` when an admin set it, otherwise the ``RecruiterShare`` tier reached by
+the hire, where the tier of the recruiter's n-th hire within the rolling window is the one
+with the highest ``hires`` threshold not above n (see ``grid.recruiters.commission``). The payout is split into one ``RecruiterPayment`` per ``PayoutInstalment``,
+due ``interval_in_days`` after the join date.
+
+Generation is idempotent and only touches open (pending or due) payments. Instalments that
+were already paid or cancelled are kept as they are and not scheduled again. Changing the
+tier table re-prices the open payments of tier-driven recruiters once the change commits,
+through the ``reprice_open_payouts`` task.
+"""
+
+import time
+
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count,
+    DateTimeField,
+    ExpressionWrapper,
+    OuterRef,
+    Prefetch,
+    Subquery,
+)
+
+from grid.recruiters.commission import counted_hires, load_tiers, tier_percentage
+from grid.site_settings.models import PayoutInstalment
+
+from .models import Hire, RecruiterPayment
+from .rollups import schedule_payment_rollups
+
+
+PAYOUT_BATCH_SIZE = 500
+
+CENT = Decimal("0.01")
+OPEN_STATUSES = [RecruiterPayment.RecruiterPaymentStatus.PENDING, RecruiterPayment.RecruiterPaymentStatus.DUE]
+
+
+def load_instalments():
+    """Return the instalment table ordered by due date; percentages must add up to 100"""
+    instalments = sorted(PayoutInstalment.objects.all(), key=lambda instalment: instalment.interval_in_days or 0)
+    if instalments and sum(instalment.percentage for instalment in instalments) != 100:
+        raise ValueError("Payout instalment percentages must add up to 100.")
+    return instalments
+
+
+def share_percentage(recruiter, hire_number, tiers):
+    """
+    Return the recruiter's share of the commission for their ``hire_number``-th hire, or
+    ``None`` when neither the recruiter nor the tier table defines one.
+
+    ``tiers`` are the ``RecruiterShare`` rows ordered by ``hires``.
+    """
+    if recruiter.commission_share_manual and recruiter.commission_share is not None:
+        return recruiter.commission_share
+    return tier_percentage(hire_number, tiers)
+
+
+def payment_currency(hire):
+    """Pay in the currency of the job's location, falling back to the client's country"""
+    if hire.job.location:
+        return hire.job.location.country.currency
+    country = hire.job.client.country
+    return country.currency if country else None
+
+
+def build_schedule(hire, percentage, currency, instalments):
+    """
+    Return the full schedule of ``hire`` as unsaved payments and its total payout.
+
+    Amounts are rounded to the cent, with the rounding remainder added to the last instalment.
+    Expects the relations loaded by ``with_payout_relations``.
+    """
+    total = (Decimal(str(hire.commission)) * percentage / 100).quantize(CENT, ROUND_HALF_UP)
+    start = hire.join_date or hire.created_at
+
+    payments, scheduled = [], Decimal(0)
+    for index, instalment in enumerate(instalments):
+        if index == len(instalments) - 1:
+            amount = total - scheduled
+        else:
+            amount = (total * instalment.percentage / 100).quantize(CENT, ROUND_HALF_UP)
+        scheduled += amount
+        payments.append(
+            RecruiterPayment(
+                hire=hire,
+                amount=float(amount),
+                due_on=start + timedelta(days=instalment.interval_in_days or 0),
+                currency=currency,
+                percentage_of_full=instalment.percentage,
+            )
+        )
+    return payments, float(total)
+
+
+def with_payout_relations(queryset):
+    """Load everything a schedule is built from alongside the hires"""
+    window = timedelta(days=settings.COMMISSION_SHARE_WINDOW_DAYS)
+    hire_number = (
+        counted_hires()
+        .filter(
+            recruiter=OuterRef("recruiter"),
+            created_at__lte=OuterRef("created_at"),
+            created_at__gt=ExpressionWrapper(OuterRef("created_at") - window, output_field=DateTimeField()),
+        )
+        .order_by()
+        .values("recruiter")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return (
+        queryset.annotate(hire_number=Subquery(hire_number))
+        .select_related("recruiter", "job__location__country__currency", "job__client__country__currency")
+        .prefetch_related(Prefetch("hire_payment", queryset=RecruiterPayment.objects.order_by("due_on")))
+    )
+
+
+def payment_signature(payment):
+    return (payment.due_on, round(payment.amount, 2), payment.currency_id, payment.percentage_of_full)
+
+
+def tier_priced_hires():
+    """Hires with open payments whose share follows the tier table rather than an admin's share"""
+    open_hires = RecruiterPayment.objects.filter(status__in=OPEN_STATUSES).values("hire")
+    return Hire.objects.filter(pk__in=open_hires, recruiter__commission_share_manual=False)
+
+
+def generate_payout_schedules(hires=None, batch_size=PAYOUT_BATCH_SIZE):
+    """
+    Bring the payout schedule of every hire in ``hires`` in line with the current
+    instalments and share tiers.
+
+    Hires are read in chunks with their recruiters, currencies and payments prefetched.
+    Each chunk's stale open payments are replaced with one delete and one ``bulk_create``
+    in a single transaction, and hires whose schedule is already current are left alone.
+    Cancelled and refunded hires are not scheduled; hires with no share or currency are skipped.
+
+    Returns the number of hires ``updated``, the ``created`` and ``deleted`` payment counts,
+    the ``skipped`` hire ids and the ``seconds`` taken.
+    """
+    started = time.perf_counter()
+    instalments = load_instalments()
+    tiers = load_tiers()
+    hires = (hires if hires is not None else Hire.objects.all()).exclude(
+        payment_status__in=[Hire.PaymentStatus.CANCELLED, Hire.PaymentStatus.REFUNDED]
+    )
+    updated, created, deleted, skipped = 0, 0, 0, []
+
+    rows = with_payout_relations(hires).order_by("created_at").iterator(chunk_size=batch_size)
+    while chunk := list(islice(rows, batch_size)):
+        stale, payments, changed_hires = [], [], []
+        for hire in chunk:
+            percentage = share_percentage(hire.recruiter, hire.hire_number, tiers)
+            currency = payment_currency(hire)
+            if percentage is None or currency is None or not instalments:
+                skipped.append(hire.pk)
+                continue
+
+            schedule, total = build_schedule(hire, percentage, currency, instalments)
+            existing = list(hire.hire_payment.all())
+            settled = {
+                (payment.due_on, payment.percentage_of_full)
+                for payment in existing
+                if payment.status not in OPEN_STATUSES
+            }
+            wanted = [payment for payment in schedule if (payment.due_on, payment.percentage_of_full) not in settled]
+            current = [payment for payment in existing if payment.status in OPEN_STATUSES]
+
+            if sorted(map(payment_signature, current)) == sorted(map(payment_signature, wanted)) and (
+                hire.payout == total
+            ):
+                continue
+
+            stale.extend(current)
+            payments.extend(wanted)
+            hire.payout = total
+            changed_hires.append(hire)
+
+        if not changed_hires:
+            continue
+
+        with transaction.atomic():
+            RecruiterPayment.objects.filter(pk__in=[payment.pk for payment in stale]).delete()
+            RecruiterPayment.objects.bulk_create(payments)
+            Hire.objects.bulk_update(changed_hires, ["payout"])
+            # Deletes by queryset and bulk_create skip RecruiterPayment.save
+            schedule_payment_rollups([payment.rollup_key() for payment in [*stale, *payments]])
+
+        updated += len(changed_hires)
+        created += len(payments)
+        deleted += len(stale)
+
+    return {
+        "updated": updated,
+        "created": created,
+        "deleted": deleted,
+        "skipped": skipped,
+        "seconds": time.perf_counter() - started,
+    }
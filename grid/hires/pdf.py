@@ -0,0 +1,122 @@
+"""
+Invoice PDF rendering.
+
+Rendering works on the plain dict built by ``invoice_document`` rather than on model
+instances, so it can run in worker processes without database access. Output is
+byte-for-byte deterministic for the same document, which lets rendered files be cached
+under the hash of their content.
+"""
+
+import hashlib
+import io
+import json
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+
+# Bump when the layout changes so every cached PDF is rendered again
+TEMPLATE_VERSION = 1
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 20 * mm
+LINE_HEIGHT = 5 * mm
+
+
+def format_money(amount, currency):
+    return f"{currency} {amount:,.2f}"
+
+
+def invoice_document(invoice):
+    """Collect everything printed on an invoice; expects ``currency`` to be loaded"""
+    currency = invoice.currency.three_letter_code
+    return {
+        "invoice_code": invoice.invoice_code,
+        "status": invoice.get_status_display(),
+        "issued": invoice.created_at.date().isoformat(),
+        "due": invoice.due_date.date().isoformat(),
+        "customer_name": invoice.customer_name,
+        "customer_address": invoice.customer_address,
+        "product_name": invoice.product_name,
+        "description": invoice.description,
+        "quantity": invoice.quantity,
+        "unit_price": format_money(invoice.unit_price, currency),
+        "subtotal": format_money(invoice.subtotal, currency),
+        "tax_name": invoice.tax_name,
+        "tax_percentage": f"{invoice.tax_percentage:.2f}",
+        "tax_amount": format_money(invoice.tax_amount, currency),
+        "total": format_money(invoice.total, currency),
+    }
+
+
+def document_fingerprint(document):
+    payload = json.dumps([TEMPLATE_VERSION, document], sort_keys=True).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def render_invoice_pdf(document):
+    """Render an invoice document to PDF bytes"""
+    buffer = io.BytesIO()
+    # invariant=1 drops the timestamp and random document id, so equal input gives equal bytes
+    pdf = canvas.Canvas(buffer, pagesize=A4, invariant=1)
+    pdf.setTitle(f"Invoice {document['invoice_code']}")
+
+    top = PAGE_HEIGHT - MARGIN
+    right = PAGE_WIDTH - MARGIN
+
+    pdf.setFont("Helvetica-Bold", 20)
+    pdf.drawString(MARGIN, top, "INVOICE")
+    pdf.setFont("Helvetica", 10)
+    pdf.drawRightString(right, top, f"Invoice no. {document['invoice_code']}")
+    pdf.drawRightString(right, top - LINE_HEIGHT, f"Issued {document['issued']}")
+    pdf.drawRightString(right, top - 2 * LINE_HEIGHT, f"Due {document['due']}")
+    pdf.drawRightString(right, top - 3 * LINE_HEIGHT, f"Status: {document['status']}")
+
+    y = top - 6 * LINE_HEIGHT
+    pdf.setFont("Helvetica-Bold", 10)
+    pdf.drawString(MARGIN, y, "Bill to")
+    pdf.setFont("Helvetica", 10)
+    for line in [document["customer_name"], *document["customer_address"].splitlines()]:
+        y -= LINE_HEIGHT
+        pdf.drawString(MARGIN, y, line)
+
+    y -= 3 * LINE_HEIGHT
+    columns = (MARGIN, MARGIN + 110 * mm, MARGIN + 130 * mm)
+    pdf.setFont("Helvetica-Bold", 10)
+    pdf.drawString(columns[0], y, "Item")
+    pdf.drawRightString(columns[1], y, "Qty")
+    pdf.drawRightString(columns[2], y, "Unit price")
+    pdf.drawRightString(right, y, "Amount")
+    pdf.line(MARGIN, y - 2 * mm, right, y - 2 * mm)
+
+    y -= 2 * LINE_HEIGHT
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(columns[0], y, document["product_name"])
+    pdf.drawRightString(columns[1], y, str(document["quantity"]))
+    pdf.drawRightString(columns[2], y, document["unit_price"])
+    pdf.drawRightString(right, y, document["subtotal"])
+    y -= LINE_HEIGHT
+    pdf.setFont("Helvetica-Oblique", 9)
+    pdf.drawString(columns[0], y, document["description"])
+
+    y -= 3 * LINE_HEIGHT
+    totals = [
+        ("Subtotal", document["subtotal"]),
+        (f"{document['tax_name']} ({document['tax_percentage']}%)", document["tax_amount"]),
+    ]
+    pdf.setFont("Helvetica", 10)
+    for label, amount in totals:
+        pdf.drawRightString(columns[2], y, label)
+        pdf.drawRightString(right, y, amount)
+        y -= LINE_HEIGHT
+
+    pdf.line(columns[1], y + 2 * mm, right, y + 2 * mm)
+    y -= LINE_HEIGHT / 2
+    pdf.setFont("Helvetica-Bold", 11)
+    pdf.drawRightString(columns[2], y, "Total")
+    pdf.drawRightString(right, y, document["total"])
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
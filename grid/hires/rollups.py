@@ -0,0 +1,227 @@
+"""
+Materialized revenue and payout rollups.
+
+Reports read ``ClientRevenueRollup`` and ``AgencyPayoutRollup`` instead of aggregating
+invoices and payments on every request. Saving or deleting an invoice or a recruiter payment
+schedules a refresh of the buckets it touched for when the transaction commits. A refresh
+aggregates its bucket again from the source rows rather than applying a delta, so concurrent
+writers cannot make the totals drift.
+
+Writes that bypass ``save`` (queryset ``update``, cascading deletes, a recruiter changing
+agency) and invoices becoming overdue with the passing of time are caught up by
+``rebuild_rollups``, which the ``rebuild_financial_rollups`` task runs nightly from
+``CELERY_BEAT_SCHEDULE`` and the command of the same name runs by hand.
+"""
+
+from datetime import datetime, time
+from decimal import Decimal
+from functools import partial
+
+from django.db import transaction
+from django.db.models import (
+    Count,
+    DateField,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Q,
+    Sum,
+)
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from grid.recruiters.dashboard import invalidate_agency_dashboards
+from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+from .models import (
+    AgencyPayoutRollup,
+    ClientRevenueRollup,
+    Hire,
+    Invoice,
+    RecruiterPayment,
+)
+
+
+CENT = Decimal("0.01")
+
+
+def month_of(value):
+    """Return the first day of the month ``value`` falls in, in the current time zone"""
+    return timezone.localdate(value).replace(day=1)
+
+
+def month_bounds(period):
+    start = timezone.make_aware(datetime.combine(period, time.min))
+    following = (period.replace(day=28) + timezone.timedelta(days=4)).replace(day=1)
+    return start, timezone.make_aware(datetime.combine(following, time.min))
+
+
+def money(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def invoice_aggregates(now):
+    total = ExpressionWrapper(
+        F("quantity") * F("unit_price") * (100 + F("tax_percentage")) / 100,
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    statuses = Invoice.InvoiceStatus
+    return {
+        "invoiced": Sum(total, filter=~Q(status=statuses.VOID)),
+        "paid": Sum(total, filter=Q(status=statuses.PAID)),
+        "overdue": Sum(total, filter=Q(status=statuses.DUE, due_date__lt=now)),
+        "refunded": Sum(total, filter=Q(status=statuses.REFUNDED)),
+        "hire_count": Count("hire", filter=~Q(status=statuses.VOID)),
+    }
+
+
+def payment_aggregates():
+    statuses = RecruiterPayment.RecruiterPaymentStatus
+    return {
+        "payouts_due": Sum("amount", filter=Q(status__in=[statuses.PENDING, statuses.DUE])),
+        "payouts_paid": Sum("amount", filter=Q(status=statuses.PAID)),
+        "hire_count": Count("hire", distinct=True, filter=~Q(status=statuses.CANCELLED)),
+    }
+
+
+def client_rollup_values(totals):
+    return {
+        "invoiced": money(totals["invoiced"]),
+        "paid": money(totals["paid"]),
+        "overdue": money(totals["overdue"]),
+        "refunded": money(totals["refunded"]),
+        "hire_count": totals["hire_count"],
+    }
+
+
+def agency_rollup_values(totals):
+    return {
+        "payouts_due": money(totals["payouts_due"]),
+        "payouts_paid": money(totals["payouts_paid"]),
+        "hire_count": totals["hire_count"],
+    }
+
+
+def refresh_client_rollups(buckets, now=None):
+    """Recompute the ``(period, client_id, currency_id)`` buckets from their invoices"""
+    aggregates = invoice_aggregates(now or timezone.now())
+    for period, client_id, currency_id in buckets:
+        start, end = month_bounds(period)
+        totals = Invoice.objects.filter(
+            client_id=client_id, currency_id=currency_id, created_at__gte=start, created_at__lt=end
+        ).aggregate(rows=Count("pk"), **aggregates)
+
+        bucket = {"period": period, "client_id": client_id, "currency_id": currency_id}
+        if totals["rows"]:
+            ClientRevenueRollup.objects.update_or_create(**bucket, defaults=client_rollup_values(totals))
+        else:
+            ClientRevenueRollup.objects.filter(**bucket).delete()
+
+
+def refresh_agency_rollups(buckets):
+    """Recompute the ``(period, agency_id, currency_id)`` buckets from their recruiter payments"""
+    aggregates = payment_aggregates()
+    for period, agency_id, currency_id in buckets:
+        start, end = month_bounds(period)
+        totals = RecruiterPayment.objects.filter(
+            hire__recruiter__agency_id=agency_id, currency_id=currency_id, due_on__gte=start, due_on__lt=end
+        ).aggregate(rows=Count("pk"), **aggregates)
+
+        bucket = {"period": period, "agency_id": agency_id, "currency_id": currency_id}
+        if totals["rows"]:
+            AgencyPayoutRollup.objects.update_or_create(**bucket, defaults=agency_rollup_values(totals))
+        else:
+            AgencyPayoutRollup.objects.filter(**bucket).delete()
+    invalidate_agency_dashboards(agency_id for _, agency_id, _ in buckets)
+
+
+def schedule_invoice_rollups(keys):
+    """
+    Refresh the rollups of the given ``Invoice.rollup_key`` values once the current
+    transaction commits. ``None`` keys are ignored.
+    """
+    buckets = {
+        (month_of(created_at), client_id, currency_id) for created_at, client_id, currency_id in filter(None, keys)
+    }
+    if buckets:
+        transaction.on_commit(partial(refresh_client_rollups, buckets))
+
+
+def schedule_payment_rollups(keys):
+    """
+    Refresh the rollups of the given ``RecruiterPayment.rollup_key`` values once the current
+    transaction commits. ``None`` keys are ignored.
+    """
+    keys = [key for key in keys if key is not None]
+    if not keys:
+        return
+
+    # Resolve recruiters and agencies now, while the hires still exist
+    recruiters, agencies = {}, {}
+    for hire_id, recruiter_id, agency_id in Hire.objects.filter(pk__in={hire_id for _, hire_id, _ in keys}).values_list(
+        "pk", "recruiter", "recruiter__agency"
+    ):
+        recruiters[hire_id], agencies[hire_id] = recruiter_id, agency_id
+    buckets = {
+        (month_of(due_on), agencies[hire_id], currency_id)
+        for due_on, hire_id, currency_id in keys
+        if hire_id in agencies
+    }
+    if buckets:
+        transaction.on_commit(partial(refresh_agency_rollups, buckets))
+    # Payouts are the commission on the leaderboard
+    schedule_recruiter_stats(recruiters.values())
+
+
+def rebuild_rollups(now=None):
+    """
+    Recompute every rollup from scratch with one grouped query per table.
+
+    Returns the number of ``clients`` and ``agencies`` rollup rows written.
+    """
+    month = TruncMonth("created_at", output_field=DateField())
+    client_rows = (
+        Invoice.objects.order_by()
+        .annotate(period=month)
+        .values("period", "client_id", "currency_id")
+        .annotate(**invoice_aggregates(now or timezone.now()))
+    )
+    month = TruncMonth("due_on", output_field=DateField())
+    agency_rows = (
+        RecruiterPayment.objects.order_by()
+        .annotate(period=month, agency_id=F("hire__recruiter__agency"))
+        .values("period", "agency_id", "currency_id")
+        .annotate(**payment_aggregates())
+    )
+
+    with transaction.atomic():
+        ClientRevenueRollup.objects.all().delete()
+        AgencyPayoutRollup.objects.all().delete()
+        clients = ClientRevenueRollup.objects.bulk_create(
+            [
+                ClientRevenueRollup(
+                    period=row["period"],
+                    client_id=row["client_id"],
+                    currency_id=row["currency_id"],
+                    **client_rollup_values(row),
+                )
+                for row in client_rows
+            ],
+            batch_size=1000,
+        )
+        agencies = AgencyPayoutRollup.objects.bulk_create(
+            [
+                AgencyPayoutRollup(
+                    period=row["period"],
+                    agency_id=row["agency_id"],
+                    currency_id=row["currency_id"],
+                    **agency_rollup_values(row),
+                )
+                for row in agency_rows
+            ],
+            batch_size=1000,
+        )
+
+        invalidate_agency_dashboards(row.agency_id for row in agencies)
+
+    return {"clients": len(clients), "agencies": len(agencies)}
@@ -1,6 +1,12 @@
 from rest_framework import serializers
 
-from grid.hires.models import Hire, Invoice, RecruiterPayment
+from grid.hires.models import (
+    AgencyPayoutRollup,
+    ClientRevenueRollup,
+    Hire,
+    Invoice,
+    RecruiterPayment,
+)
 
 
 class RecruiterPaymentSerializer(serializers.ModelSerializer):
@@ -29,8 +35,8 @@ class HireSerializer(serializers.ModelSerializer):
         ]
 
     def get_recruiter_payments(self, obj):
-        payments = RecruiterPayment.objects.filter(hire=obj)
-        return RecruiterPaymentSerializer(payments, many=True).data
+        # Served from the prefetch made by HireViewSet when listing
+        return RecruiterPaymentSerializer(obj.hire_payment.all(), many=True).data
 
 
 class InvoiceSerializer(serializers.ModelSerializer):
@@ -64,3 +70,57 @@ class InvoiceSerializer(serializers.ModelSerializer):
     def get_overdue(self, obj):
         """Fetches the overdue status from the property."""
         return obj.overdue
+
+
+class ClientRevenueRollupSerializer(serializers.ModelSerializer):
+    client_name = serializers.CharField(source="client.company_name", read_only=True)
+    currency_code = serializers.CharField(source="currency.three_letter_code", read_only=True)
+
+    class Meta:
+        model = ClientRevenueRollup
+        fields = [
+            "period",
+            "client",
+            "client_name",
+            "currency",
+            "currency_code",
+            "invoiced",
+            "paid",
+            "overdue",
+            "refunded",
+            "hire_count",
+            "refreshed_at",
+        ]
+
+
+class AgencyPayoutRollupSerializer(serializers.ModelSerializer):
+    agency_name = serializers.CharField(source="agency", read_only=True, allow_null=True)
+    currency_code = serializers.CharField(source="currency.three_letter_code", read_only=True)
+
+    class Meta:
+        model = AgencyPayoutRollup
+        fields = [
+            "period",
+            "agency",
+            "agency_name",
+            "currency",
+            "currency_code",
+            "payouts_due",
+            "payouts_paid",
+            "hire_count",
+            "refreshed_at",
+        ]
+
+
+class RevenueTotalsSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    invoiced = serializers.DecimalField(max_digits=16, decimal_places=2)
+    paid = serializers.DecimalField(max_digits=16, decimal_places=2)
+    overdue = serializers.DecimalField(max_digits=16, decimal_places=2)
+    refunded = serializers.DecimalField(max_digits=16, decimal_places=2)
+
+
+class PayoutTotalsSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    payouts_due = serializers.DecimalField(max_digits=16, decimal_places=2)
+    payouts_paid = serializers.DecimalField(max_digits=16, decimal_places=2)
@@ -7,7 +7,7 @@ invoice_list_docs = {
         openapi.Parameter(
             "search",
             openapi.IN_QUERY,
-            description="Search (Use quotes for exact search) by client company name, about, candidate first or last name, or tax name.",
+            description="Search (Use quotes for exact search) by invoice code, customer name or address, client company name, about, candidate first or last name, or tax name. Results are ordered by relevance.",
             type=openapi.TYPE_STRING,
         ),
         openapi.Parameter(
@@ -0,0 +1,42 @@
+from celery import shared_task
+from django.db.models import Q
+
+from grid.hires.dunning import send_dunning_reminders, sweep_overdue_invoices
+from grid.hires.models import Invoice
+from grid.hires.payouts import generate_payout_schedules, tier_priced_hires
+from grid.hires.rollups import rebuild_rollups
+from grid.hires.utils import ensure_invoice_pdfs, refresh_invoice_search_documents
+
+
+@shared_task
+def render_invoice_pdfs(invoice_ids):
+    """Render the PDFs of ``invoice_ids`` that are missing or out of date"""
+    invoices = list(Invoice.objects.select_related("currency").filter(pk__in=invoice_ids))
+    # Celery's prefork workers cannot start a process pool of their own
+    return ensure_invoice_pdfs(invoices, workers=1)
+
+
+@shared_task
+def refresh_invoice_search(client_ids=(), candidate_ids=()):
+    """Rebuild the search documents of the invoices of renamed clients and candidates"""
+    invoices = Invoice.objects.filter(Q(client__in=client_ids) | Q(hire__candidate__in=candidate_ids))
+    return refresh_invoice_search_documents(invoices)
+
+
+@shared_task
+def send_overdue_reminders():
+    """Daily: queue the invoices that became overdue since the last sweep and email each client its reminders"""
+    return {"queued": sweep_overdue_invoices(), "sent": send_dunning_reminders()}
+
+
+@shared_task
+def rebuild_financial_rollups():
+    """Nightly: count the invoices that became overdue and catch up writes that bypassed the hooks"""
+    return rebuild_rollups()
+
+
+@shared_task
+def reprice_open_payouts():
+    """Bring the open payments of tier-driven recruiters in line with the share tiers after they change"""
+    result = generate_payout_schedules(tier_priced_hires())
+    return {**result, "skipped": len(result["skipped"])}
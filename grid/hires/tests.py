@@ -1,4 +1,988 @@
-from django.test import TestCase
+import csv
+import io
+import shutil
+import tempfile
+import zipfile
 
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from grid.admins.models import AdminUserProfile
+from grid.candidates.models import Candidate
+from grid.clients.models import Address, Client, ClientUserProfile
+from grid.core.trigram import similarity
+from grid.hires.dunning import send_dunning_reminders, sweep_overdue_invoices
+from grid.hires.filters import HireFilter
+from grid.hires.invoice_codes import (
+    ALPHABET,
+    CODE_LENGTH,
+    allocate_invoice_codes,
+    encode,
+    permute,
+    reserve_sequence_values,
+)
+from grid.hires.models import (
+    AgencyPayoutRollup,
+    ClientRevenueRollup,
+    DunningNotice,
+    Hire,
+    Invoice,
+    RecruiterPayment,
+)
+from grid.hires.payouts import generate_payout_schedules
+from grid.hires.pdf import invoice_document, render_invoice_pdf
+from grid.hires.rollups import rebuild_rollups
+from grid.hires.tasks import rebuild_financial_rollups, send_overdue_reminders
+from grid.hires.utils import (
+    create_invoice_for_hire,
+    ensure_invoice_pdfs,
+    generate_invoices_for_hires,
+    refresh_invoice_search_documents,
+)
+from grid.hires.views import (
+    FinancialReportViewSet,
+    HireViewSet,
+    InvoiceViewSet,
+    RecruiterPaymentViewSet,
+)
+from grid.jobs.models import Job
+from grid.recruiters.models import Agency, Recruiter
+from grid.site_settings.models import (
+    Country,
+    Currency,
+    ExchangeRate,
+    PayoutInstalment,
+    RecruiterShare,
+    State,
+)
+from grid.users.choices import Roles
+
+
+User = get_user_model()
+
+
+class HiresTestMixin:
+    """Shared fixtures for hires tests"""
+
+    def create_fixtures(self):
+        self.currency = Currency.objects.create(
+            name="US Dollar",
+            three_letter_code="USD",
+            symbol="$",
+            job_posting_fee=0,
+            extra_role_fee=0,
+            top_job_fee=0,
+            salary_min=0,
+            commission_min=0,
+        )
+        self.country = Country.objects.create(
+            name="United States", two_letter_code="US", three_letter_code="USA", currency=self.currency
+        )
+        self.state = State.objects.create(
+            name="California", two_letter_code="CA", country=self.country, tax_name="Sales Tax", tax_percentage=7
+        )
+        self.client_company = Client.objects.create(company_name="Test Company", country=self.country)
+        self.address = Address.objects.create(
+            address1="1 Market St",
+            city="San Francisco",
+            state=self.state,
+            country=self.country,
+            client=self.client_company,
+            primary=True,
+        )
+        self.job = Job.objects.create(
+            title="Engineer",
+            salary_min=100000,
+            min_book_of_business=0,
+            client=self.client_company,
+            location=self.address,
+        )
+        recruiter_user = User.objects.create_user(
+            email="recruiter@example.com", password="testpass123", role=Roles.RECRUITER
+        )
+        self.recruiter = Recruiter.objects.create(
+            user=recruiter_user, first_name="Test", last_name="Recruiter", linkedin="https://linkedin.com/in/test"
+        )
+
+    def create_hire(self, index=0, **kwargs):
+        candidate = Candidate.objects.create(first_name="Test", last_name=f"Candidate {index}")
+        defaults = {
+            "job": self.job,
+            "recruiter": self.recruiter,
+            "candidate": candidate,
+            "base_salary": 100000,
+            "payout": 10000,
+            "commission": 20000,
+            "commission_percentage": 20,
+            "join_date": timezone.now(),
+        }
+        return Hire.objects.create(**{**defaults, **kwargs})
+
+    def create_invoice(self, hire, **kwargs):
+        defaults = {
+            "client": self.client_company,
+            "hire": hire,
+            "currency": self.currency,
+            "customer_name": self.client_company.company_name,
+            "customer_address": self.address.full_address,
+            "due_date": timezone.now() + timedelta(days=7),
+            "unit_price": hire.commission,
+        }
+        return Invoice.objects.create(**{**defaults, **kwargs})
+
+
+class InvoiceCodeTests(HiresTestMixin, TestCase):
+    """Test cases for the invoice code allocator"""
+
+    def test_permutation_is_collision_free(self):
+        """Test that distinct sequence values never map to the same code"""
+        codes = {encode(permute(value)) for value in range(1, 5001)}
+
+        self.assertEqual(len(codes), 5000)
+
+    def test_codes_use_the_invoice_alphabet(self):
+        """Test that codes are 8 characters from A-Z and 0-9"""
+        for code in allocate_invoice_codes(50):
+            self.assertEqual(len(code), CODE_LENGTH)
+            self.assertTrue(set(code) <= set(ALPHABET))
+
+    def test_block_allocation_is_unique(self):
+        """Test that codes reserved across several calls are all distinct"""
+        codes = allocate_invoice_codes(100) + allocate_invoice_codes(100)
+
+        self.assertEqual(len(set(codes)), 200)
+
+    def test_existing_codes_are_skipped(self):
+        """Test that a code already used by a legacy invoice is never handed out again"""
+        self.create_fixtures()
+        next_value = reserve_sequence_values(1)[0] + 1
+        legacy_code = encode(permute(next_value))
+        self.create_invoice(self.create_hire(), invoice_code=legacy_code)
+
+        codes = allocate_invoice_codes(3)
+
+        self.assertEqual(len(codes), 3)
+        self.assertNotIn(legacy_code, codes)
+
+    def test_invoice_save_assigns_code(self):
+        """Test that saving an invoice without a code allocates one"""
+        self.create_fixtures()
+
+        invoice = self.create_invoice(self.create_hire())
+
+        self.assertEqual(len(invoice.invoice_code), CODE_LENGTH)
+
+
+class GenerateInvoicesTests(HiresTestMixin, TestCase):
+    """Test cases for batch invoice generation"""
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def test_invoices_created_for_uninvoiced_hires(self):
+        """Test that every hire without an invoice gets one with the state tax and job currency"""
+        hires = [self.create_hire(index) for index in range(5)]
+        self.create_invoice(hires[0])
+
+        result = generate_invoices_for_hires(batch_size=2)
+
+        self.assertEqual(result["created"], 4)
+        self.assertEqual(result["skipped"], [])
+        self.assertEqual(Invoice.objects.count(), 5)
+        invoice = Invoice.objects.get(hire=hires[1])
+        self.assertEqual(invoice.tax_name, "Sales Tax")
+        self.assertEqual(invoice.tax_percentage, 7)
+        self.assertEqual(invoice.currency, self.currency)
+        self.assertEqual(len({invoice.invoice_code for invoice in Invoice.objects.all()}), 5)
+
+    def test_hires_without_client_address_are_skipped(self):
+        """Test that hires whose client has no address are reported instead of failing the run"""
+        hire = self.create_hire()
+        self.address.delete()
+
+        result = generate_invoices_for_hires()
+
+        self.assertEqual(result["created"], 0)
+        self.assertEqual(result["skipped"], [hire.pk])
+
+    def test_query_count_does_not_grow_with_hires(self):
+        """Test that related data is loaded in bulk rather than per hire"""
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                generate_invoices_for_hires()
+            return len(context)
+
+        # Create the code counter up front so both runs do the same work
+        allocate_invoice_codes(1)
+        for index in range(3):
+            self.create_hire(index)
+        baseline = count_queries()
+
+        Invoice.objects.all().delete()
+        for index in range(3, 12):
+            self.create_hire(index)
+
+        self.assertEqual(count_queries(), baseline)
+
+    def test_create_invoice_for_hire(self):
+        """Test creating the invoice of a single hire"""
+        hire = self.create_hire()
+
+        invoice = create_invoice_for_hire(hire.pk)
+
+        self.assertEqual(invoice.hire, hire)
+        self.assertEqual(invoice.customer_name, "Test Company")
+
+
+class InvoicePdfTests(HiresTestMixin, TestCase):
+    """Test cases for invoice PDF rendering"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.create_fixtures()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def load_invoices(self):
+        return list(Invoice.objects.select_related("currency").order_by("invoice_code"))
+
+    def test_rendering_is_deterministic(self):
+        """Test that the same invoice always renders to the same bytes"""
+        self.create_invoice(self.create_hire())
+        document = invoice_document(self.load_invoices()[0])
+
+        self.assertTrue(render_invoice_pdf(document).startswith(b"%PDF"))
+        self.assertEqual(render_invoice_pdf(document), render_invoice_pdf(document))
+
+    def test_pdf_is_only_rendered_again_after_a_change(self):
+        """Test that cached PDFs are reused until the invoice changes"""
+        self.create_invoice(self.create_hire())
+        self.assertEqual(ensure_invoice_pdfs(self.load_invoices()), 1)
+        first_name = Invoice.objects.get().pdf.name
+
+        self.assertEqual(ensure_invoice_pdfs(self.load_invoices()), 0)
+
+        Invoice.objects.update(status=Invoice.InvoiceStatus.PAID)
+        self.assertEqual(ensure_invoice_pdfs(self.load_invoices()), 1)
+        invoice = Invoice.objects.get()
+        self.assertNotEqual(invoice.pdf.name, first_name)
+        self.assertTrue(invoice.pdf.storage.exists(invoice.pdf.name))
+        self.assertFalse(invoice.pdf.storage.exists(first_name))
+
+    @patch("grid.hires.utils.PDF_POOL_THRESHOLD", 2)
+    def test_bulk_rendering_in_process_pool(self):
+        """Test that large batches are rendered by worker processes"""
+        for index in range(3):
+            self.create_invoice(self.create_hire(index))
+
+        self.assertEqual(ensure_invoice_pdfs(self.load_invoices(), workers=2), 3)
+        self.assertEqual(Invoice.objects.filter(pdf__startswith="invoices/pdf/").count(), 3)
+
+    def pdf_bundle(self):
+        admin = User.objects.filter(email="admin@example.com").first()
+        if admin is None:
+            admin = User.objects.create_user(email="admin@example.com", password="testpass123", role=Roles.ADMIN)
+            AdminUserProfile.objects.create(
+                user=admin, first_name="Test", last_name="Admin", user_type=AdminUserProfile.UserType.ACCOUNTANT
+            )
+        request = APIRequestFactory().get("/api/hires/invoices/pdf-bundle/")
+        force_authenticate(request, user=admin)
+        return InvoiceViewSet.as_view({"get": "pdf_bundle"})(request)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_pdf_bundle_streams_zip(self):
+        """Test that the bundle endpoint renders stale PDFs in the background and zips the stored ones"""
+        invoices = [self.create_invoice(self.create_hire(index)) for index in range(2)]
+
+        response = self.pdf_bundle()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["pending"], 2)
+        self.assertEqual(Invoice.objects.exclude(pdf="").count(), 2)
+
+        Invoice.objects.filter(pk=invoices[0].pk).update(status=Invoice.InvoiceStatus.PAID)
+        with patch("grid.hires.views.render_invoice_pdfs.delay") as delay:
+            response = self.pdf_bundle()
+        delay.assert_called_once_with([str(invoices[0].pk)])
+
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertEqual(response["X-Invoices-Pending"], "1")
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        invoices[1].refresh_from_db()
+        self.assertEqual(archive.namelist(), [f"invoice-{invoices[1].invoice_code}.pdf"])
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b"%PDF"))
+
+    @patch("grid.hires.views.MAX_PDF_BUNDLE_SIZE", 1)
+    def test_pdf_bundle_is_capped(self):
+        """Test that a bundle of more invoices than allowed is refused"""
+        for index in range(2):
+            self.create_invoice(self.create_hire(index))
+
+        self.assertEqual(self.pdf_bundle().status_code, 400)
+
+
+class HireListTests(HiresTestMixin, TestCase):
+    """Test cases for the hire listing"""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.admin = User.objects.create_user(email="admin@example.com", password="testpass123", role=Roles.ADMIN)
+
+    def list_hires(self, user, **params):
+        request = APIRequestFactory().get("/api/hires/hires/", params)
+        force_authenticate(request, user=user)
+        return HireViewSet.as_view({"get": "list"})(request)
+
+    def create_payment(self, hire):
+        return RecruiterPayment.objects.create(
+            amount=5000, due_on=timezone.now(), currency=self.currency, hire=hire, percentage_of_full=50
+        )
+
+    def test_listing_is_paginated(self):
+        """Test that hires are returned a page at a time with a cursor to the next page"""
+        for index in range(3):
+            self.create_hire(index)
+
+        response = self.list_hires(self.admin, page_size=2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_query_count_does_not_grow_with_hires(self):
+        """Test that recruiter payments are prefetched rather than queried per hire"""
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                self.list_hires(self.admin)
+            return len(context)
+
+        self.create_payment(self.create_hire(0))
+        baseline = count_queries()
+
+        for index in range(1, 6):
+            self.create_payment(self.create_hire(index))
+
+        self.assertEqual(count_queries(), baseline)
+
+    def test_filters(self):
+        """Test filtering by payment status, join date range and recruiter"""
+        now = timezone.now()
+        recent = self.create_hire(0, payment_status=Hire.PaymentStatus.PAID, join_date=now)
+        self.create_hire(1, join_date=now - timedelta(days=60))
+
+        response = self.list_hires(self.admin, payment_status=Hire.PaymentStatus.PAID)
+        self.assertEqual([hire["uuid"] for hire in response.data["results"]], [str(recent.pk)])
+
+        response = self.list_hires(self.admin, join_date__gte=(now - timedelta(days=30)).date().isoformat())
+        self.assertEqual([hire["uuid"] for hire in response.data["results"]], [str(recent.pk)])
+
+        response = self.list_hires(self.admin, recruiter=self.recruiter.pk)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        # The range is by calendar day, so a hire that joined later today is within it
+        response = self.list_hires(self.admin, join_date__lte=timezone.localdate(now).isoformat())
+        self.assertEqual(len(response.data["results"]), 2)
+
+        # The column is compared with datetime bounds, not cast to a date, so its index can be used
+        filtered = HireFilter({"join_date__gte": "2024-01-01", "join_date__lte": "2024-01-31"}, queryset=Hire.objects)
+        sql = str(filtered.qs.query)
+        self.assertIn('"join_date" >= 2024-01-01 00:00:00', sql)
+        self.assertIn('"join_date" < 2024-02-01 00:00:00', sql)
+
+    def test_agency_superuser_sees_agency_hires(self):
+        """Test that an agency superuser sees the hires of every recruiter in the agency"""
+        agency = Agency.objects.create(make_payable_to="Test Agency", is_individual=False)
+        self.recruiter.agency = agency
+        self.recruiter.save()
+        superuser = User.objects.create_user(email="owner@example.com", password="testpass123", role=Roles.RECRUITER)
+        Recruiter.objects.create(
+            user=superuser,
+            first_name="Agency",
+            last_name="Owner",
+            linkedin="https://linkedin.com/in/owner",
+            agency=agency,
+            superuser=True,
+        )
+        hire = self.create_hire()
+
+        response = self.list_hires(superuser)
+
+        self.assertEqual([item["uuid"] for item in response.data["results"]], [str(hire.pk)])
+
+    def test_superuser_without_agency_sees_own_hires(self):
+        """Test that a superuser outside any agency sees only their own hires, not every agency-less hire"""
+        superuser = User.objects.create_user(email="owner@example.com", password="testpass123", role=Roles.RECRUITER)
+        owner = Recruiter.objects.create(
+            user=superuser,
+            first_name="Solo",
+            last_name="Owner",
+            linkedin="https://linkedin.com/in/owner",
+            superuser=True,
+        )
+        self.create_hire(0)
+        hire = self.create_hire(1, recruiter=owner)
+
+        response = self.list_hires(superuser)
+
+        self.assertEqual([item["uuid"] for item in response.data["results"]], [str(hire.pk)])
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class FinancialRollupTests(HiresTestMixin, TestCase):
+    """Test cases for the revenue and payout rollups"""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.agency = Agency.objects.create(make_payable_to="Test Agency", is_individual=False)
+        self.recruiter.agency = self.agency
+        self.recruiter.save()
+
+    def rollup_rows(self):
+        clients = ClientRevenueRollup.objects.values_list("invoiced", "paid", "overdue", "refunded", "hire_count")
+        agencies = AgencyPayoutRollup.objects.values_list("agency", "payouts_due", "payouts_paid", "hire_count")
+        return sorted(clients), sorted(agencies)
+
+    def test_invoice_changes_update_client_rollup(self):
+        """Test that creating and paying invoices keeps the client rollup current"""
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.create_invoice(self.create_hire(0), tax_percentage=7)
+            self.create_invoice(self.create_hire(1), tax_percentage=7, due_date=timezone.now() - timedelta(days=1))
+
+        rollup = ClientRevenueRollup.objects.get()
+        self.assertEqual(rollup.period, timezone.localdate().replace(day=1))
+        self.assertEqual(rollup.invoiced, Decimal("42800.00"))
+        self.assertEqual(rollup.overdue, Decimal("21400.00"))
+        self.assertEqual(rollup.hire_count, 2)
+
+        first = Invoice.objects.get(pk=first.pk)
+        first.status = Invoice.InvoiceStatus.PAID
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+
+        self.assertEqual(ClientRevenueRollup.objects.get().paid, Decimal("21400.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.get(pk=first.pk).delete()
+            Invoice.objects.get().delete()
+
+        self.assertFalse(ClientRevenueRollup.objects.exists())
+
+    def test_payment_changes_update_agency_rollup(self):
+        """Test that recruiter payments roll up under the agency of the hire's recruiter"""
+        hire = self.create_hire()
+        with self.captureOnCommitCallbacks(execute=True):
+            for status in [
+                RecruiterPayment.RecruiterPaymentStatus.PENDING,
+                RecruiterPayment.RecruiterPaymentStatus.PAID,
+            ]:
+                RecruiterPayment.objects.create(
+                    amount=5000.5,
+                    due_on=timezone.now(),
+                    currency=self.currency,
+                    hire=hire,
+                    percentage_of_full=50,
+                    status=status,
+                )
+
+        rollup = AgencyPayoutRollup.objects.get()
+        self.assertEqual(rollup.agency, self.agency)
+        self.assertEqual(rollup.payouts_due, Decimal("5000.50"))
+        self.assertEqual(rollup.payouts_paid, Decimal("5000.50"))
+        self.assertEqual(rollup.hire_count, 1)
+
+    def test_generated_invoices_update_rollup(self):
+        """Test that bulk invoice generation, which skips save(), still refreshes the rollups"""
+        for index in range(3):
+            self.create_hire(index)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_invoices_for_hires()
+
+        self.assertEqual(ClientRevenueRollup.objects.get().hire_count, 3)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        """Test that a full rebuild produces the same rollups as incremental maintenance"""
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(3):
+                hire = self.create_hire(index)
+                self.create_invoice(hire, status=Invoice.InvoiceStatus.PAID if index else Invoice.InvoiceStatus.DUE)
+                RecruiterPayment.objects.create(
+                    amount=1000, due_on=timezone.now(), currency=self.currency, hire=hire, percentage_of_full=100
+                )
+        incremental = self.rollup_rows()
+
+        self.assertEqual(rebuild_rollups(), {"clients": 1, "agencies": 1})
+        self.assertEqual(self.rollup_rows(), incremental)
+
+    def test_rebuild_is_scheduled_nightly(self):
+        """Test that beat runs the rebuild, which catches up invoices that became overdue"""
+        self.create_invoice(self.create_hire(), due_date=timezone.now() - timedelta(days=1))
+
+        schedule = settings.CELERY_BEAT_SCHEDULE["rebuild-financial-rollups"]
+        self.assertEqual(schedule["task"], rebuild_financial_rollups.name)
+        self.assertEqual(rebuild_financial_rollups.delay().get(), {"clients": 1, "agencies": 0})
+        self.assertEqual(ClientRevenueRollup.objects.get().overdue, Decimal("20000.00"))
+
+    def test_agency_less_payouts_keep_one_row_per_bucket(self):
+        """Test that the payouts of recruiters outside any agency cannot be rolled up twice"""
+        bucket = {"period": timezone.localdate().replace(day=1), "agency": None, "currency": self.currency}
+        AgencyPayoutRollup.objects.create(**bucket)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AgencyPayoutRollup.objects.create(**bucket)
+
+    def test_report_endpoint_is_scoped(self):
+        """Test that accountants see every rollup and client admins only their own revenue"""
+        with self.captureOnCommitCallbacks(execute=True):
+            hire = self.create_hire()
+            self.create_invoice(hire)
+            RecruiterPayment.objects.create(
+                amount=1000, due_on=timezone.now(), currency=self.currency, hire=hire, percentage_of_full=100
+            )
+        accountant = User.objects.create_user(email="accountant@example.com", password="testpass123", role=Roles.ADMIN)
+        AdminUserProfile.objects.create(
+            user=accountant, first_name="Test", last_name="Accountant", user_type=AdminUserProfile.UserType.ACCOUNTANT
+        )
+        client_user = User.objects.create_user(email="client@example.com", password="testpass123", role=Roles.CLIENT)
+        ClientUserProfile.objects.create(
+            user=client_user,
+            first_name="Test",
+            last_name="Client",
+            client=self.client_company,
+            user_type=ClientUserProfile.UserType.ADMIN,
+        )
+
+        def report(user, **params):
+            request = APIRequestFactory().get("/api/hires/reports/", params)
+            force_authenticate(request, user=user)
+            return FinancialReportViewSet.as_view({"get": "list"})(request)
+
+        data = report(accountant).data
+        self.assertEqual(len(data["clients"]), 1)
+        self.assertEqual(data["clients"][0]["currency_code"], "USD")
+        self.assertEqual(len(data["agencies"]), 1)
+
+        data = report(client_user).data
+        self.assertEqual(len(data["clients"]), 1)
+        self.assertEqual(data["agencies"], [])
+
+        eur = Currency.objects.create(
+            name="Euro",
+            three_letter_code="EUR",
+            job_posting_fee=0,
+            extra_role_fee=0,
+            top_job_fee=0,
+            salary_min=0,
+            commission_min=0,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ExchangeRate.objects.create(
+                currency=eur, date=timezone.localdate() - timedelta(days=62), rate=Decimal("0.5")
+            )
+        data = report(accountant, reporting_currency="eur").data
+        self.assertEqual(data["revenue_totals"][0]["invoiced"], "10000.00")
+        self.assertEqual(data["payout_totals"][0]["payouts_due"], "500.00")
+        self.assertEqual(report(accountant, reporting_currency="xyz").status_code, 400)
+
+        next_month = (timezone.localdate().replace(day=28) + timedelta(days=4)).replace(day=1)
+        self.assertEqual(report(accountant, period__gte=next_month.isoformat()).data["clients"], [])
+        self.assertEqual(report(self.recruiter.user).status_code, 403)
+
+
+class PayoutScheduleTests(HiresTestMixin, TestCase):
+    """Test cases for the recruiter payout schedule generator"""
+
+    def setUp(self):
+        self.create_fixtures()
+        PayoutInstalment.objects.create(name="On start", percentage=50, interval_in_days=None)
+        PayoutInstalment.objects.create(name="After probation", percentage=50, interval_in_days=90)
+        self.base_tier = RecruiterShare.objects.create(hires=1, percentage=50, default=True)
+        RecruiterShare.objects.create(hires=3, percentage=60)
+
+    def schedule(self, hire):
+        return list(
+            RecruiterPayment.objects.filter(hire=hire)
+            .order_by("due_on")
+            .values_list("amount", "percentage_of_full", "status")
+        )
+
+    def test_hire_is_expanded_into_instalments(self):
+        """Test that a hire gets one payment per instalment, due after its interval"""
+        hire = self.create_hire()
+
+        result = generate_payout_schedules()
+
+        self.assertEqual(result["updated"], 1)
+        payments = list(RecruiterPayment.objects.filter(hire=hire).order_by("due_on"))
+        self.assertEqual([payment.amount for payment in payments], [5000, 5000])
+        self.assertEqual(payments[0].due_on, hire.join_date)
+        self.assertEqual(payments[1].due_on, hire.join_date + timedelta(days=90))
+        self.assertEqual(payments[0].currency, self.currency)
+        hire.refresh_from_db()
+        self.assertEqual(hire.payout, 10000)
+
+    def test_generation_is_idempotent(self):
+        """Test that running again without changes leaves every payment in place"""
+        self.create_hire()
+        generate_payout_schedules()
+        payment_ids = set(RecruiterPayment.objects.values_list("pk", flat=True))
+
+        result = generate_payout_schedules()
+
+        self.assertEqual((result["updated"], result["created"], result["deleted"]), (0, 0, 0))
+        self.assertEqual(set(RecruiterPayment.objects.values_list("pk", flat=True)), payment_ids)
+
+    def test_share_follows_tiers_and_recruiter_override(self):
+        """Test that the recruiter's n-th hire reaches the n-hire tier unless the recruiter has a share"""
+        hires = [self.create_hire(index) for index in range(3)]
+
+        generate_payout_schedules()
+
+        self.assertEqual(self.schedule(hires[1])[0][0], 5000)
+        self.assertEqual(self.schedule(hires[2])[0][0], 6000)
+
+        self.recruiter.commission_share = 40
+        self.recruiter.save()
+        generate_payout_schedules()
+
+        self.assertEqual(self.schedule(hires[2])[0][0], 4000)
+
+    def test_tier_change_keeps_paid_instalments(self):
+        """Test that recomputing after a tier change only replaces payments still open"""
+        hire = self.create_hire()
+        generate_payout_schedules()
+        first = RecruiterPayment.objects.filter(hire=hire).order_by("due_on").first()
+        first.status = RecruiterPayment.RecruiterPaymentStatus.PAID
+        first.save()
+
+        self.base_tier.percentage = 40
+        self.base_tier.save()
+        result = generate_payout_schedules()
+
+        self.assertEqual((result["created"], result["deleted"]), (1, 1))
+        self.assertEqual(
+            self.schedule(hire),
+            [
+                (5000, 50, RecruiterPayment.RecruiterPaymentStatus.PAID),
+                (4000, 50, RecruiterPayment.RecruiterPaymentStatus.PENDING),
+            ],
+        )
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_tier_change_reprices_open_payments_on_commit(self):
+        """Test that saving a tier re-prices the open payments of tier-driven recruiters only"""
+        hire = self.create_hire()
+        generate_payout_schedules()
+        first = RecruiterPayment.objects.filter(hire=hire).order_by("due_on").first()
+        first.status = RecruiterPayment.RecruiterPaymentStatus.PAID
+        first.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.base_tier.percentage = 40
+            self.base_tier.save()
+
+        self.assertEqual(
+            self.schedule(hire),
+            [
+                (5000, 50, RecruiterPayment.RecruiterPaymentStatus.PAID),
+                (4000, 50, RecruiterPayment.RecruiterPaymentStatus.PENDING),
+            ],
+        )
+
+        self.recruiter.commission_share = 30
+        self.recruiter.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.base_tier.percentage = 45
+            self.base_tier.save()
+        self.assertEqual(self.schedule(hire)[1][0], 4000)
+
+    def create_through_api(self):
+        admin = User.objects.create_user(email="admin@example.com", password="testpass123", role=Roles.ADMIN)
+        AdminUserProfile.objects.create(
+            user=admin, first_name="Admin", last_name="User", user_type=AdminUserProfile.UserType.ADMIN
+        )
+        candidate = Candidate.objects.create(first_name="Test", last_name="Candidate")
+        request = APIRequestFactory().post(
+            "/api/hires/",
+            {
+                "job": str(self.job.pk),
+                "recruiter": str(self.recruiter.pk),
+                "candidate": str(candidate.pk),
+                "base_salary": 100000,
+                "payout": 0,
+                "commission": 20000,
+                "commission_percentage": 20,
+                "join_date": timezone.now().isoformat(),
+            },
+            format="json",
+        )
+        force_authenticate(request, user=admin)
+        return HireViewSet.as_view({"post": "create"})(request)
+
+    def test_created_hire_is_returned_with_its_schedule(self):
+        """Test that creating a hire responds with the payout and payments just scheduled"""
+        response = self.create_through_api()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Decimal(response.data["payout"]), 10000)
+        self.assertEqual([payment["amount"] for payment in response.data["recruiter_payments"]], [5000, 5000])
+
+    def test_hire_is_not_kept_without_a_schedule(self):
+        """Test that an invalid instalment table rejects the hire instead of saving it unscheduled"""
+        PayoutInstalment.objects.create(name="Bonus", percentage=10, interval_in_days=180)
+
+        response = self.create_through_api()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("100", response.data["error"])
+        self.assertFalse(Hire.objects.exists())
+
+    def test_query_count_does_not_grow_with_hires(self):
+        """Test that a batch is read and written in a fixed number of queries"""
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                generate_payout_schedules()
+            return len(context)
+
+        self.create_hire(0)
+        baseline = count_queries()
+
+        RecruiterPayment.objects.all().delete()
+        for index in range(1, 10):
+            self.create_hire(index)
+
+        self.assertEqual(count_queries(), baseline)
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class DunningTests(HiresTestMixin, TestCase):
+    """Test cases for the overdue invoice sweep and reminders"""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.client_company.billing_email = "billing@example.com"
+        self.client_company.save()
+        self.now = timezone.now()
+
+    def test_sweep_only_scans_since_watermark(self):
+        """Test that each sweep queues just the invoices that lapsed since the previous one"""
+        self.create_invoice(self.create_hire(0), due_date=self.now - timedelta(days=3))
+        self.create_invoice(self.create_hire(1), due_date=self.now + timedelta(hours=1))
+        self.create_invoice(
+            self.create_hire(2), due_date=self.now - timedelta(days=1), status=Invoice.InvoiceStatus.PAID
+        )
+
+        self.assertEqual(sweep_overdue_invoices(now=self.now), 1)
+        self.assertEqual(sweep_overdue_invoices(now=self.now + timedelta(minutes=30)), 0)
+        self.assertEqual(sweep_overdue_invoices(now=self.now + timedelta(hours=2)), 1)
+        self.assertEqual(DunningNotice.objects.count(), 2)
+
+    def test_sweep_uses_the_partial_index(self):
+        """Test that the sweep query is limited to due invoices in the watermark window"""
+        sweep_overdue_invoices(now=self.now - timedelta(days=1))
+
+        with CaptureQueriesContext(connection) as context:
+            sweep_overdue_invoices(now=self.now)
+
+        select = next(query["sql"] for query in context if 'FROM "hires_invoice"' in query["sql"])
+        self.assertIn('"hires_invoice"."status" = 1', select)
+        self.assertIn('"hires_invoice"."due_date" >=', select)
+
+    def test_one_reminder_per_client(self):
+        """Test that queued notices are batched into one email per client and not sent twice"""
+        for index in range(2):
+            self.create_invoice(self.create_hire(index), due_date=self.now - timedelta(days=index + 1))
+        settled = self.create_invoice(self.create_hire(2), due_date=self.now - timedelta(days=1))
+        sweep_overdue_invoices(now=self.now)
+        settled.status = Invoice.InvoiceStatus.PAID
+        settled.save()
+
+        self.assertEqual(send_dunning_reminders(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["billing@example.com"])
+        self.assertIn("2 overdue invoices", mail.outbox[0].subject)
+        self.assertFalse(DunningNotice.objects.filter(invoice=settled).exists())
+
+        self.assertEqual(send_dunning_reminders(), 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_scheduled_task_sweeps_and_sends(self):
+        """Test that the daily beat task queues the overdue invoices and sends their reminders"""
+        self.create_invoice(self.create_hire(0), due_date=self.now - timedelta(days=1))
+
+        schedule = settings.CELERY_BEAT_SCHEDULE["send-overdue-reminders"]
+        self.assertEqual(schedule["task"], send_overdue_reminders.name)
+        self.assertEqual(send_overdue_reminders.delay().get(), {"queued": 1, "sent": 1})
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class ExportTests(HiresTestMixin, TestCase):
+    """Test cases for the streaming CSV and XLSX exports"""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.accountant = User.objects.create_user(
+            email="accountant@example.com", password="testpass123", role=Roles.ADMIN
+        )
+        AdminUserProfile.objects.create(
+            user=self.accountant,
+            first_name="Test",
+            last_name="Accountant",
+            user_type=AdminUserProfile.UserType.ACCOUNTANT,
+        )
+
+    def export(self, viewset, user, **params):
+        request = APIRequestFactory().get("/export/", params)
+        force_authenticate(request, user=user)
+        return viewset.as_view({"get": "export"})(request)
+
+    def read_csv(self, response):
+        return list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+
+    def test_invoice_csv_honours_filters(self):
+        """Test that the invoice export streams CSV limited by the list filters"""
+        paid = self.create_invoice(self.create_hire(0), status=Invoice.InvoiceStatus.PAID)
+        self.create_invoice(self.create_hire(1))
+
+        response = self.export(InvoiceViewSet, self.accountant, status=Invoice.InvoiceStatus.PAID)
+
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][:2], ["Invoice", "Status"])
+        self.assertEqual([row[0] for row in rows[1:]], [paid.invoice_code])
+        self.assertEqual(rows[1][-1], "20000.00")
+
+    def test_invoice_xlsx_is_a_workbook(self):
+        """Test that the XLSX export is a valid package with one row per invoice"""
+        invoices = [self.create_invoice(self.create_hire(index), customer_name="A & B <Ltd>") for index in range(3)]
+
+        response = self.export(InvoiceViewSet, self.accountant, export_format="xlsx")
+
+        workbook = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertIn("xl/workbook.xml", workbook.namelist())
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        self.assertEqual(sheet.count("<row>"), 4)
+        self.assertIn(invoices[0].invoice_code, sheet)
+        self.assertIn("A &amp; B &lt;Ltd&gt;", sheet)
+
+    def test_payment_export_is_scoped_to_recruiter(self):
+        """Test that recruiters only export payments for their own hires"""
+        other_user = User.objects.create_user(email="other@example.com", password="testpass123", role=Roles.RECRUITER)
+        other = Recruiter.objects.create(
+            user=other_user, first_name="Other", last_name="Recruiter", linkedin="https://linkedin.com/in/other"
+        )
+        for recruiter in [self.recruiter, other]:
+            RecruiterPayment.objects.create(
+                amount=1000,
+                due_on=timezone.now(),
+                currency=self.currency,
+                hire=self.create_hire(recruiter=recruiter),
+                percentage_of_full=100,
+            )
+
+        rows = self.read_csv(self.export(RecruiterPaymentViewSet, self.recruiter.user))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], "Test Recruiter")
+
+    def test_unknown_format_and_unscoped_user_are_rejected(self):
+        """Test that an unknown format is a bad request and users without access are denied"""
+        self.assertEqual(self.export(HireViewSet, self.accountant, export_format="pdf").status_code, 400)
+        self.assertEqual(self.export(InvoiceViewSet, self.recruiter.user).status_code, 403)
+
+
+class InvoiceSearchTests(HiresTestMixin, TestCase):
+    """Test cases for the trigram invoice search"""
+
+    def setUp(self):
+        self.create_fixtures()
+        self.accountant = User.objects.create_user(
+            email="accountant@example.com", password="testpass123", role=Roles.ADMIN
+        )
+        AdminUserProfile.objects.create(
+            user=self.accountant,
+            first_name="Test",
+            last_name="Accountant",
+            user_type=AdminUserProfile.UserType.ACCOUNTANT,
+        )
+        self.smith = self.create_invoice(
+            self.create_hire(0, candidate=Candidate.objects.create(first_name="Jane", last_name="Smith"))
+        )
+        self.smithson = self.create_invoice(
+            self.create_hire(1, candidate=Candidate.objects.create(first_name="Ann", last_name="Smithson"))
+        )
+
+    def search(self, query):
+        request = APIRequestFactory().get("/api/hires/invoices/", {"search": query})
+        force_authenticate(request, user=self.accountant)
+        response = InvoiceViewSet.as_view({"get": "list"})(request)
+        return [invoice["invoice_code"] for invoice in response.data["results"]]
+
+    def test_similarity_matches_pg_trgm(self):
+        """Test that the Python fallback scores like pg_trgm's similarity()"""
+        self.assertAlmostEqual(similarity("word", "two words"), 4 / 11)
+        self.assertEqual(similarity("", "word"), 0)
+
+    def test_partial_search_is_ranked(self):
+        """Test that a partial match finds both candidates with the closer name first"""
+        self.assertEqual(self.search("SMITH"), [self.smith.invoice_code, self.smithson.invoice_code])
+
+    def test_quoted_search_matches_whole_values(self):
+        """Test that a quoted query only matches a value exactly, ignoring case"""
+        self.assertEqual(self.search('"smith"'), [self.smith.invoice_code])
+        self.assertEqual(self.search(f'"{self.smithson.invoice_code.lower()}"'), [self.smithson.invoice_code])
+
+    def test_words_may_match_different_fields(self):
+        """Test that every word must match, each in any of the searched fields"""
+        self.assertEqual(self.search("jane smith"), [self.smith.invoice_code])
+        self.assertEqual(self.search("jane smithson"), [])
+
+    def test_document_refreshed_after_client_rename(self):
+        """Test that renamed clients are found once their invoices are refreshed"""
+        Client.objects.filter(pk=self.client_company.pk).update(company_name="Renamed Holdings")
+        self.assertEqual(self.search("renamed"), [])
+
+        self.assertEqual(refresh_invoice_search_documents(), 2)
+
+        self.assertEqual(len(self.search("renamed holdings")), 2)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_saving_a_rename_refreshes_the_invoices(self):
+        """Test that saving a renamed client or candidate refreshes their invoices after commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_company.company_name = "Renamed Holdings"
+            self.client_company.save()
+        self.assertEqual(len(self.search("renamed holdings")), 2)
+
+        candidate = Candidate.objects.get(last_name="Smithson")
+        with self.captureOnCommitCallbacks(execute=True):
+            candidate.last_name = "Jones"
+            candidate.save()
+        self.assertEqual(self.search('"jones"'), [self.smithson.invoice_code])
+
+    def test_document_is_rebuilt_only_for_searched_fields(self):
+        """Test that saving only unsearched fields leaves the search document alone"""
+        invoice = Invoice.objects.get(pk=self.smith.pk)
+        with patch.object(Invoice, "build_search_document", return_value="") as build:
+            invoice.status = Invoice.InvoiceStatus.PAID
+            invoice.save(update_fields=["status"])
+            build.assert_not_called()
+
+            invoice.save(update_fields=["customer_name"])
+            build.assert_called_once()
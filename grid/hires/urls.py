@@ -1,7 +1,12 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from grid.hires.views import HireViewSet, InvoiceViewSet, RecruiterPaymentViewSet
+from grid.hires.views import (
+    FinancialReportViewSet,
+    HireViewSet,
+    InvoiceViewSet,
+    RecruiterPaymentViewSet,
+)
 
 
 router = DefaultRouter()
@@ -9,6 +14,7 @@ router = DefaultRouter()
 router.register(r"recruiter-payments", RecruiterPaymentViewSet, basename="recruiter-payment")
 router.register(r"hires", HireViewSet, basename="hire")
 router.register(r"invoices", InvoiceViewSet, basename="invoices")
+router.register(r"reports", FinancialReportViewSet, basename="reports")
 
 urlpatterns = [
     path("", include(router.urls)),
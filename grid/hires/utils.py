@@ -1,44 +1,218 @@
-import secrets
-import string
+import multiprocessing
+import time
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 
-from .models import Hire, Invoice
+from grid.clients.models import Address
+from grid.core.trigram import search_document
 
+from .invoice_codes import allocate_invoice_codes
+from .models import Hire, Invoice, get_invoice_pdf_path
+from .pdf import document_fingerprint, invoice_document, render_invoice_pdf
+from .rollups import schedule_invoice_rollups
 
-def generate_unique_code():
-    """Generate cryptographically secure unique code."""
-    length = 8
-    chars = string.ascii_uppercase + string.digits
-    return "".join(secrets.choice(chars) for _ in range(length))  # Use secrets instead of random
 
+INVOICE_DUE_DAYS = 7
+INVOICE_BATCH_SIZE = 500
 
-def create_invoice_for_hire(hire_id):
-    hire = Hire.objects.get(uuid=hire_id)
+# Below this many stale PDFs, starting worker processes costs more than it saves
+PDF_POOL_THRESHOLD = 50
+
+
+def with_invoice_relations(queryset):
+    """Load everything an invoice is built from alongside the hires"""
+    addresses = Address.objects.select_related("state", "country__currency").order_by("-primary", "city")
+    return queryset.select_related("candidate", "job__client", "job__location__country__currency").prefetch_related(
+        Prefetch("job__client__addresses", queryset=addresses)
+    )
+
+
+def build_invoice(hire, due_date, tax_by_state):
+    """
+    Build an unsaved invoice for ``hire``, or return ``None`` if its client has no address.
+
+    Expects the relations loaded by ``with_invoice_relations``. ``tax_by_state`` caches the
+    tax name and percentage per state across calls.
+    """
     client = hire.job.client
 
-    # Retrieve the client's primary address or the first available address if no primary exists
-    primary_address = client.addresses.filter(primary=True).first() or client.addresses.first()
-    if not primary_address:
-        raise ValueError("Client must have at least one address for invoice generation.")
+    # Addresses are prefetched with the primary address first
+    addresses = client.addresses.all()
+    if not addresses:
+        return None
+    address = addresses[0]
 
-    currency = hire.job.country.currency or primary_address.country.currency
-    # Retrieve tax details from the state associated with the address
-    tax_name = primary_address.state.tax_name if primary_address.state else "Tax"
-    tax_percentage = primary_address.state.tax_percentage if primary_address.state else 0
+    location = hire.job.location
+    currency = location.country.currency if location else address.country.currency
 
-    # Create the invoice
-    invoice = Invoice.objects.create(
-        invoice_code=generate_unique_code(),
+    if address.state_id not in tax_by_state:
+        tax_by_state[address.state_id] = (address.state.tax_name or "Tax", address.state.tax_percentage or 0)
+    tax_name, tax_percentage = tax_by_state[address.state_id]
+
+    return Invoice(
         client=client,
         hire=hire,
         currency=currency,
         customer_name=client.company_name,
-        customer_address=primary_address.full_address,
-        due_date=timezone.now() + timezone.timedelta(days=7),
+        customer_address=address.full_address,
+        due_date=due_date,
         unit_price=hire.commission,
         tax_name=tax_name,
         tax_percentage=tax_percentage,
     )
 
+
+def generate_invoices_for_hires(hires=None, batch_size=INVOICE_BATCH_SIZE):
+    """
+    Create invoices for every hire in ``hires`` that does not have one yet.
+
+    Hires are read in chunks with their clients, addresses, states and currencies
+    prefetched, and each chunk is written with one ``bulk_create`` in its own transaction.
+    Hires whose client has no address are skipped.
+
+    Returns a summary with the ``created`` count, the ``skipped`` hire ids and the ``seconds`` taken.
+    """
+    started = time.perf_counter()
+    hires = with_invoice_relations((hires if hires is not None else Hire.objects.all()).filter(invoice__isnull=True))
+    due_date = timezone.now() + timezone.timedelta(days=INVOICE_DUE_DAYS)
+    tax_by_state = {}
+    created, skipped = 0, []
+
+    rows = hires.order_by("created_at").iterator(chunk_size=batch_size)
+    while chunk := list(islice(rows, batch_size)):
+        invoices = []
+        for hire in chunk:
+            invoice = build_invoice(hire, due_date, tax_by_state)
+            if invoice is None:
+                skipped.append(hire.pk)
+            else:
+                invoices.append(invoice)
+
+        for invoice, code in zip(invoices, allocate_invoice_codes(len(invoices))):
+            invoice.invoice_code = code
+            # bulk_create skips Invoice.save, which builds the document otherwise
+            invoice.search_document = invoice.build_search_document()
+
+        with transaction.atomic():
+            Invoice.objects.bulk_create(invoices)
+            # bulk_create skips Invoice.save, so keep the reporting rollups current here
+            schedule_invoice_rollups([invoice.rollup_key() for invoice in invoices])
+        created += len(invoices)
+
+    return {"created": created, "skipped": skipped, "seconds": time.perf_counter() - started}
+
+
+def create_invoice_for_hire(hire_id):
+    hire = with_invoice_relations(Hire.objects.filter(uuid=hire_id)).get()
+
+    due_date = timezone.now() + timezone.timedelta(days=INVOICE_DUE_DAYS)
+    invoice = build_invoice(hire, due_date, {})
+    if invoice is None:
+        raise ValueError("Client must have at least one address for invoice generation.")
+
+    invoice.save()
     return invoice
+
+
+def stale_invoice_pdfs(invoices):
+    """
+    Return ``(invoice, document, name)`` for each invoice without a stored PDF of its current
+    fields. Expects ``currency`` to be loaded on each invoice.
+    """
+    stale = []
+    for invoice in invoices:
+        document = invoice_document(invoice)
+        name = get_invoice_pdf_path(invoice, f"{document_fingerprint(document)}.pdf")
+        if invoice.pdf.name != name:
+            stale.append((invoice, document, name))
+    return stale
+
+
+def ensure_invoice_pdfs(invoices, workers=None):
+    """
+    Make sure each invoice has a PDF matching its current fields and return how many were rendered.
+
+    A PDF is stored under the hash of the document it was rendered from, so only invoices
+    whose printed fields changed since their last render are rendered again. Large batches
+    are rendered in a process pool with ``workers`` processes (one per CPU by default).
+    Expects ``currency`` to be loaded on each invoice.
+    """
+    stale = stale_invoice_pdfs(invoices)
+    if not stale:
+        return 0
+
+    documents = [document for _, document, _ in stale]
+    if len(stale) < PDF_POOL_THRESHOLD or workers == 1:
+        _store_invoice_pdfs(stale, map(render_invoice_pdf, documents))
+    else:
+        # Spawned workers only import the renderer, never the database connections of this process
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            _store_invoice_pdfs(stale, pool.map(render_invoice_pdf, documents, chunksize=16))
+
+    return len(stale)
+
+
+def _store_invoice_pdfs(stale, rendered):
+    storage = Invoice._meta.get_field("pdf").storage
+    replaced = []
+
+    for (invoice, _, name), content in zip(stale, rendered):
+        # A file under this name already holds exactly this content
+        if not storage.exists(name):
+            storage.save(name, ContentFile(content))
+        if invoice.pdf.name:
+            replaced.append(invoice.pdf.name)
+        invoice.pdf.name = name
+
+    Invoice.objects.bulk_update([invoice for invoice, _, _ in stale], ["pdf"], batch_size=INVOICE_BATCH_SIZE)
+    for name in replaced:
+        storage.delete(name)
+
+
+def invoice_pdf_chunks(invoice):
+    with invoice.pdf.open("rb") as file:
+        yield from file.chunks()
+
+
+def schedule_invoice_search_refresh(client_ids=(), candidate_ids=()):
+    """
+    Refresh the search documents of the invoices of ``client_ids``, and of the hires of
+    ``candidate_ids``, in the background once the current transaction commits.
+    """
+    from .tasks import refresh_invoice_search
+
+    client_ids, candidate_ids = [str(pk) for pk in client_ids], [str(pk) for pk in candidate_ids]
+    if client_ids or candidate_ids:
+        transaction.on_commit(partial(refresh_invoice_search.delay, client_ids, candidate_ids))
+
+
+def refresh_invoice_search_documents(invoices=None, batch_size=INVOICE_BATCH_SIZE):
+    """
+    Rebuild the search document of ``invoices`` and return how many changed.
+
+    Invoice.save keeps the document current, and saving a renamed client or candidate
+    refreshes their invoices through ``schedule_invoice_search_refresh``. Renames made with
+    queryset updates do not; run this (or the ``refresh_invoice_search`` command) afterwards.
+    """
+    invoices = invoices if invoices is not None else Invoice.objects.all()
+    rows = invoices.order_by().values_list("pk", "search_document", *Invoice.SEARCH_FIELDS)
+    changed = 0
+
+    rows = rows.iterator(chunk_size=batch_size)
+    while chunk := list(islice(rows, batch_size)):
+        stale = [
+            Invoice(pk=pk, search_document=document)
+            for pk, current, *values in chunk
+            if (document := search_document(values)) != current
+        ]
+        Invoice.objects.bulk_update(stale, ["search_document"])
+        changed += len(stale)
+
+    return changed
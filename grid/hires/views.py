@@ -1,26 +1,110 @@
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status, viewsets
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from grid.site_settings.filters import SearchFilterBackend
+from grid.admins.models import AdminUserProfile
+from grid.clients.models import ClientUserProfile
+from grid.core.streaming import zip_stream
+from grid.site_settings.exchange_rates import MissingExchangeRate, convert_totals
+from grid.site_settings.filters import TrigramSearchFilter
 from grid.site_settings.models import Currency
 
-from .filters import InvoiceFilter
-from .models import Hire, Invoice, RecruiterPayment
-from .serializers import HireSerializer, InvoiceSerializer, RecruiterPaymentSerializer
+from .exports import (
+    EXPORT_FORMATS,
+    HIRE_COLUMNS,
+    HIRE_RELATIONS,
+    INVOICE_COLUMNS,
+    INVOICE_RELATIONS,
+    PAYMENT_COLUMNS,
+    PAYMENT_RELATIONS,
+    export_response,
+)
+from .filters import (
+    AgencyPayoutRollupFilter,
+    ClientRevenueRollupFilter,
+    HireFilter,
+    InvoiceFilter,
+)
+from .models import (
+    AgencyPayoutRollup,
+    ClientRevenueRollup,
+    Hire,
+    Invoice,
+    RecruiterPayment,
+)
+from .payouts import generate_payout_schedules
+from .serializers import (
+    AgencyPayoutRollupSerializer,
+    ClientRevenueRollupSerializer,
+    HireSerializer,
+    InvoiceSerializer,
+    PayoutTotalsSerializer,
+    RecruiterPaymentSerializer,
+    RevenueTotalsSerializer,
+)
 from .swagger_docs import invoice_list_docs
+from .tasks import render_invoice_pdfs
+from .utils import ensure_invoice_pdfs, invoice_pdf_chunks, stale_invoice_pdfs
+
+
+# Invoices a single PDF bundle may hold; larger selections have to be narrowed by the filters
+MAX_PDF_BUNDLE_SIZE = 500
+
+export_format_parameter = openapi.Parameter(
+    "export_format",
+    openapi.IN_QUERY,
+    description="File format of the export",
+    type=openapi.TYPE_STRING,
+    enum=list(EXPORT_FORMATS),
+    default="csv",
+)
+
+
+def get_export_format(request):
+    export_format = request.query_params.get("export_format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationError({"export_format": f"Choose one of: {', '.join(EXPORT_FORMATS)}."})
+    return export_format
+
+
+class HirePagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    # join_date is nullable, which keyset pagination cannot page through reliably
+    ordering = "-created_at"
 
 
 class HireViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Hire.objects.all()
     serializer_class = HireSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = HireFilter
+    pagination_class = HirePagination
+
+    def get_scoped_queryset(self, user):
+        """Return the hires ``user`` may view, or ``None`` if they may not view hires at all."""
+        if user.is_admin:
+            return self.queryset
+        if hasattr(user, "recruiter"):
+            if user.recruiter.superuser and user.recruiter.agency_id:
+                return self.queryset.filter(recruiter__agency=user.recruiter.agency_id)
+            return self.queryset.filter(recruiter=user.recruiter)
+        if hasattr(user, "clientuserprofile"):
+            return self.queryset.filter(job__client=user.clientuserprofile.client)
+        return None
 
     @swagger_auto_schema(
         operation_summary="List Hires",
@@ -29,23 +113,31 @@ class HireViewSet(viewsets.ModelViewSet):
     )
     def list(self, request, *args, **kwargs):
         # Permission-based queryset filtering
-        user = request.user
-        if user.is_admin:
-            queryset = Hire.objects.all()
-        elif hasattr(user, "recruiter"):
-            if user.recruiter.is_superuser:
-                queryset = Hire.objects.filter(recruiter__agency=user.recruiter.agency)
-            else:
-                queryset = Hire.objects.filter(recruiter=user.recruiter)
+        queryset = self.get_scoped_queryset(request.user)
+        if queryset is None:
+            raise PermissionDenied("You do not have permission to view these hires.")
 
-        elif hasattr(user, "clientuserprofile"):
-            queryset = Hire.objects.filter(job__client=user.clientuserprofile.client)
+        queryset = queryset.select_related("job", "recruiter", "candidate").prefetch_related(
+            Prefetch("hire_payment", queryset=RecruiterPayment.objects.order_by("-due_on"))
+        )
+        page = self.paginate_queryset(self.filter_queryset(queryset))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-        else:
+    @swagger_auto_schema(
+        operation_summary="Export Hires",
+        operation_description="Stream every hire matching the list filters as CSV or XLSX.",
+        manual_parameters=[export_format_parameter],
+        responses={200: "CSV or XLSX file", 403: "Permission denied"},
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        queryset = self.get_scoped_queryset(request.user)
+        if queryset is None:
             raise PermissionDenied("You do not have permission to view these hires.")
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.filter_queryset(queryset).select_related(*HIRE_RELATIONS)
+        return export_response(queryset, HIRE_COLUMNS, "hires", get_export_format(request))
 
     @swagger_auto_schema(
         operation_summary="Retrieve Hire",
@@ -82,10 +174,19 @@ class HireViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You do not have permission to create a hire.")
 
         serializer = self.get_serializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # The hire is only kept together with its payout schedule
+        try:
+            with transaction.atomic():
+                hire = serializer.save()
+                generate_payout_schedules(Hire.objects.filter(pk=hire.pk))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        hire.refresh_from_db()
+        return Response(self.get_serializer(hire).data, status=status.HTTP_201_CREATED)
 
     @swagger_auto_schema(
         operation_summary="Update Hire Status",
@@ -125,6 +226,14 @@ class RecruiterPaymentViewSet(viewsets.ModelViewSet):
     serializer_class = RecruiterPaymentSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_scoped_queryset(self, user):
+        """Return the payments ``user`` may view, or ``None`` if they may not view payments at all."""
+        if user.is_admin and user.adminuserprofile.user_type != AdminUserProfile.UserType.VIEWER:
+            return self.queryset
+        if hasattr(user, "recruiter"):
+            return self.queryset.filter(hire__recruiter=user.recruiter)
+        return None
+
     @swagger_auto_schema(
         operation_summary="List Recruiter Payments",
         operation_description="Retrieve a list of recruiter payments based on user permissions. "
@@ -133,17 +242,28 @@ class RecruiterPaymentViewSet(viewsets.ModelViewSet):
         responses={200: RecruiterPaymentSerializer(many=True)},
     )
     def list(self, request, *args, **kwargs):
-        user = request.user
-        if user.is_admin and user.adminuserprofile.user_type != AdminUserProfile.UserType.VIEWER:
-            queryset = RecruiterPayment.objects.all()
-        elif hasattr(user, "recruiter"):
-            queryset = RecruiterPayment.objects.filter(hire__recruiter=user.recruiter)
-        else:
+        queryset = self.get_scoped_queryset(request.user)
+        if queryset is None:
             raise PermissionDenied("You do not have permission to view these payments.")
 
         serializer = RecruiterPaymentSerializer(queryset, many=True)
         return Response(serializer.data)
 
+    @swagger_auto_schema(
+        operation_summary="Export Recruiter Payments",
+        operation_description="Stream every recruiter payment the user may view as CSV or XLSX.",
+        manual_parameters=[export_format_parameter],
+        responses={200: "CSV or XLSX file", 403: "Permission denied"},
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        queryset = self.get_scoped_queryset(request.user)
+        if queryset is None:
+            raise PermissionDenied("You do not have permission to view these payments.")
+
+        queryset = queryset.select_related(*PAYMENT_RELATIONS)
+        return export_response(queryset, PAYMENT_COLUMNS, "recruiter-payments", get_export_format(request))
+
     @swagger_auto_schema(
         operation_summary="Retrieve Recruiter Payment",
         operation_description="Retrieve a specific recruiter payment based on user permissions. "
@@ -248,40 +368,34 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     queryset = Invoice.objects.all()
     serializer_class = InvoiceSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, SearchFilterBackend]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter]
     filterset_class = InvoiceFilter
     pagination_class = InvoicePagination
-    search_fields = [
-        "client__company_name",
-        "client__about",
-        "hire__candidate__first_name",
-        "hire__candidate__last_name",
-        "tax_name",
-        "invoice_code",
-        "customer_name",
-        "customer_address",
-    ]
+    # Searches Invoice.SEARCH_FIELDS through one trigram-indexed column
+    search_document_field = "search_document"
     ordering_fields = ["created_at", "due_date", "unit_price"]
     ordering = ["due_date"]  # default
 
-    @swagger_auto_schema(**invoice_list_docs)
-    def list(self, request, *args, **kwargs):
-        user = request.user
-
+    def get_scoped_queryset(self, user):
+        """Return the invoices ``user`` may read, or ``None`` if they may not read invoices at all."""
         if hasattr(user, "adminuserprofile") and user.adminuserprofile.user_type in [
-            1,
-            2,
-            5,
+            AdminUserProfile.UserType.SUPERADMIN,
+            AdminUserProfile.UserType.ADMIN,
+            AdminUserProfile.UserType.ACCOUNTANT,
         ]:  # SuperAdmin, Admin, Accountant have access to all invoices
-            queryset = self.queryset
-        elif hasattr(user, "clientuserprofile") and user.clientuserprofile.client.user_type in [
-            1,
-            2,
-        ]:  # ClientUser Superuser or Admin
-            # ClientUsers can access only their own invoices
-            queryset = self.queryset.filter(client=user.clientuserprofile.client)
-        else:
-            # Recruiters and unauthorized users are denied
+            return self.queryset
+        if hasattr(user, "clientuserprofile") and user.clientuserprofile.user_type in [
+            ClientUserProfile.UserType.SUPERUSER,
+            ClientUserProfile.UserType.ADMIN,
+        ]:  # ClientUsers can access only their own invoices
+            return self.queryset.filter(client=user.clientuserprofile.client)
+        # Recruiters and unauthorized users are denied
+        return None
+
+    @swagger_auto_schema(**invoice_list_docs)
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_scoped_queryset(request.user)
+        if queryset is None:
             return Response(
                 {"detail": "You do not have permission to view invoices."}, status=status.HTTP_403_FORBIDDEN
             )
@@ -303,25 +417,10 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         responses={200: InvoiceSerializer()},
     )
     def retrieve(self, request, *args, **kwargs):
-        user = request.user
+        queryset = self.get_scoped_queryset(request.user)
         invoice = self.get_object()
 
-        if hasattr(user, "adminuserprofile") and user.adminuserprofile.user_type in [
-            1,
-            2,
-            5,
-        ]:  # SuperAdmin, Admin, Accountant
-            # Admins have access
-            pass
-        elif (
-            hasattr(user, "clientuserprofile")
-            and invoice.client == user.clientuserprofile.client
-            and user.clientuserprofile.client.user_type in [1, 2]
-        ):  # ClientUser with permissions
-            # ClientUser can access their own related invoice
-            pass
-        else:
-            # Recruiters and unauthorized users are denied
+        if queryset is None or not queryset.filter(pk=invoice.pk).exists():
             return Response(
                 {"detail": "You do not have permission to view this invoice."}, status=status.HTTP_403_FORBIDDEN
             )
@@ -373,3 +472,194 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     )
     def destroy(self, request, *args, **kwargs):
         return Response({"detail": "Deleting invoices is not permitted."}, status=status.HTTP_403_FORBIDDEN)
+
+    @swagger_auto_schema(
+        operation_description="Download an invoice as PDF. The PDF is only rendered again when the invoice changed.",
+        responses={200: "PDF document", 403: "Permission denied"},
+    )
+    @action(detail=True, methods=["get"])
+    def pdf(self, request, *args, **kwargs):
+        queryset = self.get_scoped_queryset(request.user)
+        if queryset is None:
+            return Response(
+                {"detail": "You do not have permission to view this invoice."}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        invoice = get_object_or_404(queryset.select_related("currency"), pk=self.kwargs["pk"])
+        ensure_invoice_pdfs([invoice], workers=1)
+        return FileResponse(
+            invoice.pdf.open("rb"),
+            as_attachment=True,
+            filename=f"invoice-{invoice.invoice_code}.pdf",
+            content_type="application/pdf",
+        )
+
+    @swagger_auto_schema(
+        operation_description=(
+            f"Download the PDFs of the invoices matching the list filters, at most {MAX_PDF_BUNDLE_SIZE}, as a "
+            "streamed ZIP archive. PDFs that are missing or out of date are rendered in the background and left "
+            "out; their number is given in the X-Invoices-Pending header, or a 202 is returned if none are ready."
+        ),
+        responses={
+            200: "ZIP archive",
+            202: "PDFs are being rendered",
+            400: "Too many invoices",
+            403: "Permission denied",
+        },
+    )
+    @action(detail=False, methods=["get"], url_path="pdf-bundle")
+    def pdf_bundle(self, request, *args, **kwargs):
+        queryset = self.get_scoped_queryset(request.user)
+        if queryset is None:
+            return Response(
+                {"detail": "You do not have permission to view invoices."}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        invoices = list(self.filter_queryset(queryset).select_related("currency")[: MAX_PDF_BUNDLE_SIZE + 1])
+        if len(invoices) > MAX_PDF_BUNDLE_SIZE:
+            return Response(
+                {"detail": f"Narrow the filters to at most {MAX_PDF_BUNDLE_SIZE} invoices."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stale = {invoice.pk for invoice, _, _ in stale_invoice_pdfs(invoices)}
+        if stale:
+            render_invoice_pdfs.delay([str(pk) for pk in stale])
+        ready = [invoice for invoice in invoices if invoice.pk not in stale]
+        if stale and not ready:
+            return Response(
+                {"detail": "The PDFs are being rendered, try again shortly.", "pending": len(stale)},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        files = ((f"invoice-{invoice.invoice_code}.pdf", invoice_pdf_chunks(invoice)) for invoice in ready)
+        response = StreamingHttpResponse(zip_stream(files), content_type="application/zip")
+        response["Content-Disposition"] = 'attachment; filename="invoices.zip"'
+        response["X-Invoices-Pending"] = len(stale)
+        return response
+
+    @swagger_auto_schema(
+        operation_description="Stream every invoice matching the list filters as CSV or XLSX.",
+        manual_parameters=[export_format_parameter],
+        responses={200: "CSV or XLSX file", 403: "Permission denied"},
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        queryset = self.get_scoped_queryset(request.user)
+        if queryset is None:
+            return Response(
+                {"detail": "You do not have permission to view invoices."}, status=status.HTTP_403_FORBIDDEN
+            )
+
+        queryset = self.filter_queryset(queryset).select_related(*INVOICE_RELATIONS)
+        return export_response(queryset, INVOICE_COLUMNS, "invoices", get_export_format(request))
+
+
+class FinancialReportViewSet(viewsets.ViewSet):
+    """
+    Revenue and payout reports served from the materialized rollups in ``grid.hires.rollups``.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_scoped_querysets(self, user):
+        """
+        Return the client and agency rollups ``user`` may read; either is ``None`` when denied.
+        """
+        if hasattr(user, "adminuserprofile") and user.adminuserprofile.user_type in [
+            AdminUserProfile.UserType.SUPERADMIN,
+            AdminUserProfile.UserType.ADMIN,
+            AdminUserProfile.UserType.ACCOUNTANT,
+        ]:
+            return ClientRevenueRollup.objects.all(), AgencyPayoutRollup.objects.all()
+        if hasattr(user, "clientuserprofile") and user.clientuserprofile.user_type in [
+            ClientUserProfile.UserType.SUPERUSER,
+            ClientUserProfile.UserType.ADMIN,
+        ]:  # Clients see what they were invoiced
+            return ClientRevenueRollup.objects.filter(client=user.clientuserprofile.client), None
+        if hasattr(user, "recruiter") and user.recruiter.superuser and user.recruiter.agency_id:
+            # Agency superusers see what their agency is paid
+            return None, AgencyPayoutRollup.objects.filter(agency=user.recruiter.agency_id)
+        return None, None
+
+    @swagger_auto_schema(
+        operation_summary="Financial Reports",
+        operation_description="Monthly revenue per client and currency, and recruiter payouts per agency and "
+        "currency. Admins and accountants see every row, client admins their own revenue and agency "
+        "superusers their own payouts.",
+        manual_parameters=[
+            openapi.Parameter(
+                "period__gte", openapi.IN_QUERY, description="First month, e.g. 2024-01-01", type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                "period__lte", openapi.IN_QUERY, description="Last month, e.g. 2024-12-01", type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter("currency", openapi.IN_QUERY, description="Currency id", type=openapi.TYPE_STRING),
+            openapi.Parameter("client", openapi.IN_QUERY, description="Client id", type=openapi.TYPE_STRING),
+            openapi.Parameter("agency", openapi.IN_QUERY, description="Agency id", type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "reporting_currency",
+                openapi.IN_QUERY,
+                description="Three-letter code; adds monthly totals across all currencies converted to it",
+                type=openapi.TYPE_STRING,
+            ),
+        ],
+    )
+    def list(self, request):
+        clients, agencies = self.get_scoped_querysets(request.user)
+        if clients is None and agencies is None:
+            raise PermissionDenied("You do not have permission to view financial reports.")
+
+        reporting_currency = None
+        if code := request.query_params.get("reporting_currency"):
+            reporting_currency = Currency.objects.filter(three_letter_code=code.upper()).first()
+            if reporting_currency is None:
+                return Response({"reporting_currency": f"Unknown currency {code}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {"clients": [], "agencies": []}
+        if clients is not None:
+            filterset = ClientRevenueRollupFilter(
+                request.query_params, queryset=clients.select_related("client", "currency")
+            )
+            if not filterset.is_valid():
+                return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+            data["clients"] = ClientRevenueRollupSerializer(filterset.qs, many=True).data
+        if agencies is not None:
+            filterset = AgencyPayoutRollupFilter(
+                request.query_params, queryset=agencies.select_related("agency", "currency")
+            )
+            if not filterset.is_valid():
+                return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+            data["agencies"] = AgencyPayoutRollupSerializer(filterset.qs, many=True).data
+
+        if reporting_currency is not None:
+            try:
+                data.update(self.get_converted_totals(request.query_params, clients, agencies, reporting_currency))
+            except MissingExchangeRate as error:
+                return Response({"reporting_currency": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+    def get_converted_totals(self, params, clients, agencies, reporting_currency):
+        """Monthly totals over every currency, converted at the rate of the first of each month"""
+        totals = {}
+        if clients is not None:
+            amounts = {name: name for name in ["invoiced", "paid", "overdue", "refunded"]}
+            rows = convert_totals(
+                ClientRevenueRollupFilter(params, queryset=clients).qs,
+                amounts,
+                reporting_currency,
+                date_field="period",
+                group_by=["period"],
+            )
+            totals["revenue_totals"] = RevenueTotalsSerializer(rows, many=True).data
+        if agencies is not None:
+            amounts = {name: name for name in ["payouts_due", "payouts_paid"]}
+            rows = convert_totals(
+                AgencyPayoutRollupFilter(params, queryset=agencies).qs,
+                amounts,
+                reporting_currency,
+                date_field="period",
+                group_by=["period"],
+            )
+            totals["payout_totals"] = PayoutTotalsSerializer(rows, many=True).data
+        return totals
@@ -195,6 +195,20 @@ class RecruiterApplication(CoreModel):
     def __str__(self):
         return f"Application for {self.job.title} by {self.recruiter.first_name} {self.recruiter.last_name}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+        schedule_recruiter_stats([self.recruiter_id], jobs=[(self.recruiter_id, self.job_id)])
+
+    def delete(self, *args, **kwargs):
+        recruiter_id, job_id = self.recruiter_id, self.job_id
+        result = super().delete(*args, **kwargs)
+        from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+        schedule_recruiter_stats([recruiter_id], jobs=[(recruiter_id, job_id)])
+        return result
+
 
 class JobNotes(CoreModel):
     job = models.ForeignKey("Job", on_delete=models.CASCADE)
@@ -1,6 +1,17 @@
 from django.contrib import admin
 
-from .models import Agency, BankAccount, JobCategory, Recruiter, TaxInformation
+from .models import (
+    Agency,
+    AgencyJobSummary,
+    AgencyStats,
+    BankAccount,
+    CommissionShareChange,
+    JobCategory,
+    LinkedInEnrichment,
+    Recruiter,
+    RecruiterStats,
+    TaxInformation,
+)
 
 
 @admin.register(TaxInformation)
@@ -80,7 +91,7 @@ class RecruiterAdmin(admin.ModelAdmin):
     list_filter = ("status", "superuser", "primary_industry", "sec_industry")
     search_fields = ("first_name", "last_name", "user__username", "agency__agency_name", "linkedin")
     ordering = ("last_name", "first_name")
-    readonly_fields = ("stripe_id",)  # Stripe ID is read-only
+    readonly_fields = ("stripe_id", "commission_share_manual")  # Stripe ID is read-only
     fieldsets = (
         (
             "Personal Information",
@@ -96,6 +107,7 @@ class RecruiterAdmin(admin.ModelAdmin):
                     "status",
                     "superuser",
                     "commission_share",
+                    "commission_share_manual",
                     "approval_date",
                 )
             },
@@ -103,3 +115,45 @@ class RecruiterAdmin(admin.ModelAdmin):
         ("Payment Details", {"fields": ("stripe_id",)}),
         ("Additional Information", {"fields": ("introduction", "story")}),
     )
+
+
+@admin.register(LinkedInEnrichment)
+class LinkedInEnrichmentAdmin(admin.ModelAdmin):
+    list_display = ("recruiter", "status", "created_at", "completed_at")
+    list_filter = ("status",)
+    search_fields = ("recruiter__first_name", "recruiter__last_name", "linkedin")
+    raw_id_fields = ("recruiter",)
+
+
+@admin.register(RecruiterStats)
+class RecruiterStatsAdmin(admin.ModelAdmin):
+    list_display = ("recruiter", "period", "placements", "commission", "days_to_hire", "approval_rate", "refreshed_at")
+    list_filter = ("period",)
+    search_fields = ("recruiter__first_name", "recruiter__last_name")
+    raw_id_fields = ("recruiter",)
+
+
+@admin.register(AgencyStats)
+class AgencyStatsAdmin(admin.ModelAdmin):
+    list_display = ("agency", "period", "placements", "commission", "days_to_hire", "approval_rate", "refreshed_at")
+    list_filter = ("period",)
+    search_fields = ("agency__agency_name",)
+    raw_id_fields = ("agency",)
+
+
+@admin.register(AgencyJobSummary)
+class AgencyJobSummaryAdmin(admin.ModelAdmin):
+    list_display = ("agency", "job", "applications_pending", "applications_approved", "submissions", "placements")
+    search_fields = ("agency__agency_name", "job__title")
+    raw_id_fields = ("agency", "job")
+
+
+@admin.register(CommissionShareChange)
+class CommissionShareChangeAdmin(admin.ModelAdmin):
+    list_display = ("recruiter", "previous_share", "new_share", "hire_count", "reason", "created_at")
+    list_filter = ("reason",)
+    search_fields = ("recruiter__first_name", "recruiter__last_name")
+    raw_id_fields = ("recruiter",)
+
+    def has_change_permission(self, request, obj=None):
+        return False
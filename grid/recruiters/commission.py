@@ -0,0 +1,144 @@
+"""
+Commission share tiers.
+
+A recruiter's ``commission_share`` follows the ``RecruiterShare`` tier reached by their
+rolling hire count: their hires of the last ``COMMISSION_SHARE_WINDOW_DAYS`` days, less the
+cancelled and refunded ones. The tier for n hires is the one with the highest ``hires``
+threshold not above n, and the default tier below the lowest threshold.
+
+Saving or deleting a hire recomputes its recruiter's share once the transaction commits.
+Changing the tier table, and the window sliding past old hires, recompute every recruiter
+in the background through the ``recompute_commission_shares`` task, which also runs nightly
+from ``CELERY_BEAT_SCHEDULE``; a tier change also re-prices the open payouts (see
+``grid.hires.payouts``). Shares set by an admin (``commission_share_manual``) are left
+alone until they are cleared. Every change is recorded as a ``CommissionShareChange``.
+"""
+
+from bisect import bisect_right
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from grid.hires.models import Hire
+from grid.site_settings.models import RecruiterShare
+
+from .leaderboard import UNCOUNTED_HIRES
+from .models import CommissionShareChange, Recruiter
+
+
+WRITE_BATCH_SIZE = 1000
+
+
+def load_tiers():
+    return list(RecruiterShare.objects.order_by("hires"))
+
+
+def tier_percentage(hire_count, tiers):
+    """
+    Return the share for ``hire_count`` hires, or ``None`` when the tier table has none.
+
+    ``tiers`` are the ``RecruiterShare`` rows ordered by ``hires``.
+    """
+    reached = bisect_right([tier.hires for tier in tiers], hire_count)
+    if reached:
+        return tiers[reached - 1].percentage
+    default = next((tier for tier in tiers if tier.default), None)
+    return default.percentage if default else None
+
+
+def window_start(now):
+    return now - timedelta(days=settings.COMMISSION_SHARE_WINDOW_DAYS)
+
+
+def counted_hires():
+    """Hires that count towards a tier"""
+    return Hire.objects.exclude(payment_status__in=UNCOUNTED_HIRES)
+
+
+def recompute_commission_shares(recruiter_ids=None, reason=CommissionShareChange.Reason.HIRE, now=None):
+    """
+    Bring the share of ``recruiter_ids``, or of every recruiter when ``None``, in line with
+    the tiers and return how many changed.
+
+    The hire counts of all of them come from one grouped query and are mapped to tiers in
+    memory; only the changed ones are written, in batches of ``WRITE_BATCH_SIZE``, so a full
+    recompute costs a few queries per batch of changes however many recruiters there are.
+    """
+    now = now or timezone.now()
+    tiers = load_tiers()
+    recruiters = Recruiter.objects.filter(commission_share_manual=False)
+    hires = counted_hires().filter(created_at__gt=window_start(now), created_at__lte=now)
+    if recruiter_ids is not None:
+        recruiters = recruiters.filter(pk__in=recruiter_ids)
+        hires = hires.filter(recruiter__in=recruiter_ids)
+    counts = dict(hires.order_by().values("recruiter").annotate(count=Count("pk")).values_list("recruiter", "count"))
+
+    targets = {}
+    for pk, current in recruiters.order_by().values_list("pk", "commission_share").iterator(chunk_size=2000):
+        hire_count = counts.get(pk, 0)
+        share = tier_percentage(hire_count, tiers)
+        if share != current:
+            targets[pk] = (share, hire_count)
+
+    pks, written = list(targets), 0
+    for start in range(0, len(pks), WRITE_BATCH_SIZE):
+        written += write_commission_shares({pk: targets[pk] for pk in pks[start : start + WRITE_BATCH_SIZE]}, reason)
+    return written
+
+
+def write_commission_shares(targets, reason):
+    """
+    Set the ``(share, hire_count)`` of ``targets``, keyed by recruiter pk, and return how many changed.
+
+    The rows are locked and read again first: a share an admin set since they were read is
+    manual now and kept, and the change is recorded against the share actually replaced.
+    """
+    changed, changes = [], []
+    with transaction.atomic():
+        locked = Recruiter.objects.select_for_update().filter(pk__in=targets, commission_share_manual=False)
+        for pk, current in locked.order_by().values_list("pk", "commission_share"):
+            share, hire_count = targets[pk]
+            if share != current:
+                changed.append(Recruiter(pk=pk, commission_share=share))
+                changes.append(
+                    CommissionShareChange(
+                        recruiter_id=pk, previous_share=current, new_share=share, hire_count=hire_count, reason=reason
+                    )
+                )
+        # bulk_update skips Recruiter.save, so these shares are not taken for manual ones
+        Recruiter.objects.bulk_update(changed, ["commission_share"])
+        CommissionShareChange.objects.bulk_create(changes)
+    return len(changed)
+
+
+def schedule_commission_shares(recruiter_ids):
+    """Recompute the share of ``recruiter_ids`` once the current transaction commits"""
+    recruiter_ids = {recruiter_id for recruiter_id in recruiter_ids if recruiter_id is not None}
+    if recruiter_ids:
+        transaction.on_commit(partial(recompute_commission_shares, recruiter_ids))
+
+
+def schedule_tier_recompute():
+    """Recompute every share and re-price the open payouts in the background once the tier table change commits"""
+    from grid.hires.tasks import reprice_open_payouts
+
+    from .tasks import recompute_commission_shares as recompute_task
+
+    transaction.on_commit(partial(recompute_task.delay, CommissionShareChange.Reason.TIERS))
+    transaction.on_commit(reprice_open_payouts.delay)
+
+
+def record_manual_share(recruiter, previous_share):
+    """Record a share set or cleared by an admin; a cleared share goes back to the tiers"""
+    CommissionShareChange.objects.create(
+        recruiter=recruiter,
+        previous_share=previous_share,
+        new_share=recruiter.commission_share,
+        reason=CommissionShareChange.Reason.MANUAL,
+    )
+    if not recruiter.commission_share_manual:
+        schedule_commission_shares([recruiter.pk])
@@ -0,0 +1,42 @@
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+
+def enrichment_group_name(user_id):
+    return f"linkedin_enrichment_{user_id}"
+
+
+class LinkedInEnrichmentConsumer(AsyncWebsocketConsumer):
+    """Sends the signed-in recruiter the state of their LinkedIn enrichment as it changes"""
+
+    async def connect(self):
+        from django.contrib.auth.models import AnonymousUser
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.exceptions import InvalidToken
+
+        query_string = parse_qs(self.scope["query_string"].decode())
+        token = query_string.get("token", [None])[0]
+
+        if token:
+            try:
+                validated_token = await sync_to_async(JWTAuthentication().get_validated_token)(token)
+                self.scope["user"] = await sync_to_async(JWTAuthentication().get_user)(validated_token)
+            except InvalidToken:
+                self.scope["user"] = AnonymousUser()
+
+        if not (self.scope["user"] and self.scope["user"].is_authenticated):
+            await self.close(code=4001)  # Unauthorized
+            return
+
+        self.group_name = enrichment_group_name(self.scope["user"].pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def enrichment_update(self, event):
+        await self.send(text_data=event["text"])
@@ -0,0 +1,120 @@
+"""
+Agency dashboard.
+
+The dashboard is assembled from summary tables only: ``AgencyStats`` for the agency totals,
+``RecruiterStats`` for the team, ``AgencyPayoutRollup`` for payouts and ``AgencyJobSummary``
+for applications and jobs, so its cost does not grow with the agency's history.
+
+The summaries are kept up to date by ``grid.recruiters.leaderboard`` and ``grid.hires.rollups``.
+The assembled dashboard is cached for ``AGENCY_DASHBOARD_CACHE_TTL`` seconds, and dropped from
+the cache whenever one of its summaries is refreshed.
+"""
+
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, FilteredRelation, Q, Sum
+
+from grid.core.images import variant_urls
+from grid.hires.models import AgencyPayoutRollup
+from grid.jobs.models import Job
+
+from .models import AgencyJobSummary, AgencyStats, PerformanceStats, Recruiter
+
+
+TOP_JOBS = 5
+STATS_FIELDS = ["placements", "commission", "days_to_hire", "submissions", "stage_moves", "approval_rate"]
+
+
+def dashboard_cache_key(agency_id):
+    return f"agency-dashboard:{agency_id}"
+
+
+def invalidate_agency_dashboards(agency_ids):
+    """Drop the cached dashboards of ``agency_ids`` once the current transaction commits"""
+    keys = [dashboard_cache_key(agency_id) for agency_id in set(agency_ids) if agency_id is not None]
+    if keys:
+        transaction.on_commit(partial(cache.delete_many, keys))
+
+
+def team(agency):
+    """The agency's recruiters with their stats over the last 30 days, in one query"""
+    recruiters = (
+        Recruiter.objects.filter(agency=agency)
+        .annotate(recent=FilteredRelation("stats", condition=Q(stats__period=PerformanceStats.Period.LAST_30_DAYS)))
+        .values(
+            "uuid",
+            "first_name",
+            "last_name",
+            "user__email",
+            "status",
+            "superuser",
+            "profile_photo",
+            *(f"recent__{field}" for field in STATS_FIELDS),
+        )
+    )
+    field_file = Recruiter._meta.get_field("profile_photo")
+    return [
+        {
+            "uuid": row["uuid"],
+            "name": f"{row['first_name']} {row['last_name']}",
+            "email": row["user__email"],
+            "status": row["status"],
+            "superuser": row["superuser"],
+            "profile_photo_variants": variant_urls(field_file.attr_class(None, field_file, row["profile_photo"])),
+            "last_30_days": {field: row[f"recent__{field}"] for field in STATS_FIELDS},
+        }
+        for row in recruiters
+    ]
+
+
+def agency_dashboard(agency):
+    """
+    Everything the agency dashboard shows, read from the summary tables and cached for
+    ``AGENCY_DASHBOARD_CACHE_TTL`` seconds.
+    """
+    key = dashboard_cache_key(agency.pk)
+    dashboard = cache.get(key)
+    if dashboard is not None:
+        return dashboard
+
+    stats = {
+        row["period"]: row
+        for row in AgencyStats.objects.filter(agency=agency).values("period", *STATS_FIELDS, "refreshed_at")
+    }
+    payouts = (
+        AgencyPayoutRollup.objects.filter(agency=agency)
+        .order_by("currency__three_letter_code")
+        .values(currency_code=F("currency__three_letter_code"))
+        .annotate(payouts_due=Sum("payouts_due"), payouts_paid=Sum("payouts_paid"), hire_count=Sum("hire_count"))
+    )
+    summaries = AgencyJobSummary.objects.filter(agency=agency).values(
+        "job",
+        "applications_pending",
+        "applications_approved",
+        "submissions",
+        "placements",
+        job_title=F("job__title"),
+        job_status=F("job__status"),
+    )
+    active_applications = summaries.filter(
+        Q(applications_pending__gt=0) | Q(applications_approved__gt=0), job__status=Job.JobStatus.ACTIVE
+    ).order_by("job__title")
+    top_jobs = summaries.filter(Q(placements__gt=0) | Q(submissions__gt=0)).order_by(
+        "-placements", "-submissions", "job__title"
+    )[:TOP_JOBS]
+
+    dashboard = {
+        "agency": agency.pk,
+        "agency_name": agency.agency_name or agency.make_payable_to,
+        "hires": {period: stats.get(period, {}).get("placements", 0) for period in PerformanceStats.Period.values},
+        "stats": stats,
+        "team": team(agency),
+        "active_applications": list(active_applications),
+        "payouts": list(payouts),
+        "top_jobs": list(top_jobs),
+    }
+    cache.set(key, dashboard, timeout=settings.AGENCY_DASHBOARD_CACHE_TTL)
+    return dashboard
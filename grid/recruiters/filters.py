@@ -0,0 +1,26 @@
+import django_filters
+
+from django.db.models import Q
+
+from .models import Recruiter
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class RecruiterDirectoryFilter(django_filters.FilterSet):
+    # Comma-separated statuses, e.g. the waitlist queue: status=1,3
+    status = NumberInFilter(field_name="status", lookup_expr="in")
+    # Either the primary or the secondary industry
+    industry = django_filters.UUIDFilter(method="filter_industry")
+    agency = django_filters.UUIDFilter(field_name="agency")
+    country = django_filters.UUIDFilter(field_name="address__country")
+    state = django_filters.UUIDFilter(field_name="address__state")
+
+    class Meta:
+        model = Recruiter
+        fields = ["status", "industry", "agency", "country", "state"]
+
+    def filter_industry(self, queryset, name, value):
+        return queryset.filter(Q(primary_industry=value) | Q(sec_industry=value))
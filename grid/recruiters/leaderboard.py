@@ -0,0 +1,384 @@
+"""
+Recruiter and agency leaderboard.
+
+``RecruiterStats`` and ``AgencyStats`` hold one row per recruiter or agency and period, so the
+leaderboard reads one indexed ``(period, metric)`` range instead of aggregating hires,
+applications, candidates and stage logs on every request.
+
+Saving or deleting a hire, recruiter payment, application, candidate or stage log queues a
+refresh of its recruiter's rows, and of their agency's, on the ``refresh_leaderboard`` task once
+the transaction commits; ids already waiting for a refresh are not queued again. The
+same refresh keeps the agency's ``AgencyJobSummary`` rows for the agency dashboard, for just
+the jobs the write touched. As with
+the financial rollups, a refresh aggregates the source rows again rather than applying a
+delta, so concurrent writers cannot make the numbers drift.
+
+The 30 and 90 day periods slide with time, and cascading deletes and queryset updates bypass
+the hooks, so ``reconcile_leaderboard`` recomputes every row; it runs nightly from
+``CELERY_BEAT_SCHEDULE`` and can be run by hand with the ``reconcile_leaderboard`` command.
+"""
+
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Avg,
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Q,
+    Sum,
+)
+from django.utils import timezone
+
+from grid.candidates.models import Candidate, StageLog
+from grid.hires.models import Hire, RecruiterPayment
+from grid.jobs.models import RecruiterApplication
+from grid.site_settings.exchange_rates import MissingExchangeRate, convert_totals
+from grid.site_settings.models import Currency
+
+from .dashboard import invalidate_agency_dashboards
+from .models import (
+    Agency,
+    AgencyJobSummary,
+    AgencyStats,
+    PerformanceStats,
+    Recruiter,
+    RecruiterStats,
+)
+
+
+Period = PerformanceStats.Period
+
+PERIOD_DAYS = {Period.LAST_30_DAYS: 30, Period.LAST_90_DAYS: 90, Period.ALL_TIME: None}
+
+METRIC_FIELDS = [
+    "placements",
+    "commission",
+    "days_to_hire",
+    "submissions",
+    "stage_moves",
+    "applications_approved",
+    "applications_rejected",
+    "approval_rate",
+]
+EMPTY_METRICS = {
+    "placements": 0,
+    "commission": 0,
+    "days_to_hire": None,
+    "submissions": 0,
+    "stage_moves": 0,
+    "applications_approved": 0,
+    "applications_rejected": 0,
+    "approval_rate": None,
+}
+
+SUMMARY_FIELDS = ["applications_pending", "applications_approved", "submissions", "placements"]
+
+UNCOUNTED_HIRES = [Hire.PaymentStatus.CANCELLED, Hire.PaymentStatus.REFUNDED]
+
+
+def period_start(period, now):
+    days = PERIOD_DAYS[period]
+    return now - timedelta(days=days) if days else None
+
+
+def approval_rate(approved, rejected):
+    return approved / (approved + rejected) if approved + rejected else None
+
+
+def recruiter_metrics(recruiter_ids, start, base_currency):
+    """
+    Return the metrics of activity since ``start`` keyed by recruiter id, with one grouped
+    query per source table. ``recruiter_ids`` of ``None`` covers every recruiter.
+    """
+
+    def scoped(queryset, recruiter_field):
+        if recruiter_ids is not None:
+            queryset = queryset.filter(**{f"{recruiter_field}__in": recruiter_ids})
+        if start is not None:
+            queryset = queryset.filter(created_at__gte=start)
+        return queryset.order_by()
+
+    metrics = {}
+
+    hires = scoped(Hire.objects.exclude(payment_status__in=UNCOUNTED_HIRES), "recruiter")
+    time_to_hire = ExpressionWrapper(F("created_at") - F("candidate__created_at"), output_field=DurationField())
+    for row in hires.values("recruiter").annotate(placements=Count("pk"), time_to_hire=Avg(time_to_hire)):
+        metrics.setdefault(row["recruiter"], {}).update(
+            placements=row["placements"],
+            days_to_hire=row["time_to_hire"].total_seconds() / 86400 if row["time_to_hire"] is not None else None,
+        )
+
+    payments = RecruiterPayment.objects.filter(hire__in=hires).exclude(
+        status=RecruiterPayment.RecruiterPaymentStatus.CANCELLED
+    )
+    try:
+        commissions = (
+            convert_totals(
+                payments, {"commission": "amount"}, base_currency, date_field="due_on", group_by=["hire__recruiter"]
+            )
+            if base_currency
+            else None
+        )
+    except MissingExchangeRate:
+        commissions = None
+    for row in commissions or []:
+        metrics.setdefault(row["hire__recruiter"], {})["commission"] = row["commission"]
+
+    applications = scoped(RecruiterApplication.objects.all(), "recruiter")
+    for row in applications.values("recruiter").annotate(
+        approved=Count("pk", filter=Q(status=RecruiterApplication.ApplicationStatus.APPROVED)),
+        rejected=Count("pk", filter=Q(status=RecruiterApplication.ApplicationStatus.REJECTED)),
+    ):
+        metrics.setdefault(row["recruiter"], {}).update(
+            applications_approved=row["approved"],
+            applications_rejected=row["rejected"],
+            approval_rate=approval_rate(row["approved"], row["rejected"]),
+        )
+
+    candidates = scoped(Candidate.objects.filter(recruiter__isnull=False), "recruiter")
+    for row in candidates.values("recruiter").annotate(count=Count("pk")):
+        metrics.setdefault(row["recruiter"], {})["submissions"] = row["count"]
+
+    stage_logs = scoped(StageLog.objects.filter(candidate__recruiter__isnull=False), "candidate__recruiter")
+    for row in stage_logs.values("candidate__recruiter").annotate(count=Count("pk")):
+        metrics.setdefault(row["candidate__recruiter"], {})["stage_moves"] = row["count"]
+
+    if commissions is None:
+        # Left empty until the rates are loaded and the next refresh or reconciliation runs
+        for values in metrics.values():
+            values["commission"] = None
+    return metrics
+
+
+def base_currency():
+    return Currency.objects.filter(three_letter_code=settings.EXCHANGE_RATE_BASE_CURRENCY).first()
+
+
+def refresh_recruiter_stats(recruiter_ids=None, now=None):
+    """Recompute the stats of ``recruiter_ids``, or of every recruiter when ``None``"""
+    now = now or timezone.now()
+    recruiters = Recruiter.objects.all()
+    if recruiter_ids is not None:
+        recruiters = recruiters.filter(pk__in=recruiter_ids)
+    ids = list(recruiters.values_list("pk", flat=True))
+    if not ids:
+        return 0
+
+    currency = base_currency()
+    rows = []
+    for period in Period:
+        metrics = recruiter_metrics(None if recruiter_ids is None else ids, period_start(period, now), currency)
+        for recruiter_id in ids:
+            values = {**EMPTY_METRICS, **metrics.get(recruiter_id, {})}
+            if currency is None:
+                values["commission"] = None
+            rows.append(RecruiterStats(recruiter_id=recruiter_id, period=period, **values))
+
+    RecruiterStats.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["recruiter", "period"],
+        update_fields=[*METRIC_FIELDS, "refreshed_at"],
+    )
+    return len(rows)
+
+
+def refresh_agency_stats(agency_ids=None):
+    """
+    Recompute the stats of ``agency_ids``, or of every agency when ``None``, by adding up
+    the stats of their recruiters. Agencies left without recruiters lose their rows.
+    """
+    recruiter_rows = RecruiterStats.objects.filter(recruiter__agency__isnull=False)
+    stale = AgencyStats.objects.all()
+    if agency_ids is not None:
+        agency_ids = [agency_id for agency_id in agency_ids if agency_id is not None]
+        recruiter_rows = recruiter_rows.filter(recruiter__agency__in=agency_ids)
+        stale = stale.filter(agency__in=agency_ids)
+
+    totals = (
+        recruiter_rows.order_by()
+        .values("recruiter__agency", "period")
+        .annotate(
+            placements_sum=Sum("placements"),
+            commission_sum=Sum("commission"),
+            commission_missing=Count("pk", filter=Q(commission__isnull=True)),
+            hire_days=Sum(ExpressionWrapper(F("days_to_hire") * F("placements"), output_field=FloatField())),
+            submissions_sum=Sum("submissions"),
+            stage_moves_sum=Sum("stage_moves"),
+            approved_sum=Sum("applications_approved"),
+            rejected_sum=Sum("applications_rejected"),
+        )
+    )
+
+    rows = [
+        AgencyStats(
+            agency_id=row["recruiter__agency"],
+            period=row["period"],
+            placements=row["placements_sum"],
+            commission=None if row["commission_missing"] else row["commission_sum"],
+            days_to_hire=row["hire_days"] / row["placements_sum"] if row["placements_sum"] else None,
+            submissions=row["submissions_sum"],
+            stage_moves=row["stage_moves_sum"],
+            applications_approved=row["approved_sum"],
+            applications_rejected=row["rejected_sum"],
+            approval_rate=approval_rate(row["approved_sum"], row["rejected_sum"]),
+        )
+        for row in totals
+    ]
+
+    with transaction.atomic():
+        stale.exclude(agency__in={row.agency_id for row in rows}).delete()
+        AgencyStats.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["agency", "period"],
+            update_fields=[*METRIC_FIELDS, "refreshed_at"],
+        )
+    return len(rows)
+
+
+def refresh_agency_jobs(agency_ids=None, job_ids=None):
+    """
+    Recompute the dashboard job summaries of ``agency_ids`` on ``job_ids``. ``None`` stands for
+    every agency or every job.
+    """
+    scope = Q(recruiter__agency__isnull=False)
+    stale = AgencyJobSummary.objects.all()
+    if agency_ids is not None:
+        agency_ids = [agency_id for agency_id in agency_ids if agency_id is not None]
+        scope &= Q(recruiter__agency__in=agency_ids)
+        stale = stale.filter(agency__in=agency_ids)
+    if job_ids is not None:
+        scope &= Q(job__in=job_ids)
+        stale = stale.filter(job__in=job_ids)
+
+    statuses = RecruiterApplication.ApplicationStatus
+    sources = [
+        (
+            RecruiterApplication.objects.filter(scope),
+            {
+                "applications_pending": Count("pk", filter=Q(status=statuses.PENDING)),
+                "applications_approved": Count("pk", filter=Q(status=statuses.APPROVED)),
+            },
+        ),
+        (Candidate.objects.filter(scope, job__isnull=False), {"submissions": Count("pk")}),
+        (Hire.objects.filter(scope).exclude(payment_status__in=UNCOUNTED_HIRES), {"placements": Count("pk")}),
+    ]
+
+    summaries = {}
+    for queryset, aggregates in sources:
+        for row in queryset.order_by().values("recruiter__agency", "job").annotate(**aggregates):
+            key = (row.pop("recruiter__agency"), row.pop("job"))
+            summaries.setdefault(key, dict.fromkeys(SUMMARY_FIELDS, 0)).update(row)
+
+    rows = [
+        AgencyJobSummary(agency_id=agency_id, job_id=job_id, **values)
+        for (agency_id, job_id), values in summaries.items()
+        if any(values.values())
+    ]
+    keep = {(row.agency_id, row.job_id) for row in rows}
+    with transaction.atomic():
+        stale_ids = [pk for pk, *key in stale.values_list("pk", "agency", "job") if tuple(key) not in keep]
+        AgencyJobSummary.objects.filter(pk__in=stale_ids).delete()
+        AgencyJobSummary.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["agency", "job"],
+            update_fields=[*SUMMARY_FIELDS, "refreshed_at"],
+        )
+    return len(rows)
+
+
+def refresh_leaderboard(recruiter_ids, agency_ids=(), jobs=(), now=None):
+    """
+    Refresh ``recruiter_ids`` and their agencies, plus the other ``agency_ids`` given.
+
+    Job summaries are recomputed for every job of ``agency_ids``, and for the
+    ``(recruiter_id, job_id)`` pairs of ``jobs`` in those recruiters' current agencies.
+    """
+    refresh_recruiter_stats(recruiter_ids, now=now)
+    agency_ids = {agency_id for agency_id in agency_ids if agency_id is not None}
+    agencies = set(Recruiter.objects.filter(pk__in=recruiter_ids).values_list("agency", flat=True)) | agency_ids
+    refresh_agency_stats(agencies)
+    if agency_ids:
+        refresh_agency_jobs(agency_ids)
+
+    job_agencies = set(
+        Recruiter.objects.filter(pk__in={recruiter_id for recruiter_id, _ in jobs}, agency__isnull=False)
+        .exclude(agency__in=agency_ids)
+        .values_list("agency", flat=True)
+    )
+    if job_agencies:
+        refresh_agency_jobs(job_agencies, {job_id for _, job_id in jobs})
+    invalidate_agency_dashboards(agencies | job_agencies)
+
+
+def refresh_key(kind, pk):
+    return f"leaderboard-refresh:{kind}:{pk}"
+
+
+def schedule_recruiter_stats(recruiter_ids, agency_ids=(), jobs=()):
+    """
+    Queue a refresh of the stats of ``recruiter_ids`` and their agencies once the current
+    transaction commits, along with any other ``agency_ids``. ``jobs`` are the
+    ``(recruiter_id, job_id)`` pairs whose dashboard job summaries the write touched.
+    ``None`` ids are ignored.
+    """
+    recruiter_ids = {recruiter_id for recruiter_id in recruiter_ids if recruiter_id is not None}
+    agency_ids = {agency_id for agency_id in agency_ids if agency_id is not None}
+    jobs = {(recruiter_id, job_id) for recruiter_id, job_id in jobs if None not in (recruiter_id, job_id)}
+    if recruiter_ids or agency_ids or jobs:
+        transaction.on_commit(partial(queue_leaderboard_refresh, recruiter_ids, agency_ids, jobs))
+
+
+def queue_leaderboard_refresh(recruiter_ids, agency_ids=(), jobs=()):
+    """
+    Queue the ``refresh_leaderboard`` task for the ids that are not already waiting for one.
+
+    Each queued id holds a cache key until the task starts, so a burst of writes for one
+    recruiter costs a single refresh. The keys expire after ``LEADERBOARD_REFRESH_LOCK_TTL``
+    seconds in case a task is lost, and the nightly reconcile catches up on anything missed.
+
+    The worker releases the keys, so this needs the cache shared with it; without one
+    (``LEADERBOARD_REFRESH_DEDUP`` off) every write queues its own refresh.
+    """
+    from .tasks import refresh_leaderboard as refresh_task
+
+    def unqueued(kind, ids):
+        if not settings.LEADERBOARD_REFRESH_DEDUP:
+            return [str(pk) for pk in ids]
+        return [str(pk) for pk in ids if cache.add(refresh_key(kind, pk), True, settings.LEADERBOARD_REFRESH_LOCK_TTL)]
+
+    recruiter_ids, agency_ids = unqueued("recruiter", recruiter_ids), unqueued("agency", agency_ids)
+    jobs = [pair.split(":") for pair in unqueued("job", [f"{recruiter_id}:{job_id}" for recruiter_id, job_id in jobs])]
+    if recruiter_ids or agency_ids or jobs:
+        refresh_task.delay(recruiter_ids, agency_ids, jobs)
+
+
+def release_leaderboard_refresh(recruiter_ids, agency_ids=(), jobs=()):
+    """Let writes from now on queue another refresh of these ids"""
+    cache.delete_many(
+        [refresh_key("recruiter", pk) for pk in recruiter_ids]
+        + [refresh_key("agency", pk) for pk in agency_ids]
+        + [refresh_key("job", f"{recruiter_id}:{job_id}") for recruiter_id, job_id in jobs]
+    )
+
+
+def reconcile_leaderboard(now=None):
+    """Recompute every recruiter and agency row; returns the number of rows of each"""
+    with transaction.atomic():
+        recruiters = refresh_recruiter_stats(now=now)
+        agencies = refresh_agency_stats()
+        refresh_agency_jobs()
+        invalidate_agency_dashboards(Agency.objects.values_list("pk", flat=True))
+    return {"recruiters": recruiters, "agencies": agencies}
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from grid.recruiters.leaderboard import reconcile_leaderboard
+
+
+class Command(BaseCommand):
+    help = "Recompute the recruiter and agency leaderboard stats from hires, applications and candidates"
+
+    def handle(self, *args, **options):
+        rows = reconcile_leaderboard()
+        self.stdout.write(
+            self.style.SUCCESS(f"Refreshed {rows['recruiters']} recruiter and {rows['agencies']} agency rows")
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recruiters", "0012_alter_recruiter_agency"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LinkedInEnrichment",
+            fields=[
+                ("uuid", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="created")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="updated")),
+                ("is_active", models.BooleanField(db_index=True, default=True)),
+                ("linkedin", models.URLField(max_length=255)),
+                (
+                    "status",
+                    models.SmallIntegerField(
+                        choices=[(0, "Pending"), (1, "Running"), (2, "Completed"), (3, "Failed")], default=0
+                    ),
+                ),
+                ("data", models.JSONField(blank=True, null=True)),
+                ("error", models.TextField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "recruiter",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="linkedin_enrichments",
+                        to="recruiters.recruiter",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:57
+
+from django.db import migrations, models
+import grid.core.storage
+import grid.recruiters.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recruiters", "0013_linkedinenrichment"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="recruiter",
+            name="profile_photo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=grid.core.storage.ContentAddressedStorage(),
+                upload_to=grid.recruiters.models.get_recruiter_photo_path,
+                validators=[grid.recruiters.models.validate_image_size],
+            ),
+        ),
+    ]
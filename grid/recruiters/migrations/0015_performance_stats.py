@@ -0,0 +1,133 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recruiters", "0014_content_addressed_images"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AgencyStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("30d", "Last 30 days"), ("90d", "Last 90 days"), ("all", "All time")], max_length=3
+                    ),
+                ),
+                ("placements", models.PositiveIntegerField(default=0)),
+                (
+                    "commission",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="Scheduled payouts in EXCHANGE_RATE_BASE_CURRENCY; empty while an exchange rate is missing",
+                        max_digits=14,
+                        null=True,
+                    ),
+                ),
+                (
+                    "days_to_hire",
+                    models.FloatField(blank=True, help_text="Mean days from submission to hire", null=True),
+                ),
+                ("submissions", models.PositiveIntegerField(default=0)),
+                ("stage_moves", models.PositiveIntegerField(default=0)),
+                ("applications_approved", models.PositiveIntegerField(default=0)),
+                ("applications_rejected", models.PositiveIntegerField(default=0)),
+                (
+                    "approval_rate",
+                    models.FloatField(blank=True, help_text="Share of decided applications approved", null=True),
+                ),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "agency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="stats", to="recruiters.agency"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Agency stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="RecruiterStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("30d", "Last 30 days"), ("90d", "Last 90 days"), ("all", "All time")], max_length=3
+                    ),
+                ),
+                ("placements", models.PositiveIntegerField(default=0)),
+                (
+                    "commission",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="Scheduled payouts in EXCHANGE_RATE_BASE_CURRENCY; empty while an exchange rate is missing",
+                        max_digits=14,
+                        null=True,
+                    ),
+                ),
+                (
+                    "days_to_hire",
+                    models.FloatField(blank=True, help_text="Mean days from submission to hire", null=True),
+                ),
+                ("submissions", models.PositiveIntegerField(default=0)),
+                ("stage_moves", models.PositiveIntegerField(default=0)),
+                ("applications_approved", models.PositiveIntegerField(default=0)),
+                ("applications_rejected", models.PositiveIntegerField(default=0)),
+                (
+                    "approval_rate",
+                    models.FloatField(blank=True, help_text="Share of decided applications approved", null=True),
+                ),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "recruiter",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="stats", to="recruiters.recruiter"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Recruiter stats",
+                "indexes": [
+                    models.Index(fields=["period", "-placements"], name="recruiters_stats_place_idx"),
+                    models.Index(fields=["period", "-commission"], name="recruiters_stats_comm_idx"),
+                    models.Index(fields=["period", "days_to_hire"], name="recruiters_stats_days_idx"),
+                    models.Index(fields=["period", "-approval_rate"], name="recruiters_stats_appr_idx"),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="recruiterstats",
+            constraint=models.UniqueConstraint(fields=("recruiter", "period"), name="recruiters_stats_uniq"),
+        ),
+        migrations.AddIndex(
+            model_name="agencystats",
+            index=models.Index(fields=["period", "-placements"], name="agency_stats_place_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="agencystats",
+            index=models.Index(fields=["period", "-commission"], name="agency_stats_comm_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="agencystats",
+            index=models.Index(fields=["period", "days_to_hire"], name="agency_stats_days_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="agencystats",
+            index=models.Index(fields=["period", "-approval_rate"], name="agency_stats_appr_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="agencystats",
+            constraint=models.UniqueConstraint(fields=("agency", "period"), name="recruiters_agency_stats_uniq"),
+        ),
+    ]
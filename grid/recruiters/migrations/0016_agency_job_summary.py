@@ -0,0 +1,47 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0013_alter_job_expected_commission_alter_job_signup_bonus_and_more"),
+        ("recruiters", "0015_performance_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AgencyJobSummary",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("applications_pending", models.PositiveIntegerField(default=0)),
+                ("applications_approved", models.PositiveIntegerField(default=0)),
+                ("submissions", models.PositiveIntegerField(default=0)),
+                ("placements", models.PositiveIntegerField(default=0)),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "agency",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="job_summaries",
+                        to="recruiters.agency",
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="agency_summaries", to="jobs.job"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Agency job summaries",
+                "indexes": [models.Index(fields=["agency", "-placements", "-submissions"], name="agency_job_top_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="agencyjobsummary",
+            constraint=models.UniqueConstraint(fields=("agency", "job"), name="recruiters_agency_job_uniq"),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:12
+
+from itertools import islice
+
+from django.db import migrations, models
+
+from grid.core.fulltext import AddFullTextIndex
+from grid.core.trigram import search_document
+
+
+SEARCH_FIELDS = ["first_name", "last_name", "introduction", "story"]
+
+
+def build_search_documents(apps, schema_editor):
+    Recruiter = apps.get_model("recruiters", "Recruiter")
+    rows = Recruiter.objects.order_by().values_list("pk", *SEARCH_FIELDS).iterator(chunk_size=1000)
+    while chunk := list(islice(rows, 1000)):
+        Recruiter.objects.bulk_update(
+            [Recruiter(pk=pk, search_document=search_document(values)) for pk, *values in chunk], ["search_document"]
+        )
+
+
+class Migration(migrations.Migration):
+    # The PostgreSQL index is built concurrently, which cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("recruiters", "0016_agency_job_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recruiter",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+        AddFullTextIndex(model_name="recruiter", field_name="search_document"),
+        migrations.AddIndex(
+            model_name="recruiter",
+            index=models.Index(fields=["status", "-created_at"], name="recruiters_status_created_idx"),
+        ),
+    ]
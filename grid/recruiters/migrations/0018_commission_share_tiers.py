@@ -0,0 +1,82 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+from grid.core.fulltext import AddFullTextIndex
+
+
+def keep_existing_shares(apps, schema_editor):
+    # Shares so far were all entered by hand
+    Recruiter = apps.get_model("recruiters", "Recruiter")
+    Recruiter.objects.filter(commission_share__isnull=False).update(commission_share_manual=True)
+
+
+class Migration(migrations.Migration):
+    # The PostgreSQL index is built concurrently, which cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("recruiters", "0017_recruiter_search_document"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recruiter",
+            name="commission_share_manual",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(keep_existing_shares, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="recruiter",
+            name="commission_share",
+            field=models.SmallIntegerField(
+                blank=True,
+                help_text="Percentage of the commission paid out; empty follows the RecruiterShare tiers",
+                null=True,
+            ),
+        ),
+        migrations.CreateModel(
+            name="CommissionShareChange",
+            fields=[
+                ("uuid", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="created")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="updated")),
+                ("is_active", models.BooleanField(db_index=True, default=True)),
+                ("previous_share", models.SmallIntegerField(blank=True, null=True)),
+                ("new_share", models.SmallIntegerField(blank=True, null=True)),
+                (
+                    "hire_count",
+                    models.PositiveIntegerField(
+                        blank=True, help_text="Rolling hire count the tier was read at", null=True
+                    ),
+                ),
+                (
+                    "reason",
+                    models.SmallIntegerField(
+                        choices=[
+                            (0, "Hire created or cancelled"),
+                            (1, "Tier table changed"),
+                            (2, "Scheduled recompute"),
+                            (3, "Set by an admin"),
+                        ]
+                    ),
+                ),
+                (
+                    "recruiter",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="commission_share_changes",
+                        to="recruiters.recruiter",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [models.Index(fields=["recruiter", "-created_at"], name="recruiters_share_change_idx")],
+            },
+        ),
+        # SQLite rebuilt the recruiter table above, dropping the full-text triggers
+        AddFullTextIndex(model_name="recruiter", field_name="search_document"),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 
 from grid.clients.models import Address
 from grid.core.models import CoreModel
+from grid.core.storage import content_addressed_storage
+from grid.core.trigram import search_document
 
 
 class Agency(CoreModel):
@@ -125,18 +127,233 @@ class Recruiter(CoreModel):
         "JobCategory", on_delete=models.SET_NULL, null=True, blank=True, related_name="secondary_recruiters"
     )
     address = models.ForeignKey("clients.Address", on_delete=models.SET_NULL, null=True, blank=True)
-    commission_share = models.SmallIntegerField(null=True, blank=True)
+    commission_share = models.SmallIntegerField(
+        null=True, blank=True, help_text="Percentage of the commission paid out; empty follows the RecruiterShare tiers"
+    )
+    # Set when an admin chose the share; the tier engine in grid.recruiters.commission leaves those alone
+    commission_share_manual = models.BooleanField(default=False, editable=False)
     status = models.SmallIntegerField(choices=RecruiterStatus.choices, default=RecruiterStatus.PENDING_SIGNUP)
     agency = models.ForeignKey("Agency", on_delete=models.SET_NULL, null=True, blank=True, related_name="recruiters")
     stripe_id = models.CharField(max_length=255, null=True, blank=True)
     profile_photo = models.ImageField(
-        upload_to=get_recruiter_photo_path, validators=[validate_image_size], blank=True, null=True
+        upload_to=get_recruiter_photo_path,
+        storage=content_addressed_storage,
+        validators=[validate_image_size],
+        blank=True,
+        null=True,
     )
     linkedin = models.URLField(max_length=255)
     superuser = models.BooleanField(default=False)
+    # SEARCH_FIELDS values, one per line, behind a full-text index (see grid.core.fulltext)
+    search_document = models.TextField(blank=True, default="", editable=False)
+
+    SEARCH_FIELDS = ["first_name", "last_name", "introduction", "story"]
 
     class Meta:
         ordering = ["last_name", "first_name"]
+        indexes = [
+            # The admin directory lists a status, newest first
+            models.Index(fields=["status", "-created_at"], name="recruiters_status_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
+
+    def build_search_document(self):
+        return search_document(getattr(self, field) for field in self.SEARCH_FIELDS)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stats_agency_id = instance.agency_id if "agency_id" in field_names else None
+        if "commission_share" in field_names:
+            instance._loaded_commission_share = instance.commission_share
+        return instance
+
+    def commission_share_changed(self, update_fields):
+        if update_fields is not None and "commission_share" not in update_fields:
+            return False
+        if self._state.adding:
+            return self.commission_share is not None
+        # Unknown when the share was not loaded
+        return hasattr(self, "_loaded_commission_share") and self.commission_share != self._loaded_commission_share
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        extra_fields = set()
+        if update_fields is None or set(update_fields) & set(self.SEARCH_FIELDS):
+            self.search_document = self.build_search_document()
+            extra_fields.add("search_document")
+        share_changed = self.commission_share_changed(update_fields)
+        if share_changed:
+            # A share set by hand overrides the tiers until it is cleared
+            self.commission_share_manual = self.commission_share is not None
+            extra_fields.add("commission_share_manual")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *extra_fields}
+        previous_share = getattr(self, "_loaded_commission_share", None)
+        super().save(*args, **kwargs)
+        from grid.recruiters.commission import record_manual_share
+        from grid.recruiters.dashboard import invalidate_agency_dashboards
+        from grid.recruiters.leaderboard import schedule_recruiter_stats
+
+        if share_changed:
+            record_manual_share(self, previous_share)
+        self._loaded_commission_share = self.commission_share
+
+        loaded_agency_id = getattr(self, "_stats_agency_id", None)
+        if self.agency_id != loaded_agency_id:
+            # Moving between agencies changes both agencies' leaderboard rows and job summaries
+            schedule_recruiter_stats([self.pk], [loaded_agency_id, self.agency_id])
+            self._stats_agency_id = self.agency_id
+        else:
+            # The team list shows names, photos and roles
+            invalidate_agency_dashboards([self.agency_id])
+
+
+class LinkedInEnrichment(CoreModel):
+    """Profile data fetched from LinkedIn in the background after a recruiter signs up"""
+
+    class EnrichmentStatus(models.IntegerChoices):
+        PENDING = 0, "Pending"
+        RUNNING = 1, "Running"
+        COMPLETED = 2, "Completed"
+        FAILED = 3, "Failed"
+
+    recruiter = models.ForeignKey(Recruiter, on_delete=models.CASCADE, related_name="linkedin_enrichments")
+    linkedin = models.URLField(max_length=255)
+    status = models.SmallIntegerField(choices=EnrichmentStatus.choices, default=EnrichmentStatus.PENDING)
+    data = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.recruiter} - {self.get_status_display()}"
+
+
+class PerformanceStats(models.Model):
+    """
+    Leaderboard metrics over one period, maintained by ``grid.recruiters.leaderboard``.
+
+    Placements and time to hire follow the hire's creation date, applications, submissions
+    and stage moves their own creation dates. Cancelled and refunded hires are not counted.
+    """
+
+    class Period(models.TextChoices):
+        LAST_30_DAYS = "30d", "Last 30 days"
+        LAST_90_DAYS = "90d", "Last 90 days"
+        ALL_TIME = "all", "All time"
+
+    period = models.CharField(max_length=3, choices=Period.choices)
+    placements = models.PositiveIntegerField(default=0)
+    commission = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Scheduled payouts in EXCHANGE_RATE_BASE_CURRENCY; empty while an exchange rate is missing",
+    )
+    days_to_hire = models.FloatField(null=True, blank=True, help_text="Mean days from submission to hire")
+    submissions = models.PositiveIntegerField(default=0)
+    stage_moves = models.PositiveIntegerField(default=0)
+    applications_approved = models.PositiveIntegerField(default=0)
+    applications_rejected = models.PositiveIntegerField(default=0)
+    approval_rate = models.FloatField(null=True, blank=True, help_text="Share of decided applications approved")
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class RecruiterStats(PerformanceStats):
+    recruiter = models.ForeignKey(Recruiter, on_delete=models.CASCADE, related_name="stats")
+
+    class Meta:
+        verbose_name_plural = "Recruiter stats"
+        constraints = [
+            models.UniqueConstraint(fields=["recruiter", "period"], name="recruiters_stats_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["period", "-placements"], name="recruiters_stats_place_idx"),
+            models.Index(fields=["period", "-commission"], name="recruiters_stats_comm_idx"),
+            models.Index(fields=["period", "days_to_hire"], name="recruiters_stats_days_idx"),
+            models.Index(fields=["period", "-approval_rate"], name="recruiters_stats_appr_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.recruiter_id} {self.period}"
+
+
+class AgencyStats(PerformanceStats):
+    agency = models.ForeignKey(Agency, on_delete=models.CASCADE, related_name="stats")
+
+    class Meta:
+        verbose_name_plural = "Agency stats"
+        constraints = [
+            models.UniqueConstraint(fields=["agency", "period"], name="recruiters_agency_stats_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["period", "-placements"], name="agency_stats_place_idx"),
+            models.Index(fields=["period", "-commission"], name="agency_stats_comm_idx"),
+            models.Index(fields=["period", "days_to_hire"], name="agency_stats_days_idx"),
+            models.Index(fields=["period", "-approval_rate"], name="agency_stats_appr_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.agency_id} {self.period}"
+
+
+class AgencyJobSummary(models.Model):
+    """
+    All-time activity of one agency's recruiters on one job, for the agency dashboard.
+
+    Maintained by ``grid.recruiters.leaderboard.refresh_agency_jobs`` alongside the leaderboard stats.
+    """
+
+    agency = models.ForeignKey(Agency, on_delete=models.CASCADE, related_name="job_summaries")
+    job = models.ForeignKey("jobs.Job", on_delete=models.CASCADE, related_name="agency_summaries")
+    applications_pending = models.PositiveIntegerField(default=0)
+    applications_approved = models.PositiveIntegerField(default=0)
+    submissions = models.PositiveIntegerField(default=0)
+    placements = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Agency job summaries"
+        constraints = [
+            models.UniqueConstraint(fields=["agency", "job"], name="recruiters_agency_job_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["agency", "-placements", "-submissions"], name="agency_job_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.agency_id} {self.job_id}"
+
+
+class CommissionShareChange(CoreModel):
+    """Audit trail of ``Recruiter.commission_share``"""
+
+    class Reason(models.IntegerChoices):
+        HIRE = 0, "Hire created or cancelled"
+        TIERS = 1, "Tier table changed"
+        RECOMPUTE = 2, "Scheduled recompute"
+        MANUAL = 3, "Set by an admin"
+
+    recruiter = models.ForeignKey(Recruiter, on_delete=models.CASCADE, related_name="commission_share_changes")
+    previous_share = models.SmallIntegerField(null=True, blank=True)
+    new_share = models.SmallIntegerField(null=True, blank=True)
+    hire_count = models.PositiveIntegerField(null=True, blank=True, help_text="Rolling hire count the tier was read at")
+    reason = models.SmallIntegerField(choices=Reason.choices)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["recruiter", "-created_at"], name="recruiters_share_change_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.recruiter_id}: {self.previous_share} -> {self.new_share}"
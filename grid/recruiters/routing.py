@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import consumers
+
+
+websocket_urlpatterns = [
+    path("ws/recruiters/linkedin/", consumers.LinkedInEnrichmentConsumer.as_asgi()),
+]
@@ -4,9 +4,17 @@ from django.db import transaction
 from rest_framework import serializers
 
 from grid.clients.models import Address
+from grid.core.images import ImageVariantsField
 from grid.core.validators import validate_linkedin_profile_url, validate_phone_number
-from grid.recruiters.models import Agency, BankAccount, JobCategory, Recruiter
-from grid.recruiters.utils import process_person_linkedin_data
+from grid.recruiters.models import (
+    Agency,
+    AgencyStats,
+    BankAccount,
+    JobCategory,
+    LinkedInEnrichment,
+    Recruiter,
+    RecruiterStats,
+)
 from grid.users.choices import InviteStatus
 from grid.users.models import TeamInvite
 
@@ -18,9 +26,11 @@ class JobCategorySerializer(serializers.ModelSerializer):
 
 
 class RecruiterSerializer(serializers.ModelSerializer):
+    profile_photo_variants = ImageVariantsField(source="profile_photo")
+
     class Meta:
         model = Recruiter
-        fields = "__all__"
+        exclude = ["search_document"]
         extra_kwargs = {
             "status": {"read_only": True},
             "primary_industry": {"read_only": True},
@@ -80,6 +90,40 @@ class RecruiterSerializer(serializers.ModelSerializer):
         return data
 
 
+class RecruiterDirectorySerializer(serializers.ModelSerializer):
+    """A row of the admin recruiter directory; ``snippet`` and ``rank`` are set when searching"""
+
+    email = serializers.EmailField(source="user.email", read_only=True)
+    primary_industry_name = serializers.CharField(source="primary_industry.name", read_only=True, default=None)
+    agency_name = serializers.CharField(source="agency.agency_name", read_only=True, default=None)
+    country_name = serializers.CharField(source="address.country.name", read_only=True, default=None)
+    state_name = serializers.CharField(source="address.state.name", read_only=True, default=None)
+    profile_photo_variants = ImageVariantsField(source="profile_photo")
+    snippet = serializers.CharField(source="search_snippet", read_only=True, default=None)
+    rank = serializers.FloatField(source="search_rank", read_only=True, default=None)
+
+    class Meta:
+        model = Recruiter
+        fields = [
+            "uuid",
+            "first_name",
+            "last_name",
+            "email",
+            "status",
+            "primary_industry",
+            "primary_industry_name",
+            "agency",
+            "agency_name",
+            "country_name",
+            "state_name",
+            "profile_photo_variants",
+            "created_at",
+            "snippet",
+            "rank",
+        ]
+        read_only_fields = fields
+
+
 class RestrictedRecruiterSerializer(RecruiterSerializer):
     """Serializer for non-superuser recruiters"""
 
@@ -247,9 +291,65 @@ class RecruiterSignupResponseSerializer(serializers.Serializer):
     recruiter = serializers.CharField(allow_null=True)
     agency = serializers.CharField(allow_null=True, required=False)
     linkedin_data = serializers.JSONField(allow_null=True, required=False)
+    linkedin_enrichment = serializers.JSONField(allow_null=True, required=False)
+
+    class Meta:
+        fields = ["message", "recruiter", "agency", "linkedin_data", "linkedin_enrichment"]
+
+
+LEADERBOARD_FIELDS = [
+    "rank",
+    "placements",
+    "commission",
+    "days_to_hire",
+    "submissions",
+    "stage_moves",
+    "applications_approved",
+    "applications_rejected",
+    "approval_rate",
+    "refreshed_at",
+]
+
+
+class LeaderboardSerializerMixin:
+    """Commission is shown to admins only"""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get("request")
+        if not (request and request.user.is_admin):
+            data.pop("commission", None)
+        return data
+
+
+class RecruiterStatsSerializer(LeaderboardSerializerMixin, serializers.ModelSerializer):
+    rank = serializers.IntegerField(read_only=True)
+    recruiter_name = serializers.SerializerMethodField()
+    agency = serializers.UUIDField(source="recruiter.agency_id", read_only=True)
+    agency_name = serializers.CharField(source="recruiter.agency.agency_name", read_only=True, default=None)
+    profile_photo_variants = ImageVariantsField(source="recruiter.profile_photo")
+
+    class Meta:
+        model = RecruiterStats
+        fields = ["recruiter", "recruiter_name", "agency", "agency_name", "profile_photo_variants", *LEADERBOARD_FIELDS]
+
+    def get_recruiter_name(self, obj):
+        return str(obj.recruiter)
+
+
+class AgencyStatsSerializer(LeaderboardSerializerMixin, serializers.ModelSerializer):
+    rank = serializers.IntegerField(read_only=True)
+    agency_name = serializers.CharField(source="agency.agency_name", read_only=True)
+
+    class Meta:
+        model = AgencyStats
+        fields = ["agency", "agency_name", *LEADERBOARD_FIELDS]
+
 
+class LinkedInEnrichmentSerializer(serializers.ModelSerializer):
     class Meta:
-        fields = ["message", "recruiter", "agency", "linkedin_data"]
+        model = LinkedInEnrichment
+        fields = ["uuid", "linkedin", "status", "data", "error", "completed_at", "created_at"]
 
 
 # Define country-specific banking fields
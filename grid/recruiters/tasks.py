@@ -0,0 +1,76 @@
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from channels.layers import get_channel_layer
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from grid.core.helpers import get_person_data
+from grid.recruiters.commission import recompute_commission_shares as recompute_shares
+from grid.recruiters.consumers import enrichment_group_name
+from grid.recruiters.leaderboard import (
+    reconcile_leaderboard as reconcile_leaderboard_stats,
+)
+from grid.recruiters.leaderboard import refresh_leaderboard as refresh_leaderboard_stats
+from grid.recruiters.leaderboard import release_leaderboard_refresh
+from grid.recruiters.models import CommissionShareChange, LinkedInEnrichment
+from grid.recruiters.serializers import LinkedInEnrichmentSerializer
+from grid.recruiters.utils import extract_linkedin_data
+
+
+def notify_enrichment(enrichment):
+    """Push the enrichment's state to the recruiter's open WebSocket connections"""
+    text = JSONRenderer().render(LinkedInEnrichmentSerializer(enrichment).data).decode()
+    async_to_sync(get_channel_layer().group_send)(
+        enrichment_group_name(enrichment.recruiter.user_id), {"type": "enrichment.update", "text": text}
+    )
+
+
+@shared_task
+def enrich_recruiter_linkedin(enrichment_id):
+    """
+    Fetch the recruiter's LinkedIn profile, keep the extracted fields on the enrichment and
+    use the profile picture as the recruiter's photo unless they already uploaded one
+    """
+    enrichment = LinkedInEnrichment.objects.select_related("recruiter").get(pk=enrichment_id)
+    enrichment.status = LinkedInEnrichment.EnrichmentStatus.RUNNING
+    enrichment.save(update_fields=["status", "updated_at"])
+    notify_enrichment(enrichment)
+
+    try:
+        linkedin_data = extract_linkedin_data(get_person_data(enrichment.linkedin) or {})
+    except Exception as e:
+        enrichment.status = LinkedInEnrichment.EnrichmentStatus.FAILED
+        enrichment.error = str(e)
+    else:
+        profile_photo = linkedin_data.pop("profile_photo")
+        recruiter = enrichment.recruiter
+        if profile_photo and not recruiter.profile_photo:
+            recruiter.profile_photo = profile_photo
+            recruiter.save(update_fields=["profile_photo", "updated_at"])
+
+        enrichment.status = LinkedInEnrichment.EnrichmentStatus.COMPLETED
+        enrichment.data = linkedin_data
+
+    enrichment.completed_at = timezone.now()
+    enrichment.save(update_fields=["status", "data", "error", "completed_at", "updated_at"])
+    notify_enrichment(enrichment)
+
+
+@shared_task
+def refresh_leaderboard(recruiter_ids, agency_ids=(), jobs=()):
+    """Refresh the stats of the recruiters and agencies whose hires, applications or candidates changed"""
+    # Released first, so writes made while this runs queue another refresh
+    release_leaderboard_refresh(recruiter_ids, agency_ids, jobs)
+    refresh_leaderboard_stats(recruiter_ids, agency_ids, jobs)
+
+
+@shared_task
+def reconcile_leaderboard():
+    """Nightly: slide the 30 and 90 day periods and catch up writes that bypassed the hooks"""
+    return reconcile_leaderboard_stats()
+
+
+@shared_task
+def recompute_commission_shares(reason=CommissionShareChange.Reason.RECOMPUTE):
+    """Move every recruiter to their current tier, after a tier change and nightly as hires age out of the window"""
+    return recompute_shares(reason=reason)
@@ -1,4 +1,607 @@
-from django.test import TestCase
+import shutil
+import tempfile
 
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from urllib.parse import unquote
 
-# Create your tests here.
+import requests
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from grid.candidates.models import Candidate
+from grid.clients.models import Client
+from grid.hires.models import Hire, RecruiterPayment
+from grid.jobs.models import Job, RecruiterApplication
+from grid.recruiters.commission import recompute_commission_shares, tier_percentage
+from grid.recruiters.consumers import enrichment_group_name
+from grid.recruiters.leaderboard import reconcile_leaderboard
+from grid.recruiters.models import (
+    Agency,
+    AgencyJobSummary,
+    AgencyStats,
+    CommissionShareChange,
+    JobCategory,
+    LinkedInEnrichment,
+    Recruiter,
+    RecruiterStats,
+)
+from grid.recruiters.utils import download_image
+from grid.recruiters.views import (
+    AgencyViewSet,
+    LeaderboardViewSet,
+    RecruiterSignupViewSet,
+    RecruiterViewSet,
+)
+from grid.site_settings.models import Country, Currency, RecruiterShare
+from grid.users.choices import Roles
+
+
+User = get_user_model()
+
+LINKEDIN_URL = "https://www.linkedin.com/in/jane-doe"
+PERSON_DATA = {
+    "profile_pic_url": "https://media.example.com/jane.png",
+    "headline": "Technical recruiter",
+    "summary": "Placing engineers since 2015",
+    "country": "US",
+    "country_full_name": "United States of America",
+    "state": "California",
+}
+
+
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class LinkedInEnrichmentTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user(
+            email="recruiter@example.com", password="testpass123", role=Roles.RECRUITER
+        )
+        self.category = JobCategory.objects.create(name="Engineering")
+        self.factory = APIRequestFactory()
+
+    def signup(self):
+        request = self.factory.post(
+            "/api/recruiters/signup/basic_info/",
+            {
+                "first_name": "Jane",
+                "last_name": "Doe",
+                "primary_industry": str(self.category.uuid),
+                "linkedin": LINKEDIN_URL,
+            },
+            format="json",
+        )
+        force_authenticate(request, user=self.user)
+        return RecruiterSignupViewSet.as_view({"post": "basic_info"})(request)
+
+    def poll(self):
+        request = self.factory.get("/api/recruiters/signup/linkedin_enrichment/")
+        force_authenticate(request, user=self.user)
+        return RecruiterSignupViewSet.as_view({"get": "linkedin_enrichment"})(request)
+
+    @patch("grid.recruiters.utils.download_image")
+    @patch("grid.recruiters.tasks.get_person_data")
+    def test_signup_returns_before_enrichment_and_applies_it_after_commit(self, get_person_data, download_image):
+        get_person_data.return_value = PERSON_DATA
+        download_image.return_value = ContentFile(b"png", name="profile_photo.png")
+
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(enrichment_group_name(self.user.pk), channel)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.signup()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["linkedin_enrichment"]["status"], LinkedInEnrichment.EnrichmentStatus.PENDING)
+        get_person_data.assert_not_called()
+        self.assertFalse(Recruiter.objects.get(user=self.user).profile_photo)
+
+        for callback in callbacks:
+            callback()
+
+        get_person_data.assert_called_once_with(LINKEDIN_URL)
+        enrichment = LinkedInEnrichment.objects.get()
+        self.assertEqual(enrichment.status, LinkedInEnrichment.EnrichmentStatus.COMPLETED)
+        self.assertEqual(enrichment.data["headline"], "Technical recruiter")
+        self.assertNotIn("profile_photo", enrichment.data)
+        self.assertIsNotNone(enrichment.completed_at)
+        self.assertTrue(Recruiter.objects.get(user=self.user).profile_photo.name.endswith(".png"))
+
+        polled = self.poll()
+        self.assertEqual(polled.status_code, 200)
+        self.assertEqual(polled.data["status"], LinkedInEnrichment.EnrichmentStatus.COMPLETED)
+
+        updates = [async_to_sync(layer.receive)(channel) for _ in range(2)]
+        self.assertIn('"status":1', updates[0]["text"])
+        self.assertIn('"status":2', updates[1]["text"])
+
+    @patch("grid.recruiters.tasks.get_person_data")
+    def test_failed_enrichment_keeps_the_signup(self, get_person_data):
+        get_person_data.side_effect = requests.HTTPError("429 Too Many Requests")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.signup()
+
+        self.assertEqual(response.status_code, 201)
+        recruiter = Recruiter.objects.get(user=self.user)
+        self.assertFalse(recruiter.profile_photo)
+
+        polled = self.poll()
+        self.assertEqual(polled.data["status"], LinkedInEnrichment.EnrichmentStatus.FAILED)
+        self.assertEqual(polled.data["error"], "429 Too Many Requests")
+
+    def test_poll_without_enrichment(self):
+        self.assertEqual(self.poll().status_code, 404)
+
+    @patch("grid.recruiters.utils.requests.get")
+    def test_unusable_profile_picture_is_logged(self, get):
+        get.return_value.status_code = 200
+        get.return_value.content = b"not an image"
+        with self.assertLogs("grid.recruiters.utils", "WARNING") as logs:
+            self.assertIsNone(download_image("https://media.licdn.com/photo"))
+        self.assertIn("https://media.licdn.com/photo", logs.output[0])
+
+
+class PerformanceTestMixin:
+    """Shared fixtures for leaderboard and dashboard tests"""
+
+    def create_fixtures(self):
+        self.currency = Currency.objects.create(
+            name="US Dollar",
+            three_letter_code="USD",
+            symbol="$",
+            job_posting_fee=0,
+            extra_role_fee=0,
+            top_job_fee=0,
+            salary_min=0,
+            commission_min=0,
+        )
+        country = Country.objects.create(
+            name="United States", two_letter_code="US", three_letter_code="USA", currency=self.currency
+        )
+        self.client_company = Client.objects.create(company_name="Test Company", country=country)
+        self.job = Job.objects.create(
+            title="Engineer", salary_min=100000, min_book_of_business=0, client=self.client_company
+        )
+        self.agency = Agency.objects.create(agency_name="Test Agency", make_payable_to="Test Agency")
+        self.alice = self.create_recruiter("alice", agency=self.agency)
+        self.bob = self.create_recruiter("bob", agency=self.agency)
+        self.admin = User.objects.create_user(email="admin@example.com", password="testpass123", role=Roles.ADMIN)
+        self.factory = APIRequestFactory()
+
+    def create_recruiter(self, name, **kwargs):
+        user = User.objects.create_user(email=f"{name}@example.com", password="testpass123", role=Roles.RECRUITER)
+        return Recruiter.objects.create(
+            user=user,
+            first_name=name.title(),
+            last_name="Recruiter",
+            linkedin=f"https://linkedin.com/in/{name}",
+            **kwargs,
+        )
+
+    def create_hire(self, recruiter, created_days_ago=0, job=None, **kwargs):
+        job = job or self.job
+        created_at = timezone.now() - timedelta(days=created_days_ago)
+        candidate = Candidate.objects.create(first_name="Test", last_name="Candidate", recruiter=recruiter, job=job)
+        Candidate.objects.filter(pk=candidate.pk).update(created_at=created_at - timedelta(days=10))
+        hire = Hire.objects.create(
+            job=job,
+            recruiter=recruiter,
+            candidate=candidate,
+            base_salary=100000,
+            payout=10000,
+            commission=20000,
+            commission_percentage=20,
+            join_date=timezone.now(),
+            **kwargs,
+        )
+        Hire.objects.filter(pk=hire.pk).update(created_at=created_at)
+        return hire
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class LeaderboardTests(PerformanceTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures()
+
+    def stats(self, recruiter, period="30d"):
+        return RecruiterStats.objects.get(recruiter=recruiter, period=period)
+
+    def leaderboard(self, user, action="list", **params):
+        request = self.factory.get("/api/recruiters/leaderboard/", params)
+        force_authenticate(request, user=user)
+        return LeaderboardViewSet.as_view({"get": action})(request)
+
+    def test_saves_refresh_the_recruiter_and_agency_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            hire = self.create_hire(self.alice)
+            RecruiterPayment.objects.create(
+                amount=5000, due_on=timezone.now(), currency=self.currency, hire=hire, percentage_of_full=50
+            )
+            RecruiterApplication.objects.create(
+                job=self.job, recruiter=self.alice, status=RecruiterApplication.ApplicationStatus.APPROVED
+            )
+            RecruiterApplication.objects.create(
+                job=self.job, recruiter=self.bob, status=RecruiterApplication.ApplicationStatus.REJECTED
+            )
+
+        alice = self.stats(self.alice)
+        self.assertEqual((alice.placements, alice.submissions, alice.commission), (1, 1, Decimal("5000.00")))
+        self.assertAlmostEqual(alice.days_to_hire, 10, places=3)
+        self.assertEqual(alice.approval_rate, 1)
+        self.assertEqual(self.stats(self.bob).approval_rate, 0)
+
+        agency = AgencyStats.objects.get(agency=self.agency, period="30d")
+        self.assertEqual((agency.placements, agency.applications_approved, agency.applications_rejected), (1, 1, 1))
+        self.assertEqual(agency.approval_rate, 0.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            hire.payment_status = Hire.PaymentStatus.CANCELLED
+            hire.save()
+        self.assertEqual(self.stats(self.alice).placements, 0)
+        self.assertEqual(AgencyStats.objects.get(agency=self.agency, period="30d").placements, 0)
+
+    @override_settings(LEADERBOARD_REFRESH_DEDUP=True)
+    def test_refresh_is_queued_once_per_recruiter(self):
+        with patch("grid.recruiters.tasks.refresh_leaderboard.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_hire(self.alice)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_hire(self.alice)
+                self.create_hire(self.bob)
+        self.assertEqual(
+            [call.args for call in delay.call_args_list],
+            [
+                ([str(self.alice.pk)], [], [[str(self.alice.pk), str(self.job.pk)]]),
+                ([str(self.bob.pk)], [], [[str(self.bob.pk), str(self.job.pk)]]),
+            ],
+        )
+        self.assertFalse(RecruiterStats.objects.exists())
+
+        # The task lets the next write queue again before it refreshes
+        from grid.recruiters.tasks import refresh_leaderboard as refresh_task
+
+        refresh_task(*delay.call_args_list[0].args)
+        self.assertEqual(self.stats(self.alice, "all").placements, 2)
+        with patch("grid.recruiters.tasks.refresh_leaderboard.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_hire(self.alice)
+        delay.assert_called_once_with([str(self.alice.pk)], [], [[str(self.alice.pk), str(self.job.pk)]])
+
+    @override_settings(LEADERBOARD_REFRESH_DEDUP=False)
+    def test_every_refresh_is_queued_without_a_shared_cache(self):
+        with patch("grid.recruiters.tasks.refresh_leaderboard.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_hire(self.alice)
+            first_write = delay.call_args_list[:]
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_hire(self.alice)
+        self.assertEqual(delay.call_args_list, first_write * 2)
+
+    def test_moving_agency_refreshes_both_agencies(self):
+        other = Agency.objects.create(agency_name="Other Agency", make_payable_to="Other Agency")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_hire(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.agency = other
+            self.alice.save()
+
+        self.assertFalse(AgencyStats.objects.filter(agency=self.agency, placements__gt=0).exists())
+        self.assertEqual(AgencyStats.objects.get(agency=other, period="all").placements, 1)
+
+    def test_reconcile_slides_the_periods(self):
+        self.create_hire(self.alice, created_days_ago=5)
+        self.create_hire(self.alice, created_days_ago=45)
+        self.create_hire(self.alice, created_days_ago=200)
+
+        self.assertEqual(reconcile_leaderboard(), {"recruiters": 6, "agencies": 3})
+        self.assertEqual(
+            [self.stats(self.alice, period).placements for period in ["30d", "90d", "all"]],
+            [1, 2, 3],
+        )
+
+        reconcile_leaderboard(now=timezone.now() + timedelta(days=30))
+        self.assertEqual([self.stats(self.alice, period).placements for period in ["30d", "90d"]], [0, 2])
+
+    def test_leaderboard_ranks_and_hides_commission(self):
+        carol = self.create_recruiter("carol")
+        for recruiter, hires in [(self.alice, 1), (self.bob, 3), (carol, 2)]:
+            for _ in range(hires):
+                self.create_hire(recruiter)
+        reconcile_leaderboard()
+
+        response = self.leaderboard(self.alice.user)
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual(
+            [row["recruiter_name"] for row in results], ["Bob Recruiter", "Carol Recruiter", "Alice Recruiter"]
+        )
+        self.assertEqual([row["rank"] for row in results], [1, 2, 3])
+        self.assertNotIn("commission", results[0])
+
+        reverse = self.leaderboard(self.alice.user, ordering="-placements", agency=str(self.agency.pk)).data["results"]
+        self.assertEqual([row["recruiter_name"] for row in reverse], ["Alice Recruiter", "Bob Recruiter"])
+
+        self.assertEqual(self.leaderboard(self.alice.user, ordering="commission").status_code, 400)
+        self.assertEqual(self.leaderboard(self.alice.user, period="7d").status_code, 400)
+        self.assertIn("commission", self.leaderboard(self.admin, ordering="commission").data["results"][0])
+
+        agencies = self.leaderboard(self.alice.user, action="agencies").data["results"]
+        self.assertEqual([(row["agency_name"], row["placements"]) for row in agencies], [("Test Agency", 4)])
+
+        client = User.objects.create_user(email="client@example.com", password="testpass123", role=Roles.CLIENT)
+        self.assertEqual(self.leaderboard(client).status_code, 403)
+
+
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class AgencyDashboardTests(PerformanceTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures()
+        self.alice.superuser = True
+        self.alice.save()
+        self.other_job = Job.objects.create(
+            title="Designer", salary_min=90000, min_book_of_business=0, client=self.client_company
+        )
+
+    def dashboard(self, user, agency=None):
+        agency = agency or self.agency
+        request = self.factory.get(f"/api/recruiters/agencies/{agency.pk}/dashboard/")
+        force_authenticate(request, user=user)
+        return AgencyViewSet.as_view({"get": "dashboard"})(request, pk=agency.pk)
+
+    def test_dashboard_is_served_from_summaries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            hire = self.create_hire(self.alice)
+            self.create_hire(self.bob, job=self.other_job)
+            self.create_hire(self.bob, job=self.other_job)
+            RecruiterPayment.objects.create(
+                amount=5000, due_on=timezone.now(), currency=self.currency, hire=hire, percentage_of_full=50
+            )
+            RecruiterApplication.objects.create(job=self.job, recruiter=self.alice)
+            RecruiterApplication.objects.create(
+                job=self.other_job, recruiter=self.bob, status=RecruiterApplication.ApplicationStatus.APPROVED
+            )
+        Job.objects.filter(pk=self.other_job.pk).update(status=Job.JobStatus.CLOSED)
+
+        with self.assertNumQueries(6):
+            response = self.dashboard(self.alice.user)
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data["hires"], {"30d": 3, "90d": 3, "all": 3})
+        self.assertEqual(
+            [(member["name"], member["last_30_days"]["placements"]) for member in data["team"]],
+            [("Alice Recruiter", 1), ("Bob Recruiter", 2)],
+        )
+        self.assertEqual([row["job_title"] for row in data["active_applications"]], ["Engineer"])
+        self.assertEqual(data["active_applications"][0]["applications_pending"], 1)
+        self.assertEqual(
+            [(row["job_title"], row["placements"]) for row in data["top_jobs"]], [("Designer", 2), ("Engineer", 1)]
+        )
+        self.assertEqual(
+            [(row["currency_code"], row["payouts_due"]) for row in data["payouts"]], [("USD", Decimal("5000.00"))]
+        )
+
+        # Served from the cache until a summary changes
+        with self.assertNumQueries(1):
+            self.dashboard(self.alice.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_hire(self.bob)
+        self.assertEqual(self.dashboard(self.alice.user).data["hires"]["all"], 4)
+
+    def test_writes_refresh_only_the_jobs_they_touch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_hire(self.alice)
+            self.create_hire(self.bob, job=self.other_job)
+        AgencyJobSummary.objects.filter(job=self.job).update(placements=99)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_hire(self.bob, job=self.other_job)
+        summaries = dict(AgencyJobSummary.objects.values_list("job", "placements"))
+        self.assertEqual(summaries, {self.job.pk: 99, self.other_job.pk: 2})
+
+        # Moving a recruiter recomputes every job of both agencies
+        other = Agency.objects.create(agency_name="Other Agency", make_payable_to="Other Agency")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.agency = other
+            self.bob.save()
+        self.assertEqual(
+            set(AgencyJobSummary.objects.values_list("agency", "job", "placements")),
+            {(self.agency.pk, self.job.pk, 1), (other.pk, self.other_job.pk, 2)},
+        )
+
+    def test_dashboard_access(self):
+        self.assertEqual(self.dashboard(self.admin).status_code, 200)
+        self.assertEqual(self.dashboard(self.bob.user).status_code, 403)
+
+        other = Agency.objects.create(agency_name="Other Agency", make_payable_to="Other Agency")
+        self.assertEqual(self.dashboard(self.alice.user, agency=other).status_code, 404)
+
+
+class RecruiterDirectoryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email="admin@example.com", password="testpass123", role=Roles.ADMIN)
+        self.engineering = JobCategory.objects.create(name="Engineering")
+        self.sales = JobCategory.objects.create(name="Sales")
+        statuses = Recruiter.RecruiterStatus
+        for index, (name, status, industry, story) in enumerate(
+            [
+                ("ada", statuses.WAIT_LIST, self.engineering, "Placed backend engineers at fintech startups"),
+                ("ben", statuses.PENDING_APPROVAL, self.sales, "Builds sales teams"),
+                ("cy", statuses.ACTIVE, self.engineering, "Hires data engineers"),
+                ("di", statuses.REJECTED, self.sales, None),
+            ]
+        ):
+            user = User.objects.create_user(email=f"{name}@example.com", password="testpass123", role=Roles.RECRUITER)
+            recruiter = Recruiter.objects.create(
+                user=user,
+                first_name=name.title(),
+                last_name="Recruiter",
+                linkedin=f"https://linkedin.com/in/{name}",
+                status=status,
+                primary_industry=industry,
+                story=story,
+            )
+            Recruiter.objects.filter(pk=recruiter.pk).update(created_at=timezone.now() - timedelta(days=index))
+        self.factory = APIRequestFactory()
+
+    def directory(self, user=None, **params):
+        request = self.factory.get("/api/recruiters/recruiters/directory/", params)
+        force_authenticate(request, user=user or self.admin)
+        # As routed, with the permissions and pagination given to the action
+        return RecruiterViewSet.as_view({"get": "directory"}, **RecruiterViewSet.directory.kwargs)(request)
+
+    def names(self, response):
+        return [row["first_name"] for row in response.data["results"]]
+
+    def test_filters_and_keyset_pagination(self):
+        response = self.directory(page_size=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response), ["Ada", "Ben"])
+        self.assertEqual((response.data["count"], response.data["count_is_exact"]), (4, True))
+        self.assertNotIn("page=", response.data["next"])
+
+        cursor = response.data["next"].split("cursor=")[1].split("&")[0]
+        self.assertEqual(self.names(self.directory(page_size=2, cursor=unquote(cursor))), ["Cy", "Di"])
+
+        waitlist = f"{Recruiter.RecruiterStatus.PENDING_APPROVAL},{Recruiter.RecruiterStatus.WAIT_LIST}"
+        self.assertEqual(self.names(self.directory(status=waitlist)), ["Ada", "Ben"])
+        self.assertEqual(self.names(self.directory(industry=str(self.engineering.pk))), ["Ada", "Cy"])
+
+    def test_search(self):
+        response = self.directory(q="engineer")
+        self.assertEqual(sorted(self.names(response)), ["Ada", "Cy"])
+        self.assertIn("<mark>", response.data["results"][0]["snippet"])
+
+        self.assertEqual(self.names(self.directory(q="Ben")), ["Ben"])
+        self.assertEqual(self.names(self.directory(q="engineers", status=Recruiter.RecruiterStatus.ACTIVE)), ["Cy"])
+
+        # Edits are searchable straight away
+        ben = Recruiter.objects.get(first_name="Ben")
+        ben.introduction = "Former engineer"
+        ben.save(update_fields=["introduction"])
+        self.assertEqual(sorted(self.names(self.directory(q="engineer"))), ["Ada", "Ben", "Cy"])
+
+    def test_document_is_rebuilt_only_for_searched_fields(self):
+        ben = Recruiter.objects.get(first_name="Ben")
+        with patch.object(Recruiter, "build_search_document", return_value="") as build:
+            ben.status = Recruiter.RecruiterStatus.ACTIVE
+            ben.commission_share_manual = True
+            ben.save(update_fields=["status"])
+            build.assert_not_called()
+
+            ben.save(update_fields=["story"])
+            build.assert_called_once()
+        ben.refresh_from_db()
+        # Neither the document nor the manual flag were written with the status
+        self.assertEqual((ben.search_document, ben.commission_share_manual), ("", False))
+
+    def test_directory_is_for_admins(self):
+        recruiter = Recruiter.objects.get(first_name="Ada")
+        self.assertEqual(self.directory(user=recruiter.user).status_code, 403)
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class CommissionShareTests(PerformanceTestMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.base_tier = RecruiterShare.objects.create(hires=1, percentage=50, default=True)
+        RecruiterShare.objects.create(hires=3, percentage=60)
+
+    def share(self, recruiter):
+        recruiter.refresh_from_db()
+        return recruiter.commission_share
+
+    def test_share_follows_rolling_hire_count(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_hire(self.alice)
+        self.assertEqual(self.share(self.alice), 50)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_hire(self.alice, created_days_ago=400)
+            hires = [self.create_hire(self.alice) for _ in range(2)]
+        self.assertEqual(self.share(self.alice), 60)
+        self.assertIsNone(self.share(self.bob))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            hires[0].payment_status = Hire.PaymentStatus.CANCELLED
+            hires[0].save()
+        self.assertEqual(self.share(self.alice), 50)
+
+        changes = self.alice.commission_share_changes.order_by("created_at")
+        self.assertEqual(
+            [(change.previous_share, change.new_share, change.hire_count) for change in changes],
+            [(None, 50, 1), (50, 60, 3), (60, 50, 2)],
+        )
+        self.assertEqual({change.reason for change in changes}, {CommissionShareChange.Reason.HIRE})
+
+    def test_manual_share_overrides_tiers_until_cleared(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.commission_share = 40
+            self.alice.save()
+            self.create_hire(self.alice)
+        self.assertEqual(self.share(self.alice), 40)
+        self.assertTrue(self.alice.commission_share_manual)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.commission_share = None
+            self.alice.save()
+        self.assertEqual(self.share(self.alice), 50)
+        self.assertFalse(self.alice.commission_share_manual)
+        self.assertEqual(
+            list(self.alice.commission_share_changes.order_by("created_at").values_list("reason", "new_share")),
+            [
+                (CommissionShareChange.Reason.MANUAL, 40),
+                (CommissionShareChange.Reason.MANUAL, None),
+                (CommissionShareChange.Reason.HIRE, 50),
+            ],
+        )
+
+    def test_tier_change_recomputes_every_recruiter(self):
+        for recruiter in [self.alice, self.bob]:
+            self.create_hire(recruiter)
+        self.assertEqual(recompute_commission_shares(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.base_tier.percentage = 45
+            self.base_tier.save()
+
+        self.assertEqual((self.share(self.alice), self.share(self.bob)), (45, 45))
+        self.assertEqual(CommissionShareChange.objects.filter(reason=CommissionShareChange.Reason.TIERS).count(), 2)
+        self.assertEqual(recompute_commission_shares(), 0)
+
+    def test_share_made_manual_during_a_recompute_is_kept(self):
+        for recruiter in [self.alice, self.bob]:
+            self.create_hire(recruiter)
+
+        def admin_sets_share(hire_count, tiers):
+            # An admin saves alice's share after the recompute read her as tier-driven
+            Recruiter.objects.filter(pk=self.alice.pk).update(commission_share=40, commission_share_manual=True)
+            return tier_percentage(hire_count, tiers)
+
+        with patch("grid.recruiters.commission.tier_percentage", side_effect=admin_sets_share):
+            self.assertEqual(recompute_commission_shares(), 1)
+
+        self.assertEqual((self.share(self.alice), self.share(self.bob)), (40, 50))
+        self.assertFalse(self.alice.commission_share_changes.exists())
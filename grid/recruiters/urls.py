@@ -5,6 +5,7 @@ from grid.recruiters.views import (  # MemberRecruiterSignupView,
     AgencyViewSet,
     BankAccountViewSet,
     JobCategoryListView,
+    LeaderboardViewSet,
     RecruiterSignupViewSet,
     RecruiterViewSet,
 )
@@ -15,6 +16,7 @@ router.register(r"recruiters", RecruiterViewSet, basename="recruiter")
 router.register(r"agencies", AgencyViewSet, basename="agency")
 router.register(r"signup", RecruiterSignupViewSet, basename="recruiter-profile-signup")
 router.register(r"bank-accounts", BankAccountViewSet, basename="bankaccount")
+router.register(r"leaderboard", LeaderboardViewSet, basename="leaderboard")
 
 
 urlpatterns = [
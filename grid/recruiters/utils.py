@@ -1,13 +1,27 @@
+import logging
+
+from concurrent import futures
 from datetime import datetime
+from io import BytesIO
 from typing import Dict, Optional
 
 import requests
 
 from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image
 
 from grid.clients.models import Address
-from grid.core.helpers import get_person_data
-from grid.recruiters.models import Agency, JobCategory, Recruiter
+from grid.recruiters.models import Agency, JobCategory, LinkedInEnrichment, Recruiter
+
+
+logger = logging.getLogger(__name__)
+
+
+IMAGE_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+
+# Shared by all requests, so downloads abandoned after their wait do not hold up the request
+image_download_pool = futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="image-download")
 
 
 def create_recruiter_from_basic_info(user, profile_photo, basic_info_data):
@@ -35,13 +49,22 @@ def create_recruiter_from_basic_info(user, profile_photo, basic_info_data):
 
     recruiter = Recruiter(user=user, **recruiter_data)
     if user.is_team_member:
-        recruiter.agency = user.owner_profile.agency
+        recruiter.agency = user.owner_profile
         recruiter.approval_date = datetime.now()
     recruiter.save()
 
     return recruiter
 
 
+def start_linkedin_enrichment(recruiter):
+    """Queue fetching the recruiter's LinkedIn profile for when the current transaction commits"""
+    from grid.recruiters.tasks import enrich_recruiter_linkedin
+
+    enrichment = LinkedInEnrichment.objects.create(recruiter=recruiter, linkedin=recruiter.linkedin)
+    transaction.on_commit(lambda: enrich_recruiter_linkedin.delay(str(enrichment.pk)))
+    return enrichment
+
+
 def create_agency_and_address_from_info(agency_info_data, user):
     """Creates agency with provided information"""
     address_data = agency_info_data.pop("address", None)
@@ -61,27 +84,44 @@ def create_agency_and_address_from_info(agency_info_data, user):
 
 
 def download_image(url: str):
-    """Downloads image"""
+    """
+    Downloads image
+
+    The file is named after the format Pillow reads from its content, and anything that is
+    not a JPEG, PNG, GIF or WebP image is dropped. Storage dedupes it by content hash.
+    """
     if not url:
-        print("No picture in linkedin data")
+        logger.debug("No picture in linkedin data")
         return None
-    print("Picture found in linkedin data, downloading it ...")
+    logger.debug("Downloading LinkedIn profile picture %s", url)
     try:
         response = requests.get(url, timeout=5)
         if response.status_code == 200:
-            # Get file extension from content type
-            content_type = response.headers.get("content-type", "")
-            ext = {
-                "image/jpeg": "jpg",
-                "image/png": "png",
-            }.get(content_type, "jpg")
-
-            return ContentFile(response.content, name=f"profile_photo.{ext}")
+            with Image.open(BytesIO(response.content)) as image:
+                ext = IMAGE_EXTENSIONS.get(image.format)
+            if ext:
+                return ContentFile(response.content, name=f"profile_photo.{ext}")
+            logger.warning("Unsupported profile image format %s at %s", image.format, url)
+        else:
+            logger.warning("Profile image download from %s returned %s", url, response.status_code)
     except Exception as e:
-        print(f"Error downloading profile image: {str(e)}")
+        logger.warning("Error downloading profile image from %s: %s", url, e)
     return None
 
 
+def download_images(urls, wait=None):
+    """
+    Download ``urls`` concurrently and return ``(images, pending)``.
+
+    ``images`` maps each url downloaded within ``wait`` seconds to its image, or ``None`` if it
+    could not be used; ``pending`` lists the urls still downloading. Pending downloads are not
+    cancelled, but their results are dropped. Waits for all of them when ``wait`` is ``None``.
+    """
+    downloads = {image_download_pool.submit(download_image, url): url for url in dict.fromkeys(urls) if url}
+    done, not_done = futures.wait(downloads, timeout=wait)
+    return {downloads[download]: download.result() for download in done}, [downloads[d] for d in not_done]
+
+
 def extract_linkedin_data(data: dict) -> dict:
     """Extracts relevant fields from LinkedIn API response"""
 
@@ -95,22 +135,3 @@ def extract_linkedin_data(data: dict) -> dict:
         "country_full_name": data.get("country_full_name"),
         "state": data.get("state"),
     }
-
-
-def process_person_linkedin_data(linkedin_url: str):
-    """Process LinkedIn data synchronously"""
-    try:
-        # Get LinkedIn data
-        linkedin_data = get_person_data(linkedin_url)
-
-        if not linkedin_data:
-            return None
-
-        # Extract relevant fields
-        extracted_data = extract_linkedin_data(linkedin_data)
-
-        return extracted_data
-
-    except Exception as e:
-        print(f"Error processing LinkedIn data: {str(e)}")
-        return None
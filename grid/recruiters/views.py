@@ -1,10 +1,12 @@
 from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Window
+from django.db.models.functions import Rank
 from django.shortcuts import get_object_or_404
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.filters import OrderingFilter
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
@@ -12,26 +14,43 @@ from rest_framework.response import Response
 
 from grid.admins.models import AdminUserProfile
 from grid.clients.models import Address
-from grid.core.permissions import IsRecruiter
+from grid.core.fulltext import search
+from grid.core.pagination import CustomPagination, EstimatedCountCursorPagination
+from grid.core.permissions import IsAdmin, IsRecruiter
 from grid.core.viewsets import NoCreateViewSet
-from grid.recruiters.models import Agency, BankAccount, JobCategory, Recruiter
+from grid.recruiters.dashboard import agency_dashboard
+from grid.recruiters.filters import RecruiterDirectoryFilter
+from grid.recruiters.models import (
+    Agency,
+    AgencyStats,
+    BankAccount,
+    JobCategory,
+    LinkedInEnrichment,
+    PerformanceStats,
+    Recruiter,
+    RecruiterStats,
+)
 from grid.recruiters.serializers import (  # MemberRecruiterSignupSerializer,
     AddressSerializer,
     AgencySerializer,
+    AgencyStatsSerializer,
     BankAccountSerializer,
     JobCategorySerializer,
+    LinkedInEnrichmentSerializer,
     RecruiterAgencyInfoSerializer,
     RecruiterBasicInfoSerializer,
     RecruiterDescriptionSerializer,
+    RecruiterDirectorySerializer,
     RecruiterSerializer,
     RecruiterSignupResponseSerializer,
+    RecruiterStatsSerializer,
     RestrictedAgencySerializer,
     RestrictedRecruiterSerializer,
 )
 from grid.recruiters.utils import (
     create_agency_and_address_from_info,
     create_recruiter_from_basic_info,
-    process_person_linkedin_data,
+    start_linkedin_enrichment,
 )
 from grid.users.permissions import IsTeamMember
 
@@ -64,6 +83,14 @@ class JobCategoryListView(ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
+class RecruiterDirectoryPagination(EstimatedCountCursorPagination):
+    def get_ordering(self, request, queryset, view):
+        # Searches rank by relevance, like SearchRankCursorPagination
+        if request.query_params.get("q", "").strip():
+            return ("-search_rank", "-created_at")
+        return super().get_ordering(request, queryset, view)
+
+
 class RecruiterViewSet(NoCreateViewSet):
     serializer_class = RecruiterSerializer
 
@@ -77,6 +104,8 @@ class RecruiterViewSet(NoCreateViewSet):
 
     def get_serializer_class(self):
         user = self.request.user
+        if self.action == "directory":
+            return RecruiterDirectorySerializer
         if user.is_recruiter and not user.recruiter.superuser:
             return RestrictedRecruiterSerializer
         return RecruiterSerializer
@@ -88,6 +117,51 @@ class RecruiterViewSet(NoCreateViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_summary="Recruiter Directory",
+        operation_description="Admin directory of recruiters, newest first or by relevance when searching, "
+        "paginated by cursor with a total count that is estimated for large results.",
+        manual_parameters=[
+            openapi.Parameter(
+                "q", openapi.IN_QUERY, description="Search names, introductions and stories", type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                "status",
+                openapi.IN_QUERY,
+                description="Comma-separated statuses, e.g. 1,3 for pending approval and wait list",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "industry", openapi.IN_QUERY, description="Primary or secondary industry", type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter("agency", openapi.IN_QUERY, description="Agency id", type=openapi.TYPE_STRING),
+            openapi.Parameter("country", openapi.IN_QUERY, description="Country id", type=openapi.TYPE_STRING),
+            openapi.Parameter("state", openapi.IN_QUERY, description="State id", type=openapi.TYPE_STRING),
+        ],
+        responses={200: RecruiterDirectorySerializer(many=True)},
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated, IsAdmin],
+        serializer_class=RecruiterDirectorySerializer,
+        pagination_class=RecruiterDirectoryPagination,
+    )
+    def directory(self, request):
+        filterset = RecruiterDirectoryFilter(
+            request.query_params,
+            queryset=self.get_queryset().select_related(
+                "user", "primary_industry", "agency", "address__country", "address__state"
+            ),
+        )
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        queryset = filterset.qs
+        if request.query_params.get("q", "").strip():
+            queryset = search(queryset, request.query_params["q"], field_name="search_document")
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
     @swagger_auto_schema(
         operation_description="Retrieve a specific recruiter profile", responses={200: RecruiterSerializer()}
     )
@@ -176,6 +250,18 @@ class AgencyViewSet(NoCreateViewSet):
     def partial_update(self, request, *args, **kwargs):
         return super().partial_update(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_description="Team, applications, hires, payouts and top jobs of an agency in one response, "
+        "served from precomputed summaries. Accessible by admins and the agency's superuser recruiters.",
+        responses={200: "Agency dashboard", 403: "Permission denied", 404: "Not found"},
+    )
+    @action(detail=True, methods=["get"])
+    def dashboard(self, request, pk=None):
+        agency = self.get_object()
+        if request.user.is_recruiter and not request.user.recruiter.superuser:
+            raise PermissionDenied("Only superuser recruiters can view the agency dashboard")
+        return Response(agency_dashboard(agency))
+
 
 class RecruiterSignupViewSet(viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated, IsRecruiter]
@@ -196,34 +282,44 @@ class RecruiterSignupViewSet(viewsets.GenericViewSet):
         """
         Handle basic info submission for recruiter signup
         Returns standardized response with next steps and profile info
+
+        The LinkedIn profile is fetched in the background; poll ``linkedin_enrichment`` or listen
+        on ``ws/recruiters/linkedin/`` for the result
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        linkedin_data = None
-        if serializer.validated_data.get("linkedin"):
-            linkedin_data = process_person_linkedin_data(serializer.validated_data["linkedin"])
-
-        profile_picture = linkedin_data.pop("profile_photo")
-
         recruiter = create_recruiter_from_basic_info(
-            user=request.user, profile_photo=profile_picture, basic_info_data=serializer.validated_data
+            user=request.user, profile_photo=None, basic_info_data=serializer.validated_data
         )
+        enrichment = start_linkedin_enrichment(recruiter)
 
         # Prepare response data
         response_data = {
             "message": "Basic information saved successfully",
             "recruiter": str(recruiter.uuid),
             "agency": None,
-            "linkedin_data": linkedin_data,
+            "linkedin_data": None,
+            "linkedin_enrichment": LinkedInEnrichmentSerializer(enrichment).data,
         }
 
         response_serializer = RecruiterSignupResponseSerializer(data=response_data)
         response_serializer.is_valid(raise_exception=True)
-        print(response_serializer.validated_data)
 
         return Response(response_serializer.validated_data, status=status.HTTP_201_CREATED)
 
+    @swagger_auto_schema(
+        operation_description="State of the recruiter's latest LinkedIn enrichment",
+        responses={200: LinkedInEnrichmentSerializer()},
+    )
+    @action(detail=False, methods=["get"])
+    def linkedin_enrichment(self, request):
+        """Poll the background LinkedIn enrichment started by ``basic_info``"""
+        enrichment = LinkedInEnrichment.objects.filter(recruiter__user=request.user).first()
+        if not enrichment:
+            raise NotFound("No LinkedIn enrichment found")
+        return Response(LinkedInEnrichmentSerializer(enrichment).data)
+
     @transaction.atomic
     @action(detail=False, methods=["post"])
     def agency_info(self, request):
@@ -327,6 +423,94 @@ class RecruiterSignupViewSet(viewsets.GenericViewSet):
         return Response(response_serializer.validated_data, status=status.HTTP_201_CREATED)
 
 
+LEADERBOARD_ORDERING = ["placements", "commission", "days_to_hire", "approval_rate", "submissions", "stage_moves"]
+# Fewer days to hire ranks higher; every other metric ranks higher when larger
+LEADERBOARD_ASCENDING = {"days_to_hire"}
+
+leaderboard_parameters = [
+    openapi.Parameter(
+        "period",
+        openapi.IN_QUERY,
+        description="Time window of the metrics",
+        type=openapi.TYPE_STRING,
+        enum=PerformanceStats.Period.values,
+        default=PerformanceStats.Period.LAST_30_DAYS,
+    ),
+    openapi.Parameter(
+        "ordering",
+        openapi.IN_QUERY,
+        description="Metric to rank by, best first; prefix with '-' to reverse. Commission is for admins only.",
+        type=openapi.TYPE_STRING,
+        enum=LEADERBOARD_ORDERING,
+        default="placements",
+    ),
+]
+
+
+class LeaderboardViewSet(viewsets.GenericViewSet):
+    """
+    Recruiters and agencies ranked by their precomputed performance stats.
+
+    Each page is one query over the ``(period, metric)`` index of the stats table;
+    see ``grid.recruiters.leaderboard`` for how the stats are kept up to date.
+    """
+
+    permission_classes = [IsAuthenticated, IsAdmin | IsRecruiter]
+    pagination_class = CustomPagination
+    serializer_class = RecruiterStatsSerializer
+
+    def get_serializer_class(self):
+        if self.action == "agencies":
+            return AgencyStatsSerializer
+        return RecruiterStatsSerializer
+
+    def ranked(self, queryset):
+        period = self.request.query_params.get("period", PerformanceStats.Period.LAST_30_DAYS)
+        if period not in PerformanceStats.Period.values:
+            raise ValidationError({"period": f"Must be one of {', '.join(PerformanceStats.Period.values)}."})
+
+        ordering = self.request.query_params.get("ordering", "placements")
+        metric = ordering.removeprefix("-")
+        if metric not in LEADERBOARD_ORDERING:
+            raise ValidationError({"ordering": f"Must be one of {', '.join(LEADERBOARD_ORDERING)}."})
+        if metric == "commission" and not self.request.user.is_admin:
+            raise ValidationError({"ordering": "Only admins can rank by commission."})
+
+        descending = (metric in LEADERBOARD_ASCENDING) == ordering.startswith("-")
+        # Typed as a float so SQLite does not cast the whole OVER clause for the decimal commission
+        value = ExpressionWrapper(F(metric), output_field=FloatField())
+        order = value.desc(nulls_last=True) if descending else value.asc(nulls_last=True)
+        return queryset.filter(period=period).annotate(rank=Window(Rank(), order_by=order)).order_by(order, "pk")
+
+    @swagger_auto_schema(
+        operation_description="Recruiters ranked by a performance metric",
+        manual_parameters=[
+            *leaderboard_parameters,
+            openapi.Parameter(
+                "agency", openapi.IN_QUERY, description="Only recruiters of this agency", type=openapi.TYPE_STRING
+            ),
+        ],
+        responses={200: RecruiterStatsSerializer(many=True)},
+    )
+    def list(self, request, *args, **kwargs):
+        queryset = RecruiterStats.objects.select_related("recruiter__agency")
+        agency = request.query_params.get("agency")
+        if agency:
+            queryset = queryset.filter(recruiter__agency=agency)
+        page = self.paginate_queryset(self.ranked(queryset))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @swagger_auto_schema(
+        operation_description="Agencies ranked by a performance metric",
+        manual_parameters=leaderboard_parameters,
+        responses={200: AgencyStatsSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def agencies(self, request):
+        page = self.paginate_queryset(self.ranked(AgencyStats.objects.select_related("agency")))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
 class BankAccountViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = BankAccount.objects.all()
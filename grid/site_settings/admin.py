@@ -5,6 +5,7 @@ from .models import (
     CompanySize,
     Country,
     Currency,
+    ExchangeRate,
     PayoutInstalment,
     RecruiterShare,
     State,
@@ -36,6 +37,15 @@ class CurrencyAdmin(admin.ModelAdmin):
     list_filter = ("three_letter_code",)
 
 
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ("currency", "date", "rate")
+    list_filter = ("currency",)
+    search_fields = ("currency__three_letter_code",)
+    ordering = ("-date",)
+    date_hierarchy = "date"
+
+
 @admin.register(Country)
 class CountryAdmin(admin.ModelAdmin):
     list_display = ("name", "two_letter_code", "three_letter_code", "icon_name", "currency", "priority")
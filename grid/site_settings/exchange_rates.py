@@ -0,0 +1,174 @@
+"""
+Currency conversion against the local ``ExchangeRate`` table.
+
+Each process keeps the whole rate table in memory as sorted per-currency arrays, so a
+conversion is a binary search rather than a query. The table is tagged with a version kept
+in the Django cache; writing rates bumps the version and every process reloads on its next
+lookup. Tables are also reloaded after ``RATE_TABLE_MAX_AGE`` seconds, in case the cache is
+not shared between processes.
+
+``convert_totals`` converts a whole queryset in one pass: amounts are summed in the database
+per currency and day, and only those sums are converted.
+"""
+
+import csv
+import time
+
+from bisect import bisect_right
+from datetime import date as date_type
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+from .models import Currency, ExchangeRate
+
+
+RATES_VERSION_KEY = "exchange-rates:version"
+RATE_TABLE_MAX_AGE = 300
+
+CENT = Decimal("0.01")
+
+
+class MissingExchangeRate(ValueError):
+    """No rate is known for a currency on or before the requested date."""
+
+
+class RateTable:
+    def __init__(self, rows, base_currency_id):
+        self.base_currency_id = base_currency_id
+        self._days, self._rates = {}, {}
+        # ``rows`` are (currency_id, date, rate) ordered by currency and date
+        for currency_id, day, rate in rows:
+            self._days.setdefault(currency_id, []).append(day.toordinal())
+            self._rates.setdefault(currency_id, []).append(rate)
+
+    def rate(self, currency_id, day):
+        """Units of ``currency_id`` per base unit on ``day``, from the latest rate not after it"""
+        if currency_id == self.base_currency_id:
+            return Decimal(1)
+
+        days = self._days.get(currency_id, [])
+        index = bisect_right(days, day.toordinal()) - 1
+        if index < 0:
+            raise MissingExchangeRate(f"No exchange rate for currency {currency_id} on or before {day}.")
+        return self._rates[currency_id][index]
+
+    def factor(self, from_currency_id, to_currency_id, day):
+        """Multiply an amount in ``from_currency_id`` by this to get it in ``to_currency_id``"""
+        if from_currency_id == to_currency_id:
+            return Decimal(1)
+        return self.rate(to_currency_id, day) / self.rate(from_currency_id, day)
+
+    def convert(self, amount, from_currency_id, to_currency_id, day):
+        return Decimal(str(amount)) * self.factor(from_currency_id, to_currency_id, day)
+
+
+_table = None
+_table_version = None
+_table_loaded_at = 0.0
+
+
+def bump_rates_version():
+    """Make every process reload its rate table on its next lookup"""
+    try:
+        cache.incr(RATES_VERSION_KEY)
+    except ValueError:
+        cache.set(RATES_VERSION_KEY, 1, timeout=None)
+
+
+def get_rate_table():
+    global _table, _table_version, _table_loaded_at
+
+    version = cache.get(RATES_VERSION_KEY)
+    if _table is None or version != _table_version or time.monotonic() - _table_loaded_at > RATE_TABLE_MAX_AGE:
+        base_currency_id = (
+            Currency.objects.filter(three_letter_code=settings.EXCHANGE_RATE_BASE_CURRENCY)
+            .values_list("pk", flat=True)
+            .first()
+        )
+        rows = ExchangeRate.objects.order_by("currency_id", "date").values_list("currency_id", "date", "rate")
+        _table = RateTable(rows.iterator(chunk_size=5000), base_currency_id)
+        _table_version, _table_loaded_at = version, time.monotonic()
+    return _table
+
+
+def to_day(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def convert_totals(queryset, amounts, to_currency, currency_field="currency", date_field="created_at", group_by=()):
+    """
+    Sum ``amounts`` over ``queryset`` in ``to_currency``, converting at each row's date.
+
+    ``amounts`` maps result names to a field name or expression. Rows are summed in the
+    database per ``group_by`` value, currency and day, so the conversion work depends on
+    the number of distinct currency-days and not on the number of rows.
+
+    Returns one dict per ``group_by`` combination holding the group values and the
+    converted amounts rounded to the cent.
+    """
+    table = get_rate_table()
+    field = queryset.model._meta.get_field(date_field)
+    day = (
+        models.F(date_field)
+        if isinstance(field, models.DateField) and not isinstance(field, models.DateTimeField)
+        else TruncDate(date_field)
+    )
+
+    rows = (
+        queryset.order_by()
+        .annotate(rate_day=day)
+        .values(*group_by, currency_field, "rate_day")
+        .annotate(**{name: Sum(amount) for name, amount in amounts.items()})
+    )
+
+    totals = {}
+    for row in rows:
+        key = tuple(row[name] for name in group_by)
+        group = totals.setdefault(key, dict.fromkeys(amounts, Decimal(0)))
+        factor = table.factor(row[currency_field], to_currency.pk, to_day(row["rate_day"]))
+        for name in amounts:
+            group[name] += Decimal(str(row[name] or 0)) * factor
+
+    return [
+        {**dict(zip(group_by, key)), **{name: value.quantize(CENT) for name, value in group.items()}}
+        for key, group in sorted(totals.items(), key=lambda item: item[0])
+    ]
+
+
+def load_rates(file):
+    """
+    Insert or update rates from a CSV ``file`` with ``date``, ``currency`` and ``rate`` columns.
+
+    ``currency`` is the three-letter code. Returns the number of rows written; raises
+    ``ValueError`` naming the line of the first invalid row.
+    """
+    currencies = dict(Currency.objects.values_list("three_letter_code", "pk"))
+    rates = []
+    for line, row in enumerate(csv.DictReader(file), start=2):
+        try:
+            rates.append(
+                ExchangeRate(
+                    currency_id=currencies[row["currency"].strip().upper()],
+                    date=date_type.fromisoformat(row["date"].strip()),
+                    rate=Decimal(row["rate"].strip()),
+                )
+            )
+        except (KeyError, ValueError, InvalidOperation, AttributeError):
+            raise ValueError(f"Line {line}: expected an ISO date, a known currency code and a decimal rate.")
+
+    with transaction.atomic():
+        ExchangeRate.objects.bulk_create(
+            rates,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["currency", "date"],
+            update_fields=["rate", "updated_at"],
+        )
+        transaction.on_commit(bump_rates_version)
+    return len(rates)
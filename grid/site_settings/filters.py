@@ -3,6 +3,8 @@ import re
 from django.db.models import Q
 from rest_framework.filters import BaseFilterBackend
 
+from grid.core import trigram
+
 
 class SearchFilterBackend(BaseFilterBackend):
     """
@@ -31,3 +33,22 @@ class SearchFilterBackend(BaseFilterBackend):
                 queryset = queryset.filter(search_filter)
 
         return queryset
+
+
+class TrigramSearchFilter(BaseFilterBackend):
+    """
+    Search backend over a denormalized, trigram-indexed document column.
+
+    Takes the same ``search`` parameter as ``SearchFilterBackend``: a quoted term must match
+    one searchable value exactly, otherwise every word must appear in some value. The view
+    names the column in ``search_document_field``. Results are ordered by relevance.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_query = request.query_params.get("search", None)
+
+        if search_query:
+            field_name = getattr(view, "search_document_field", "search_document")
+            queryset = trigram.search(queryset, search_query, field_name).order_by("-search_rank", "-created_at")
+
+        return queryset
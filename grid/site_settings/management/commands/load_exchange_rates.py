@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from grid.site_settings.exchange_rates import load_rates
+
+
+class Command(BaseCommand):
+    help = "Load daily exchange rates from a CSV file with date, currency and rate columns"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file; rates are units of currency per one base currency unit")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="") as file:
+                loaded = load_rates(file)
+        except OSError as error:
+            raise CommandError(f"Cannot read {options['path']}: {error}")
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} exchange rates"))
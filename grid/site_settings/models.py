@@ -1,5 +1,5 @@
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 
 from grid.core.models import CoreModel
 
@@ -12,6 +12,19 @@ class RecruiterShare(CoreModel):
     def __str__(self):
         return f"Recruiter Share: {self.percentage}% for {self.hires} hires"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from grid.recruiters.commission import schedule_tier_recompute
+
+        schedule_tier_recompute()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from grid.recruiters.commission import schedule_tier_recompute
+
+        schedule_tier_recompute()
+        return result
+
 
 class CompanySize(CoreModel):
     name = models.CharField(max_length=255)
@@ -87,6 +100,41 @@ class Currency(CoreModel):
         return f"{self.name} ({self.three_letter_code})"
 
 
+class ExchangeRate(CoreModel):
+    """
+    Daily rate of a currency against ``settings.EXCHANGE_RATE_BASE_CURRENCY``.
+
+    ``rate`` is how many units of ``currency`` one unit of the base currency buys. A rate
+    holds from its date until the next one; see ``grid.site_settings.exchange_rates``.
+    """
+
+    currency = models.ForeignKey(Currency, on_delete=models.CASCADE, related_name="exchange_rates")
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=20, decimal_places=10)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["currency", "date"], name="site_settings_rate_currency_date_uniq"),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .exchange_rates import bump_rates_version
+
+        transaction.on_commit(bump_rates_version)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .exchange_rates import bump_rates_version
+
+        transaction.on_commit(bump_rates_version)
+        return result
+
+    def __str__(self):
+        return f"{self.currency_id} {self.date}: {self.rate}"
+
+
 class Country(CoreModel):
     name = models.CharField(max_length=255)
     two_letter_code = models.CharField(max_length=2)  # ISO 2-letter country code
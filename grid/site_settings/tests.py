@@ -1,4 +1,78 @@
+import io
+
+from datetime import date
+from decimal import Decimal
+
 from django.test import TestCase
 
+from grid.site_settings.exchange_rates import (
+    MissingExchangeRate,
+    get_rate_table,
+    load_rates,
+)
+from grid.site_settings.models import Currency, ExchangeRate
+
+
+class ExchangeRateTests(TestCase):
+    """Test cases for the exchange rate table and conversion"""
+
+    def setUp(self):
+        defaults = {
+            "job_posting_fee": 0,
+            "extra_role_fee": 0,
+            "top_job_fee": 0,
+            "salary_min": 0,
+            "commission_min": 0,
+        }
+        self.usd = Currency.objects.create(name="US Dollar", three_letter_code="USD", **defaults)
+        self.eur = Currency.objects.create(name="Euro", three_letter_code="EUR", **defaults)
+        self.gbp = Currency.objects.create(name="Pound Sterling", three_letter_code="GBP", **defaults)
+        with self.captureOnCommitCallbacks(execute=True):
+            ExchangeRate.objects.create(currency=self.eur, date=date(2024, 1, 1), rate=Decimal("0.9"))
+            ExchangeRate.objects.create(currency=self.eur, date=date(2024, 2, 1), rate=Decimal("0.8"))
+            ExchangeRate.objects.create(currency=self.gbp, date=date(2024, 1, 1), rate=Decimal("0.75"))
+
+    def test_latest_rate_on_or_before_date_is_used(self):
+        """Test that a rate holds until the next one and cross rates go through the base currency"""
+        table = get_rate_table()
+
+        self.assertEqual(table.convert(100, self.usd.pk, self.eur.pk, date(2024, 1, 31)), Decimal("90.0"))
+        self.assertEqual(table.convert(100, self.usd.pk, self.eur.pk, date(2024, 2, 15)), Decimal("80.0"))
+        self.assertEqual(table.convert(75, self.gbp.pk, self.eur.pk, date(2024, 1, 2)), Decimal("90.0"))
+        with self.assertRaises(MissingExchangeRate):
+            table.rate(self.eur.pk, date(2023, 12, 31))
+
+    def test_table_reloads_when_rates_change(self):
+        """Test that committing a rate change makes the cached table reload"""
+        table = get_rate_table()
+        self.assertIs(get_rate_table(), table)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rate = ExchangeRate.objects.create(currency=self.gbp, date=date(2024, 2, 1), rate=Decimal("0.7"))
+            # Other processes must not load the rate before it is committed
+            self.assertIs(get_rate_table(), table)
+
+        self.assertIsNot(get_rate_table(), table)
+        self.assertEqual(get_rate_table().rate(self.gbp.pk, date(2024, 2, 1)), Decimal("0.7"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rate.delete()
+        self.assertEqual(get_rate_table().rate(self.gbp.pk, date(2024, 2, 1)), Decimal("0.75"))
+
+    def test_load_rates_from_csv(self):
+        """Test that loading a file inserts new rates and updates existing ones"""
+        file = io.StringIO("date,currency,rate\n2024-02-01,eur,0.85\n2024-03-01,EUR,0.95\n")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(load_rates(file), 2)
+
+        self.assertEqual(ExchangeRate.objects.filter(currency=self.eur).count(), 3)
+        self.assertEqual(get_rate_table().rate(self.eur.pk, date(2024, 2, 1)), Decimal("0.85"))
+
+    def test_invalid_rows_are_reported_by_line(self):
+        """Test that a bad row names its line and loads nothing"""
+        file = io.StringIO("date,currency,rate\n2024-02-01,EUR,0.85\n2024-03-01,XXX,1\n")
 
-# Create your tests here.
+        with self.assertRaisesMessage(ValueError, "Line 3"):
+            load_rates(file)
+        self.assertEqual(ExchangeRate.objects.count(), 3)
@@ -58,7 +58,9 @@ class UserAdmin(BaseUserAdmin):
                 ),
             },
         ),
+        (_("Team"), {"fields": ("is_team_member", "team_invite", "team_client", "team_agency")}),
     )
+    readonly_fields = ("is_team_member", "team_invite", "team_client", "team_agency")
     ordering = ("email",)
     search_fields = (
         "uuid",
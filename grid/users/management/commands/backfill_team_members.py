@@ -0,0 +1,39 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from grid.users.choices import InviteStatus
+from grid.users.models import TeamInvite, User
+
+
+TEAM_FIELDS = ["is_team_member", "team_invite", "team_client", "team_agency"]
+
+
+class Command(BaseCommand):
+    help = "Store the team membership of users who accepted a team invite on the users"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        accepted = TeamInvite.objects.filter(status=InviteStatus.ACCEPTED).select_related(
+            "inviter__clientuserprofile__client", "inviter__recruiter__agency"
+        )
+        members = User.objects.filter(is_team_member=False, email__in=accepted.values("email")).order_by("pk")
+
+        updated = 0
+        rows = members.iterator(chunk_size=batch_size)
+        while batch := list(islice(rows, batch_size)):
+            # The latest accepted invite of each user decides their team
+            invites = {}
+            for invite in accepted.filter(email__in=[user.email for user in batch]).order_by("-updated_at"):
+                invites.setdefault(invite.email, invite)
+            for user in batch:
+                user.join_team(invites[user.email])
+            with transaction.atomic():
+                User.objects.bulk_update(batch, TEAM_FIELDS)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Stored the team membership of {updated} users"))
@@ -2,12 +2,33 @@ from django.contrib.auth.base_user import BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
 
+# Profiles that make up a user's identity, see ``CustomUserManager.with_identity``
+IDENTITY_RELATIONS = [
+    "adminuserprofile",
+    "clientuserprofile__client",
+    "recruiter__agency",
+    "recruiter__address",
+    "team_invite",
+    "team_client",
+    "team_agency",
+]
+
+
 class CustomUserManager(BaseUserManager):
     """
     Custom user model manager where email is the unique identifiers
     for authentication instead of usernames.
     """
 
+    def with_identity(self):
+        """
+        Users with their admin, client and recruiter profiles and their team joined in.
+
+        A user without one of the profiles has it cached as missing, so ``hasattr(user, "recruiter")``
+        and the like are answered without a query.
+        """
+        return self.select_related(*IDENTITY_RELATIONS)
+
     def create_user(self, email, password, **extra_fields):
         """
         Create and save a user with the given email and password.
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recruiters", "0018_commission_share_tiers"),
+        ("clients", "0014_content_addressed_images"),
+        ("users", "0002_teaminvite"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="is_team_member",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="team_agency",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="team_members",
+                to="recruiters.agency",
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="team_client",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="team_members",
+                to="clients.client",
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="team_invite",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="users.teaminvite",
+            ),
+        ),
+    ]
@@ -3,7 +3,6 @@ import secrets
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
-from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from grid.core.models import CoreModel
@@ -15,6 +14,22 @@ class User(AbstractUser, CoreModel):
     username = None
     email = models.EmailField(_("email address"), unique=True)
     role = models.CharField(max_length=10, choices=Roles.choices, default=Roles.CLIENT, verbose_name=_("role"))
+    # Set from the accepted team invite, see ``join_team``
+    is_team_member = models.BooleanField(default=False, editable=False)
+    team_invite = models.ForeignKey(
+        "users.TeamInvite", on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="+"
+    )
+    team_client = models.ForeignKey(
+        "clients.Client", on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="team_members"
+    )
+    team_agency = models.ForeignKey(
+        "recruiters.Agency",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="team_members",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -36,36 +51,30 @@ class User(AbstractUser, CoreModel):
     def is_admin(self):
         return self.role == Roles.ADMIN
 
-    @cached_property
-    def team_invite(self):
+    def join_team(self, invite):
         """
-        Returns the accepted team invite with related inviter data
-        """
-        return (
-            TeamInvite.objects.select_related("inviter__clientuserprofile__client", "inviter__recruiter__agency")
-            .filter(email=self.email, status=InviteStatus.ACCEPTED)
-            .first()
-        )
+        Record the user as a member of the client or agency of the ``invite``'s inviter.
 
-    @property
-    def is_team_member(self):
+        Membership is stored on the user when they accept the invite, so reading it costs no query.
         """
-        Returns True if user was invited as a team member (has accepted invite)
-        """
-        # TODO: Update this with a better logic when teams functionality is included
-        return bool(self.team_invite)
+        inviter = invite.inviter
+        self.is_team_member = True
+        self.team_invite = invite
+        if invite.invite_type == InviteType.CLIENT:
+            profile = getattr(inviter, "clientuserprofile", None)
+            self.team_client = profile.client if profile else None
+        else:
+            recruiter = getattr(inviter, "recruiter", None)
+            self.team_agency = recruiter.agency if recruiter else None
 
     @property
     def owner_profile(self):
         """
-        Returns organization owner's profile (client/recruiter) if user is team member
+        Returns the organization (client/agency) the user is a team member of
         """
-        if not self.team_invite:
+        if not self.is_team_member:
             return None
-
-        if self.team_invite.invite_type == InviteType.CLIENT:
-            return self.team_invite.inviter.clientuserprofile.client
-        return self.team_invite.inviter.recruiter
+        return self.team_client if self.is_client else self.team_agency
 
 
 class TeamInvite(CoreModel):
@@ -145,7 +145,9 @@ class MemberRegisterSerializer(serializers.Serializer):
     def create(self, validated_data):
         token = validated_data.pop("token")
         password1 = validated_data.pop("password1")
-        invite = TeamInvite.objects.get(token=token)
+        invite = TeamInvite.objects.select_related(
+            "inviter__clientuserprofile__client", "inviter__recruiter__agency"
+        ).get(token=token)
 
         with transaction.atomic():
             # Create user based on invite type
@@ -157,6 +159,7 @@ class MemberRegisterSerializer(serializers.Serializer):
                 is_superuser=False,
             )
             user.password = make_password(password1)
+            user.join_team(invite)
             user.save()
 
             # Create and verify email address using allauth
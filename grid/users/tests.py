@@ -1,14 +1,31 @@
+from io import StringIO
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from grid.admins.models import AdminUserProfile
+from grid.clients.models import Client, ClientUserProfile
+from grid.core.permissions import (
+    IsAdminEditor,
+    IsAdminSuperAdmin,
+    IsAdminViewer,
+    IsClientAdmin,
+    IsClientSuperAdmin,
+    IsRecruiterMember,
+    IsRecruiterSuperAdmin,
+)
+from grid.recruiters.models import Agency, Recruiter
+from grid.users.authentication import IdentityJWTAuthentication
 from grid.users.choices import InviteStatus, InviteType, Roles
 from grid.users.models import TeamInvite, User
+from grid.users.serializers import MemberRegisterSerializer
 
 
 User = get_user_model()
@@ -116,23 +133,26 @@ class TeamInviteModelTests(TestCase):
         self.assertNotEqual(invite1.token, invite2.token)
 
     def test_user_team_invite_property(self):
-        """Test user's team_invite property"""
-        # Create and accept an invite
+        """Test user's team_invite is the invite they joined with"""
+        client = Client.objects.create(company_name="Acme")
+        ClientUserProfile.objects.create(user=self.inviter, first_name="Owen", last_name="Owner", client=client)
         invite = TeamInvite.objects.create(**self.invite_data)
-        invite.status = InviteStatus.ACCEPTED
-        invite.save()
-
-        # Create user with the invited email
         user = User.objects.create_user(email="invited@example.com", password="pass123")
 
-        # Test team_invite property
-        self.assertEqual(user.team_invite, invite)
+        user.join_team(invite)
+        user.save()
+        user = User.objects.with_identity().get(pk=user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.team_invite, invite)
+            self.assertEqual(user.owner_profile, client)
 
     def test_user_is_team_member_property(self):
         """Test user's is_team_member property"""
         # Create user without invite
         user = User.objects.create_user(email="regular@example.com", password="pass123")
         self.assertFalse(user.is_team_member)
+        self.assertIsNone(user.owner_profile)
 
         # Create and accept an invite
         invite = TeamInvite.objects.create(
@@ -141,8 +161,49 @@ class TeamInviteModelTests(TestCase):
             invite_type=InviteType.CLIENT,
             status=InviteStatus.ACCEPTED,
         )
+        user.join_team(invite)
         self.assertTrue(user.is_team_member)
 
+    def test_member_registration_joins_team(self):
+        """Test registering from an invite stores the team on the user"""
+        client = Client.objects.create(company_name="Acme")
+        ClientUserProfile.objects.create(user=self.inviter, first_name="Owen", last_name="Owner", client=client)
+        invite = TeamInvite.objects.create(**self.invite_data)
+
+        serializer = MemberRegisterSerializer(
+            data={"token": invite.token, "password1": "Str0ng-pass!", "password2": "Str0ng-pass!"}
+        )
+        serializer.is_valid(raise_exception=True)
+        user = serializer.save()
+
+        self.assertTrue(user.is_team_member)
+        self.assertEqual((user.team_invite, user.team_client, user.team_agency), (invite, client, None))
+
+    def test_backfill_team_members(self):
+        """Test users who accepted an invite are given their team"""
+        agency = Agency.objects.create(agency_name="Agency", make_payable_to="Agency")
+        owner = User.objects.create_user(email="owner@example.com", password="pass123", role=Roles.RECRUITER)
+        Recruiter.objects.create(user=owner, first_name="Owen", last_name="Owner", linkedin="owen", agency=agency)
+        invite = TeamInvite.objects.create(
+            email="member@example.com", inviter=owner, invite_type=InviteType.RECRUITER, status=InviteStatus.ACCEPTED
+        )
+        TeamInvite.objects.create(email="pending@example.com", inviter=owner, invite_type=InviteType.RECRUITER)
+        member = User.objects.create_user(email="member@example.com", password="pass123", role=Roles.RECRUITER)
+        pending = User.objects.create_user(email="pending@example.com", password="pass123", role=Roles.RECRUITER)
+
+        output = StringIO()
+        call_command("backfill_team_members", stdout=output)
+        self.assertIn("1 users", output.getvalue())
+
+        member.refresh_from_db()
+        self.assertTrue(member.is_team_member)
+        self.assertEqual((member.team_invite, member.owner_profile), (invite, agency))
+        pending.refresh_from_db()
+        self.assertFalse(pending.is_team_member)
+
+        call_command("backfill_team_members", stdout=output)
+        self.assertIn("0 users", output.getvalue())
+
 
 class UserAPITests(APITestCase):
     """Test cases for User API endpoints"""
@@ -275,3 +336,75 @@ class TeamInviteTests(APITestCase):
 
         invite.refresh_from_db()
         self.assertEqual(invite.status, InviteStatus.DECLINED)
+
+
+class IdentityAuthenticationTests(TestCase):
+    """Test that the JWT user is loaded with their profiles"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, user):
+        token = RefreshToken.for_user(user).access_token
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        with self.assertNumQueries(1):
+            authenticated, _ = IdentityJWTAuthentication().authenticate(request)
+        return authenticated
+
+    def granted(self, user, permissions):
+        request = self.factory.get("/")
+        request.user = user
+        return [permission for permission in permissions if permission().has_permission(request, None)]
+
+    def test_permissions_and_profiles_cost_no_queries(self):
+        agency = Agency.objects.create(agency_name="Agency", make_payable_to="Agency")
+        recruiter_user = User.objects.create_user(
+            email="recruiter@example.com", password="pass123", role=Roles.RECRUITER
+        )
+        Recruiter.objects.create(
+            user=recruiter_user,
+            first_name="Rita",
+            last_name="Recruiter",
+            linkedin="rita",
+            agency=agency,
+            superuser=True,
+        )
+        admin_user = User.objects.create_user(email="admin@example.com", password="pass123", role=Roles.ADMIN)
+        AdminUserProfile.objects.create(
+            user=admin_user, first_name="Ada", last_name="Admin", user_type=AdminUserProfile.UserType.EDITOR
+        )
+        permissions = [
+            IsRecruiterSuperAdmin,
+            IsRecruiterMember,
+            IsClientSuperAdmin,
+            IsClientAdmin,
+            IsAdminSuperAdmin,
+            IsAdminEditor,
+            IsAdminViewer,
+        ]
+
+        user = self.authenticate(recruiter_user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.granted(user, permissions), [IsRecruiterSuperAdmin])
+            self.assertEqual(user.recruiter.agency, agency)
+            self.assertIsNone(user.recruiter.address)
+            self.assertFalse(hasattr(user, "clientuserprofile"))
+
+        user = self.authenticate(admin_user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.granted(user, permissions), [IsAdminEditor])
+            self.assertFalse(hasattr(user, "recruiter"))
+
+    def test_unknown_and_inactive_users_are_rejected(self):
+        user = User.objects.create_user(email="client@example.com", password="pass123")
+        token = RefreshToken.for_user(user).access_token
+        user.is_active = False
+        user.save()
+
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+            IdentityJWTAuthentication().authenticate(request)
+
+        user.delete()
+        with self.assertRaisesMessage(AuthenticationFailed, "User not found"):
+            IdentityJWTAuthentication().authenticate(request)